@@ -0,0 +1,196 @@
+"""Deterministic offline chat model for exercising chains without API keys.
+
+``FakeChatModel`` answers with a fixed reply (or one computed from the
+messages), waits a configurable latency first, and streams word by word.
+``respond`` may also return an ``AIMessage`` with ``tool_calls``; together with
+the no-op ``bind_tools`` that lets ``with_structured_output`` run offline. The
+async paths use ``asyncio.sleep`` so hundreds of concurrent calls really do
+overlap, which is what the batch and streaming tools need to be measured.
+"""
+import asyncio
+import inspect
+import json
+import random
+import threading
+import time
+import typing
+from typing import Any, AsyncIterator, Callable, Iterator, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.runnables import Runnable
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from BasicLLM.scheduler import estimate_tokens
+
+
+class FakeRateLimitError(Exception):
+    """Stand-in for a provider's HTTP 429 error."""
+
+    status_code = 429
+
+
+class FakeChatModel(BaseChatModel):
+    """Offline chat model with configurable latency.
+
+    Args:
+        response (str): Reply used when ``respond`` is not set. Defaults to "ok".
+        respond (Callable | None): Builds the reply (text or ``AIMessage``) from the input messages.
+        latency (float): Seconds to wait before the first token. Defaults to 0.
+        jitter (float): Extra uniform random latency in ``[0, jitter)`` seconds.
+        token_latency (float): Seconds between generated words, streamed or not. Defaults to 0.
+        error_rate (float): Probability that a call raises ``FakeRateLimitError``. Defaults to 0.
+        seed (int | None): Seed for the jitter and errors so runs are reproducible.
+    """
+
+    response: str = "ok"
+    respond: Callable[[list[BaseMessage]], str | AIMessage] | None = None
+    latency: float = 0.0
+    jitter: float = 0.0
+    token_latency: float = 0.0
+    error_rate: float = 0.0
+    seed: int | None = None
+    model_name: str = "fake-chat"
+
+    _rng: random.Random = PrivateAttr(default_factory=random.Random)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _calls: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng.seed(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"model_name": self.model_name, "response": self.response}
+
+    @property
+    def calls(self) -> int:
+        """Number of upstream calls this model has served."""
+        return self._calls
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Any = None, **kwargs: Any) -> Runnable:
+        # Tool calls come from ``respond``; the tool schemas themselves are not needed.
+        return self
+
+    def _reply(self, messages: list[BaseMessage]) -> tuple[AIMessage, float]:
+        with self._lock:
+            self._calls += 1
+            delay = self.latency + (self._rng.random() * self.jitter if self.jitter else 0.0)
+            failed = self.error_rate and self._rng.random() < self.error_rate
+        if failed:
+            raise FakeRateLimitError(f"{self.model_name}: rate limited")
+        reply = self.respond(messages) if self.respond else self.response
+        message = reply if isinstance(reply, AIMessage) else AIMessage(content=reply)
+        if message.usage_metadata is None:
+            # Estimated like a real provider's usage report, so token metrics work offline.
+            input_tokens = sum(estimate_tokens(m.text) for m in messages)
+            output_tokens = estimate_tokens(message.text)
+            message.usage_metadata = {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            }
+        return message, delay
+
+    def _generation_time(self, text: str) -> float:
+        # Non-streaming calls still wait for every token to be generated.
+        return self.token_latency * max(0, len(self._pieces(text)) - 1)
+
+    @staticmethod
+    def _pieces(text: str) -> list[str]:
+        words = text.split(" ")
+        return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+    @staticmethod
+    def _chunk(piece: str, message: AIMessage | None) -> ChatGenerationChunk:
+        """A streamed piece; the first one also carries the reply's tool calls and usage."""
+        tool_call_chunks = [
+            {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+            for i, call in enumerate(message.tool_calls if message else [])
+        ]
+        return ChatGenerationChunk(message=AIMessageChunk(
+            content=piece,
+            tool_call_chunks=tool_call_chunks,
+            usage_metadata=message.usage_metadata if message else None,
+        ))
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message, delay = self._reply(messages)
+        time.sleep(delay + self._generation_time(message.text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message, delay = self._reply(messages)
+        await asyncio.sleep(delay + self._generation_time(message.text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        message, delay = self._reply(messages)
+        time.sleep(delay)
+        # Sleep to a per-token deadline so sleep overshoot does not accumulate.
+        started = time.perf_counter()
+        for i, piece in enumerate(self._pieces(message.text)):
+            if i and self.token_latency:
+                time.sleep(max(0.0, started + i * self.token_latency - time.perf_counter()))
+            chunk = self._chunk(piece, message if i == 0 else None)
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        message, delay = self._reply(messages)
+        await asyncio.sleep(delay)
+        started = time.perf_counter()
+        for i, piece in enumerate(self._pieces(message.text)):
+            if i and self.token_latency:
+                await asyncio.sleep(max(0.0, started + i * self.token_latency - time.perf_counter()))
+            chunk = self._chunk(piece, message if i == 0 else None)
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+
+def chat_model_params(builder: Callable) -> list[str]:
+    """Names of the parameters of ``builder`` annotated as a chat model.
+
+    ``BaseChatModel | None``, ``Optional[BaseChatModel]`` and subclasses all
+    count. The annotations are resolved to types rather than matched as text.
+    """
+    hints = typing.get_type_hints(builder)
+
+    def is_chat_model(annotation: Any) -> bool:
+        if isinstance(annotation, type):
+            return issubclass(annotation, BaseChatModel)
+        return any(is_chat_model(arg) for arg in typing.get_args(annotation))
+
+    return [name for name in inspect.signature(builder).parameters if is_chat_model(hints.get(name))]
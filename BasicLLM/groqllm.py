@@ -1,18 +1,8 @@
-from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 
-load_dotenv()
-
-def get_groq_llm(model: str = "llama-3.1-8b-instant") -> ChatGroq:
-    """Initialize and return a Groq LLM instance.
+from BasicLLM.model_registry import get_groq_llm
 
-    Args:
-        model (str): The Groq model to use. Defaults to "llama-3.1-8b-instant".
-    Returns:
-        ChatGroq: An instance of the Groq LLM.
-    """
-    llm = ChatGroq(model=model)
-    return llm
+load_dotenv()
 
 if __name__ == "__main__":
     groq_llm = get_groq_llm()
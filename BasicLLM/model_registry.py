@@ -0,0 +1,413 @@
+"""Shared registry of pooled chat model instances.
+
+Every script used to build its own ``ChatGroq`` / ``ChatGoogleGenerativeAI``
+through a copy-pasted ``get_groq_llm`` / ``get_gemini_llm`` helper, which meant
+a new HTTP client (and a new TLS handshake) per call. The registry below hands
+out one cached instance per ``(provider, model, params)`` key and backs all
+Groq models with a single keep-alive connection pool.
+
+Run the scripts that import this module from the repository root, e.g.
+``python -m OutputParser.str_output_parser``.
+"""
+import asyncio
+import contextlib
+import enum
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+import httpx
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableBinding, RunnableConfig
+from pydantic import ConfigDict, Field, PrivateAttr
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """Connection pool settings shared by every model of a registry."""
+
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    timeout: float = 60.0
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+class HttpPool:
+    """Lazily created sync and async ``httpx`` clients sharing one ``PoolConfig``.
+
+    The async client binds its connections to the event loop that first uses
+    it, so it is meant for a single long-lived loop per process.
+    """
+
+    def __init__(self, config: PoolConfig):
+        self.config = config
+        self._lock = threading.Lock()
+        self._client: httpx.Client | None = None
+        self._async_client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(limits=self.config.limits(), timeout=self.config.timeout)
+            return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        with self._lock:
+            if self._async_client is None:
+                self._async_client = httpx.AsyncClient(limits=self.config.limits(), timeout=self.config.timeout)
+            return self._async_client
+
+    def close(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+            async_client, self._async_client = self._async_client, None
+        if client is not None:
+            client.close()
+        if async_client is not None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop is not None:
+                # We cannot block inside a running loop; schedule the close on it.
+                loop.create_task(async_client.aclose())
+            else:
+                # No loop running: close it on a short-lived one.
+                asyncio.run(async_client.aclose())
+
+    async def aclose(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+            async_client, self._async_client = self._async_client, None
+        if client is not None:
+            client.close()
+        if async_client is not None:
+            await async_client.aclose()
+
+
+ProviderBuilder = Callable[..., BaseChatModel]
+
+# Set by ``ModelRegistry.deferred``; None means "use the registry's own ``lazy``".
+_lazy_scope: ContextVar[bool | None] = ContextVar("lazy_models", default=None)
+
+
+def _build_groq(model: str, pool: HttpPool, **params: Any) -> BaseChatModel:
+    from langchain_groq import ChatGroq
+
+    return ChatGroq(model=model, http_client=pool.client, http_async_client=pool.async_client, **params)
+
+
+def _build_gemini(model: str, pool: HttpPool, **params: Any) -> BaseChatModel:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    # google-genai owns its httpx client; hand it our pool limits instead.
+    client_args = {"limits": pool.config.limits(), **params.pop("client_args", {})}
+    return ChatGoogleGenerativeAI(model=model, client_args=client_args, **params)
+
+
+_VALUE_TYPES = (type(None), bool, int, float, str, bytes, enum.Enum)
+
+
+def _freeze(value: Any) -> Any:
+    """Hashable form of a model param, made from its value only.
+
+    Objects are accepted when they expose a ``cache_key`` (e.g. ``TieredResponseCache``).
+    Anything else would be keyed on its identity, adding a registry entry per
+    instance that is never evicted, so it is rejected.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    if isinstance(value, _VALUE_TYPES):
+        return value
+    key = getattr(value, "cache_key", None)
+    if key is not None and not callable(key):
+        return (type(value).__qualname__, _freeze(key))
+    raise TypeError(
+        f"Model param of type {type(value).__name__} has no value-based key; pass plain values, "
+        "or an object with a cache_key, or build the model yourself instead of using the registry"
+    )
+
+
+class LazyModel(BaseChatModel):
+    """Stand-in for a registry model that is built on first use.
+
+    Returned by ``ModelRegistry.get`` while the registry is lazy: a chain can be
+    assembled without importing the provider SDK or opening clients, and the
+    first call (or any other attribute, e.g. ``with_structured_output``) builds
+    the real model through the registry. It is a ``BaseChatModel`` so wrappers
+    such as ``SingleFlightChatModel`` treat it as one: ``_get_llm_string`` and
+    ``bind_tools`` come from the real model, and ``stop`` and bound kwargs are
+    passed through. Calls are forwarded with their config, so callbacks see the
+    real model's run.
+    """
+
+    model_config = ConfigDict(protected_namespaces=())
+
+    provider: str
+    model_name: str
+    params: dict[str, Any] = Field(default_factory=dict)
+
+    _registry: "ModelRegistry" = PrivateAttr()
+    _model: BaseChatModel | None = PrivateAttr(default=None)
+
+    def __init__(self, registry: "ModelRegistry", provider: str, model: str, params: dict[str, Any]):
+        super().__init__(provider=provider, model_name=model, params=params)
+        self._registry = registry
+
+    @property
+    def model(self) -> BaseChatModel:
+        if self._model is None:
+            self._model = self._registry.build(self.provider, self.model_name, **self.params)
+        return self._model
+
+    async def _amodel(self) -> BaseChatModel:
+        return self._model or await asyncio.to_thread(lambda: self.model)
+
+    @property
+    def _llm_type(self) -> str:
+        return f"lazy-{self.provider}"
+
+    def _get_llm_string(self, stop: list[str] | None = None, **kwargs: Any) -> str:
+        return self.model._get_llm_string(stop=stop, **kwargs)
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable:
+        # Keep the binding on this stand-in so wrappers around it still see every call.
+        bound = self.model.bind_tools(tools, **kwargs)
+        if bound is self.model:
+            return self
+        if isinstance(bound, RunnableBinding) and bound.bound is self.model:
+            return self.bind(**bound.kwargs)
+        return bound
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Runnable:
+        return self.model.with_structured_output(schema, **kwargs)
+
+    def invoke(self, input: LanguageModelInput, config: RunnableConfig | None = None, **kwargs: Any) -> BaseMessage:
+        return self.model.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input: LanguageModelInput, config: RunnableConfig | None = None, **kwargs: Any) -> BaseMessage:
+        return await (await self._amodel()).ainvoke(input, config, **kwargs)
+
+    def batch(self, inputs: list, config: Any = None, **kwargs: Any) -> list:
+        return self.model.batch(inputs, config, **kwargs)
+
+    async def abatch(self, inputs: list, config: Any = None, **kwargs: Any) -> list:
+        return await (await self._amodel()).abatch(inputs, config, **kwargs)
+
+    def stream(self, input: LanguageModelInput, config: RunnableConfig | None = None, **kwargs: Any):
+        yield from self.model.stream(input, config, **kwargs)
+
+    async def astream(self, input: LanguageModelInput, config: RunnableConfig | None = None, **kwargs: Any):
+        async for chunk in (await self._amodel()).astream(input, config, **kwargs):
+            yield chunk
+
+    def _generate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager: Any = None, **kwargs: Any):
+        return self.model._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager: Any = None, **kwargs: Any):
+        return await (await self._amodel())._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            return super().__getattr__(name)
+        return getattr(self.model, name)
+
+    def __repr__(self) -> str:
+        state = "built" if self._model is not None else "not built"
+        return f"LazyModel({self.provider!r}, {self.model_name!r}, {state})"
+
+
+class ModelRegistry:
+    """Thread- and asyncio-safe cache of chat model instances.
+
+    Args:
+        pool (PoolConfig): Connection pool settings. Defaults to ``PoolConfig()``.
+        lazy (bool): Hand out ``LazyModel`` stand-ins from ``get`` so models (and
+            provider SDK imports) are deferred to first use. Defaults to False.
+            ``deferred`` overrides it for one block of code.
+    """
+
+    def __init__(self, pool: PoolConfig | None = None, lazy: bool = False):
+        self._pool_config = pool or PoolConfig()
+        self._pools: dict[str, HttpPool] = {}
+        self._builders: dict[str, ProviderBuilder] = {"groq": _build_groq, "gemini": _build_gemini}
+        self._models: dict[tuple, BaseChatModel] = {}
+        self._lazy_models: dict[tuple, LazyModel] = {}
+        self._lock = threading.RLock()
+        self.lazy = lazy
+
+    @contextlib.contextmanager
+    def deferred(self, lazy: bool = True) -> Iterator["ModelRegistry"]:
+        """Within the block, ``get`` is lazy (or not) regardless of ``self.lazy``.
+
+        The setting lives in a context variable, so other threads and tasks
+        building chains at the same time are not affected.
+        """
+        token = _lazy_scope.set(lazy)
+        try:
+            yield self
+        finally:
+            _lazy_scope.reset(token)
+
+    def register_provider(self, name: str, builder: ProviderBuilder) -> None:
+        """Register a ``builder(model, pool, **params)`` for a provider name."""
+        with self._lock:
+            self._builders[name] = builder
+
+    def configure_pool(self, pool: PoolConfig) -> None:
+        """Replace the pool settings. Already-built models keep their old pool until ``close()``."""
+        with self._lock:
+            self._pool_config = pool
+
+    def pool(self, provider: str) -> HttpPool:
+        with self._lock:
+            if provider not in self._pools:
+                self._pools[provider] = HttpPool(self._pool_config)
+            return self._pools[provider]
+
+    def get(self, provider: str, model: str, **params: Any) -> BaseChatModel | LazyModel:
+        """Return the cached model for ``(provider, model, params)``, building it on first use.
+
+        Args:
+            provider (str): A registered provider name, e.g. "groq" or "gemini".
+            model (str): The provider's model name.
+            **params: Extra constructor arguments, part of the cache key: plain values,
+                or objects with a ``cache_key`` (others raise ``TypeError``).
+        Returns:
+            BaseChatModel | LazyModel: A shared model instance, or while the registry is
+                lazy and the model is not built yet, a shared stand-in for it.
+        """
+        key = (provider, model, _freeze(params))
+        cached = self._models.get(key)
+        if cached is not None:
+            return cached
+        lazy = _lazy_scope.get()
+        if lazy if lazy is not None else self.lazy:
+            with self._lock:
+                return self._lazy_models.setdefault(key, LazyModel(self, provider, model, params))
+        return self.build(provider, model, **params)
+
+    def build(self, provider: str, model: str, **params: Any) -> BaseChatModel:
+        """Like ``get``, but always returns the real model, building it now if needed."""
+        key = (provider, model, _freeze(params))
+        cached = self._models.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            cached = self._models.get(key)
+            if cached is None:
+                try:
+                    builder = self._builders[provider]
+                except KeyError:
+                    raise ValueError(f"Unknown provider: {provider!r}") from None
+                cached = builder(model, self.pool(provider), **params)
+                self._models[key] = cached
+            return cached
+
+    async def aget(self, provider: str, model: str, **params: Any) -> BaseChatModel:
+        """Async variant of ``get`` that builds uncached models off the event loop."""
+        key = (provider, model, _freeze(params))
+        cached = self._models.get(key)
+        if cached is not None:
+            return cached
+        return await asyncio.to_thread(self.build, provider, model, **params)
+
+    def warm_up(self, specs: Iterable[tuple[str, str]], urls: Iterable[str] = ()) -> None:
+        """Build models ahead of time and open pooled connections to ``urls``.
+
+        Args:
+            specs (Iterable[tuple[str, str]]): ``(provider, model)`` pairs to build.
+            urls (Iterable[str]): Endpoints to pre-connect to, e.g. the provider base URL.
+                Requests go through the pool of the first provider in ``specs``.
+        """
+        specs = list(specs)
+        for provider, model in specs:
+            self.build(provider, model)
+        if not specs:
+            return
+        client = self.pool(specs[0][0]).client
+        for url in urls:
+            try:
+                client.head(url)
+            except httpx.HTTPError:
+                pass
+
+    def _drain(self) -> tuple[list[BaseChatModel], list[HttpPool]]:
+        with self._lock:
+            models, self._models = list(self._models.values()), {}
+            self._lazy_models = {}
+            pools, self._pools = list(self._pools.values()), {}
+        return models, pools
+
+    @staticmethod
+    def _close_model(model: BaseChatModel) -> None:
+        # Gemini models own a google-genai client with its own pool.
+        client = getattr(model, "client", None)
+        close = getattr(client, "close", None)
+        if callable(close) and not isinstance(client, httpx.Client):
+            try:
+                close()
+            except Exception:
+                pass
+
+    def close(self) -> None:
+        """Drop every cached model and close the shared connection pools."""
+        models, pools = self._drain()
+        for model in models:
+            self._close_model(model)
+        for pool in pools:
+            pool.close()
+
+    async def aclose(self) -> None:
+        """Async variant of ``close`` for code already running inside an event loop."""
+        models, pools = self._drain()
+        for model in models:
+            self._close_model(model)
+        for pool in pools:
+            await pool.aclose()
+
+
+registry = ModelRegistry()
+
+
+def get_model(provider: str, model: str, **params: Any) -> BaseChatModel:
+    """Return a shared model instance from the default registry."""
+    return registry.get(provider, model, **params)
+
+
+def get_groq_llm(model: str = "llama-3.1-8b-instant", **params: Any) -> BaseChatModel:
+    """Return a shared Groq LLM instance.
+
+    Args:
+        model (str): The Groq model to use. Defaults to "llama-3.1-8b-instant".
+    Returns:
+        ChatGroq: A pooled instance of the Groq LLM.
+    """
+    return registry.get("groq", model, **params)
+
+
+def get_gemini_llm(model: str = "gemini-2.5-flash", **params: Any) -> BaseChatModel:
+    """Return a shared Gemini LLM instance.
+
+    Args:
+        model (str): The Gemini model to use. Defaults to "gemini-2.5-flash".
+    Returns:
+        ChatGoogleGenerativeAI: A pooled instance of the Gemini LLM.
+    """
+    return registry.get("gemini", model, **params)
@@ -0,0 +1,93 @@
+"""Micro-benchmark: fresh ChatGroq per request vs. the pooled model registry.
+
+Both variants talk to a local HTTP stand-in for the Groq API, which counts how
+many TCP connections it accepted. With the registry the count stays at the
+pool size instead of growing with the number of requests.
+
+    python -m BasicLLM.registry_benchmark --requests 200
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_groq import ChatGroq
+
+from BasicLLM.model_registry import ModelRegistry, PoolConfig
+
+COMPLETION = {
+    "id": "chatcmpl-local",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "local",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def get_request(self):
+        request = super().get_request()
+        with self._lock:
+            self.connections += 1
+        return request
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address
+        return f"http://{host}:{port}"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps(COMPLETION).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(label: str, server: StandInServer, make_model, requests: int) -> None:
+    server.connections = 0
+    start = time.perf_counter()
+    for _ in range(requests):
+        make_model().invoke("ping")
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {requests} requests  {elapsed * 1000 / requests:7.2f} ms/req  {server.connections} connections")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--requests", type=int, default=200)
+    args = arg_parser.parse_args()
+
+    server = StandInServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    params = {"base_url": server.base_url, "api_key": "local", "max_retries": 0}
+
+    run("fresh", server, lambda: ChatGroq(model="local", **params), args.requests)
+
+    registry = ModelRegistry(PoolConfig(max_keepalive_connections=4))
+    run("registry", server, lambda: registry.get("groq", "local", **params), args.requests)
+
+    registry.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""Provider-aware scheduling across chat models (e.g. Groq and Gemini).
+
+``Provider`` wraps one model with a request-rate and token-rate bucket, a cap
+on in-flight calls and a rolling latency window. ``Scheduler`` routes each call
+to the provider with the best recent latency, fires a hedged duplicate at the
+next provider once the primary runs past its p95, and falls back on timeouts
+or 429s. A scheduler is used like a model:
+
+    groq = Provider("groq", get_groq_llm(), requests_per_second=5)
+    gemini = Provider("gemini", get_gemini_llm(), requests_per_second=5)
+    chain = template | Scheduler([groq, gemini]).as_runnable() | parser
+"""
+import asyncio
+import statistics
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+
+class TokenBucket:
+    """Classic token bucket; ``rate`` tokens per second up to ``capacity``.
+
+    Charges may push the level below zero (e.g. output tokens billed after the
+    fact); later callers then wait until the debt is refilled.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """Take ``amount`` if available and return 0, else return seconds to wait."""
+        with self._lock:
+            self._refill()
+            # Requests larger than the bucket are let through once it is full.
+            needed = min(amount, self.capacity)
+            if self._level >= needed:
+                self._level -= amount
+                return 0.0
+            return (needed - self._level) / self.rate
+
+    def charge(self, amount: float) -> None:
+        with self._lock:
+            self._refill()
+            self._level -= amount
+
+    def acquire(self, amount: float = 1.0) -> None:
+        while (delay := self.try_acquire(amount)) > 0:
+            time.sleep(delay)
+
+    async def aacquire(self, amount: float = 1.0) -> None:
+        while (delay := self.try_acquire(amount)) > 0:
+            await asyncio.sleep(delay)
+
+
+class LatencyWindow:
+    """Rolling window of call latencies; timeouts count with the time they took."""
+
+    def __init__(self, size: int = 200):
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q / 100 * len(samples)))]
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    return status == 429 or "RateLimit" in type(exc).__name__ or "ResourceExhausted" in type(exc).__name__
+
+
+def is_timeout(exc: BaseException) -> bool:
+    return isinstance(exc, (TimeoutError, asyncio.TimeoutError)) or "Timeout" in type(exc).__name__
+
+
+def estimate_tokens(value: Any) -> int:
+    return max(1, len(str(value)) // 4)
+
+
+class Provider:
+    """One model plus its rate limits, concurrency cap and latency stats.
+
+    Args:
+        name (str): Label used in stats, e.g. "groq".
+        model (BaseChatModel): The underlying chat model.
+        requests_per_second (float | None): Request-rate limit. ``None`` disables it.
+        tokens_per_minute (float | None): Token-rate limit. ``None`` disables it.
+        max_in_flight (int): Concurrent calls allowed. Defaults to 8.
+        cooldown (float): Seconds a provider is deprioritised after a 429 or another
+            non-timeout error. Defaults to 5.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: BaseChatModel,
+        requests_per_second: float | None = None,
+        tokens_per_minute: float | None = None,
+        max_in_flight: int = 8,
+        cooldown: float = 5.0,
+    ):
+        self.name = name
+        self.model = model
+        self.requests = TokenBucket(requests_per_second) if requests_per_second else None
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
+        self.max_in_flight = max_in_flight
+        self.cooldown = cooldown
+        self.latency = LatencyWindow()
+        self.cooling_until = 0.0
+        self.in_flight = 0
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+
+    def _track(self, delta: int) -> None:
+        with self._lock:
+            self.in_flight += delta
+
+    def acquire(self, tokens: int) -> None:
+        if self.requests:
+            self.requests.acquire()
+        if self.tokens:
+            self.tokens.acquire(tokens)
+        self._slots.acquire()
+        self._track(1)
+
+    async def aacquire(self, tokens: int) -> None:
+        if self.requests:
+            await self.requests.aacquire()
+        if self.tokens:
+            await self.tokens.aacquire(tokens)
+        # Shares the slot count with sync callers without blocking the event loop.
+        backoff = 0.001
+        while not self._slots.acquire(blocking=False):
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 0.05)
+        self._track(1)
+
+    def release(self, result: Any = None) -> None:
+        self._track(-1)
+        self._slots.release()
+        usage = getattr(result, "usage_metadata", None)
+        if self.tokens and usage:
+            self.tokens.charge(usage.get("output_tokens", 0))
+
+    def record_failure(self, exc: BaseException, elapsed: float) -> None:
+        """A timeout becomes a latency sample; any other error puts the provider in cooldown."""
+        if is_timeout(exc):
+            self.latency.add(elapsed)
+        else:
+            self.cooling_until = time.monotonic() + self.cooldown
+
+    def score(self, prior: float = 0.0) -> float:
+        """Lower is better: cooling providers last, then by rolling p50 latency.
+
+        Args:
+            prior (float): p50 assumed while the provider has no samples yet.
+        """
+        penalty = 1e6 if time.monotonic() < self.cooling_until else 0.0
+        p50 = self.latency.percentile(50)
+        return penalty + (prior if p50 is None else p50)
+
+
+@dataclass
+class SchedulerStats:
+    calls: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    fallbacks: int = 0
+    failures: int = 0
+
+
+class Scheduler:
+    """Latency-routed, hedged, rate-limited calls across several providers.
+
+    Args:
+        providers (list[Provider]): Candidates; list order breaks latency ties.
+        timeout (float | None): Per-attempt timeout in seconds. Defaults to 60.
+        hedge_after (float): Hedge delay used until a provider has ``min_samples`` latencies.
+        hedge_percentile (float): Latency percentile that triggers a hedge. Defaults to 95.
+        min_samples (int): Samples needed before the percentile is trusted. Defaults to 20.
+        max_hedges (int): Extra concurrent attempts per call. Defaults to 1.
+    """
+
+    def __init__(
+        self,
+        providers: list[Provider],
+        timeout: float | None = 60.0,
+        hedge_after: float = 2.0,
+        hedge_percentile: float = 95.0,
+        min_samples: int = 20,
+        max_hedges: int = 1,
+    ):
+        self.providers = providers
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.max_hedges = max_hedges
+        self.stats = SchedulerStats()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=sum(p.max_in_flight for p in providers))
+        # Chains built around ``as_runnable`` are rarely closed; release the threads with the scheduler.
+        weakref.finalize(self, self._executor.shutdown, wait=False, cancel_futures=True)
+
+    def _count(self, field_name: str) -> None:
+        with self._lock:
+            setattr(self.stats, field_name, getattr(self.stats, field_name) + 1)
+
+    def route(self) -> list[Provider]:
+        """Providers in the order they should be tried for the next call.
+
+        A provider without samples is assumed to be as fast as the median measured one,
+        so it is tried on ties (list order) but does not jump ahead of every known provider.
+        """
+        measured = [p50 for p in self.providers if (p50 := p.latency.percentile(50)) is not None]
+        prior = statistics.median(measured) if measured else 0.0
+        return sorted(self.providers, key=lambda provider: provider.score(prior))
+
+    def hedge_delay(self, provider: Provider) -> float:
+        if len(provider.latency) < self.min_samples:
+            return self.hedge_after
+        return provider.latency.percentile(self.hedge_percentile)
+
+    def _call(self, provider: Provider, input: Any, config: RunnableConfig | None) -> Any:
+        provider.acquire(estimate_tokens(input))
+        start = time.perf_counter()
+        result = None
+        try:
+            result = provider.model.invoke(input, config)
+            provider.latency.add(time.perf_counter() - start)
+            return result
+        except Exception as exc:
+            provider.record_failure(exc, time.perf_counter() - start)
+            raise
+        finally:
+            provider.release(result)
+
+    async def _acall(self, provider: Provider, input: Any, config: RunnableConfig | None) -> Any:
+        await provider.aacquire(estimate_tokens(input))
+        start = time.perf_counter()
+        result = None
+        try:
+            result = await asyncio.wait_for(provider.model.ainvoke(input, config), self.timeout)
+            provider.latency.add(time.perf_counter() - start)
+            return result
+        except Exception as exc:
+            provider.record_failure(exc, time.perf_counter() - start)
+            raise
+        finally:
+            provider.release(result)
+
+    def _can_retry(self, exc: BaseException) -> bool:
+        return is_rate_limited(exc) or is_timeout(exc)
+
+    def invoke(self, input: Any, config: RunnableConfig | None = None) -> Any:
+        self._count("calls")
+        routed = self.route()
+        order = iter(routed)
+        # future -> (kind, deadline, provider); threads cannot be cancelled, so a
+        # timed-out attempt is abandoned and its late result ignored.
+        pending: dict[Future, tuple[str, float, Provider]] = {}
+        hedges = 0
+        last_error: BaseException | None = None
+
+        def launch(provider: Provider, kind: str) -> None:
+            future = self._executor.submit(self._call, provider, input, config)
+            pending[future] = (kind, time.monotonic() + (self.timeout or float("inf")), provider)
+
+        launch(next(order), "primary")
+        try:
+            while pending:
+                hedge_at = self.hedge_delay(routed[0]) if hedges < self.max_hedges else float("inf")
+                deadline = min(d for _, d, _ in pending.values()) - time.monotonic()
+                wait_for = max(0.0, min(hedge_at, deadline))
+                done, _ = wait(pending, timeout=None if wait_for == float("inf") else wait_for,
+                               return_when=FIRST_COMPLETED)
+                if not done:
+                    now = time.monotonic()
+                    for future in [f for f, (_, d, _) in pending.items() if d <= now]:
+                        _, _, provider = pending.pop(future)
+                        last_error = TimeoutError(f"provider call exceeded {self.timeout}s")
+                        provider.record_failure(last_error, self.timeout)
+                    if pending and hedges < self.max_hedges:
+                        hedges += 1
+                        if provider := next(order, None):
+                            self._count("hedges")
+                            launch(provider, "hedge")
+                    elif not pending and (provider := next(order, None)):
+                        self._count("fallbacks")
+                        launch(provider, "fallback")
+                    continue
+                for future in done:
+                    kind, _, _ = pending.pop(future)
+                    exc = future.exception()
+                    if exc is None:
+                        if kind == "hedge":
+                            self._count("hedge_wins")
+                        return future.result()
+                    last_error = exc
+                    if not self._can_retry(exc) and not pending:
+                        raise exc
+                if not pending and (provider := next(order, None)):
+                    self._count("fallbacks")
+                    launch(provider, "fallback")
+            raise last_error or RuntimeError("no provider available")
+        except BaseException:
+            self._count("failures")
+            raise
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def ainvoke(self, input: Any, config: RunnableConfig | None = None) -> Any:
+        self._count("calls")
+        routed = self.route()
+        order = iter(routed)
+        pending: dict[asyncio.Task, str] = {}
+        hedges = 0
+        last_error: BaseException | None = None
+
+        def launch(provider: Provider, kind: str) -> None:
+            pending[asyncio.create_task(self._acall(provider, input, config))] = kind
+
+        launch(next(order), "primary")
+        try:
+            while pending:
+                timeout = self.hedge_delay(routed[0]) if hedges < self.max_hedges else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedges += 1
+                    if provider := next(order, None):
+                        self._count("hedges")
+                        launch(provider, "hedge")
+                    continue
+                for task in done:
+                    kind = pending.pop(task)
+                    exc = task.exception()
+                    if exc is None:
+                        if kind == "hedge":
+                            self._count("hedge_wins")
+                        return task.result()
+                    last_error = exc
+                    if not self._can_retry(exc) and not pending:
+                        raise exc
+                if not pending and (provider := next(order, None)):
+                    self._count("fallbacks")
+                    launch(provider, "fallback")
+            raise last_error or RuntimeError("no provider available")
+        except BaseException:
+            self._count("failures")
+            raise
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def as_runnable(self) -> Runnable:
+        return RunnableLambda(self.invoke, afunc=self.ainvoke, name="Scheduler")
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,279 @@
+"""Offline benchmark suite for every chain topology in Chain/ and Runnable/.
+
+Each pipeline is rebuilt through its ``build_chain``-style builder with every
+chat model swapped for a deterministic ``FakeChatModel`` (configurable latency
+and reply size) and run in four modes: ``invoke`` (sequential), ``batch``,
+``abatch`` and ``stream``. For each topology and mode the suite records
+throughput, latency percentiles (time to first chunk as well, for streams),
+peak traced memory, and, from a separate zero-latency pass, the framework
+overhead per invocation and per model call: with instant models whatever time
+is left is LangChain composition plus our own glue.
+
+Results are written as JSON; ``--compare`` prints the change against an older
+results file so regressions show up between runs.
+
+    python -m Benchmarks.chain_suite --n 100 --latency 0.02 --output bench.json
+    python -m Benchmarks.chain_suite --topologies sequence branch --compare bench.json
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import platform
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable
+from uuid import UUID
+
+import langchain_core
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable
+
+from BasicLLM.fake_llm import FakeChatModel, chat_model_params
+
+# name -> (builder, input); the builders are the ones the scripts themselves use.
+TOPOLOGIES: dict[str, tuple[str, dict]] = {
+    "sequence": ("Runnable.sequesnce_runnable:build_chain", {"topic": "programming"}),
+    "parallel": ("Runnable.parallel_runnable:build_chain", {"topic": "AI in business"}),
+    "passthrough": ("Runnable.runnable_passthrough:build_chain", {"topic": "programming"}),
+    "branch": ("Runnable.runnable_branch:build_chain", {"topic": "history"}),
+    "branch_early": ("Runnable.runnable_branch:build_early_chain", {"topic": "history"}),
+    "chain_complex": ("Chain.complex_chain:build_chain", {"topics": "AI, ML, DL"}),
+    "chain_conditional": ("Chain.conditional_chain:build_chain", {"text": "The parcel arrived on Tuesday."}),
+    "chain_parallel": ("Chain.parallel_chain:build_chain", {"topic": "partial least squares"}),
+}
+
+MODES = ("invoke", "batch", "abatch", "stream")
+
+
+@dataclass
+class Result:
+    topology: str
+    mode: str
+    n: int
+    latency_s: float
+    output_words: int
+    elapsed_s: float
+    throughput_per_s: float
+    p50_ms: float | None
+    p95_ms: float | None
+    p99_ms: float | None
+    first_chunk_p50_ms: float | None = None
+    model_calls_per_run: float | None = None
+    overhead_us_per_run: float | None = None
+    overhead_us_per_model_call: float | None = None
+    peak_kib: float | None = None
+
+
+def percentile(values: list[float], q: int) -> float | None:
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0] * 1000
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] * 1000
+
+
+def fake_reply(output_words: int) -> Callable[[list[BaseMessage]], str]:
+    reply = " ".join(f"word{i % 50}" for i in range(output_words))
+
+    def respond(messages: list[BaseMessage]) -> str:
+        # conditional_chain parses its classification step with a PydanticOutputParser.
+        if "classify it as positive" in messages[-1].text:
+            return '{"sentiment": "neutral"}'
+        return reply
+
+    return respond
+
+
+def build(topology: str, latency: float, output_words: int) -> tuple[Runnable, list[FakeChatModel]]:
+    spec, _ = TOPOLOGIES[topology]
+    module_name, _, attr = spec.partition(":")
+    builder = getattr(importlib.import_module(module_name), attr)
+    models = {
+        name: FakeChatModel(respond=fake_reply(output_words), latency=latency, seed=i)
+        for i, name in enumerate(chat_model_params(builder))
+    }
+    return builder(**models), list(models.values())
+
+
+class RootRunTimer(BaseCallbackHandler):
+    """Per-item latency inside ``batch`` / ``abatch``: start to end of every root run.
+
+    ``run_inline`` keeps LangChain from dispatching this sync handler to a thread
+    pool on every event under ``abatch``; with streaming topologies that is one
+    thread hop per token, which would be measured as the chain's own latency.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self.started: dict[UUID, float] = {}
+        self.latencies: list[float] = []
+
+    def on_chain_start(self, serialized: Any, inputs: Any, *, run_id: UUID, parent_run_id: UUID | None = None, **kwargs: Any) -> None:
+        if parent_run_id is None:
+            self.started[run_id] = time.perf_counter()
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, parent_run_id: UUID | None = None, **kwargs: Any) -> None:
+        if parent_run_id is None and run_id in self.started:
+            self.latencies.append(time.perf_counter() - self.started.pop(run_id))
+
+
+def vary(inputs: dict, n: int, offset: int = 0) -> list[dict]:
+    """``n`` copies of ``inputs`` with the run index appended to every string value.
+
+    Distinct prompts keep any response cache or in-flight coalescing in the
+    chain from turning a batch of ``n`` runs into a single model call.
+    """
+    return [
+        {key: f"{value} ({offset + i})" if isinstance(value, str) else value for key, value in inputs.items()}
+        for i in range(n)
+    ]
+
+
+def run_mode(
+    chain: Runnable, inputs: dict, mode: str, n: int, concurrency: int, offset: int = 0
+) -> tuple[float, list[float], list[float]]:
+    """Return ``(elapsed, latencies, first_chunk_latencies)`` for ``n`` runs, each with its own input."""
+    latencies: list[float] = []
+    first_chunks: list[float] = []
+    runs = vary(inputs, n, offset)
+    start = time.perf_counter()
+    if mode == "invoke":
+        for run_inputs in runs:
+            t = time.perf_counter()
+            chain.invoke(run_inputs)
+            latencies.append(time.perf_counter() - t)
+    elif mode == "stream":
+        for run_inputs in runs:
+            t = time.perf_counter()
+            first = None
+            for _chunk in chain.stream(run_inputs):
+                if first is None:
+                    first = time.perf_counter() - t
+            latencies.append(time.perf_counter() - t)
+            first_chunks.append(first if first is not None else latencies[-1])
+    else:
+        timer = RootRunTimer()
+        config = {"max_concurrency": concurrency, "callbacks": [timer]}
+        if mode == "batch":
+            chain.batch(runs, config)
+        else:
+            asyncio.run(chain.abatch(runs, config))
+        latencies = timer.latencies
+    return time.perf_counter() - start, latencies, first_chunks
+
+
+def bench(topology: str, modes: list[str], args: argparse.Namespace) -> list[Result]:
+    _, inputs = TOPOLOGIES[topology]
+    results = []
+
+    # Zero-latency pass: what is left is framework and glue overhead.
+    chain, models = build(topology, 0.0, args.output_words)
+    chain.invoke(inputs)
+    calls_before = sum(m.calls for m in models)
+    _, overhead, _ = run_mode(chain, inputs, "invoke", args.overhead_n, 1)
+    calls_per_run = (sum(m.calls for m in models) - calls_before) / args.overhead_n
+    overhead_us = statistics.mean(overhead) * 1e6
+
+    for mode in modes:
+        chain, models = build(topology, args.latency, args.output_words)
+        chain.invoke(inputs)  # warm-up: imports, lazy pydantic models
+        elapsed, latencies, first_chunks = run_mode(chain, inputs, mode, args.n, args.concurrency)
+
+        tracemalloc.start()
+        run_mode(chain, inputs, mode, args.memory_n, args.concurrency, offset=args.n)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.append(Result(
+            topology=topology,
+            mode=mode,
+            n=args.n,
+            latency_s=args.latency,
+            output_words=args.output_words,
+            elapsed_s=round(elapsed, 4),
+            throughput_per_s=round(args.n / elapsed, 2),
+            p50_ms=_round(percentile(latencies, 50)),
+            p95_ms=_round(percentile(latencies, 95)),
+            p99_ms=_round(percentile(latencies, 99)),
+            first_chunk_p50_ms=_round(percentile(first_chunks, 50)),
+            model_calls_per_run=round(calls_per_run, 2),
+            overhead_us_per_run=round(overhead_us, 1),
+            overhead_us_per_model_call=round(overhead_us / calls_per_run, 1) if calls_per_run else None,
+            peak_kib=round(peak / 1024, 1),
+        ))
+        print(_line(results[-1]), flush=True)
+    return results
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 3)
+
+
+def _line(r: Result) -> str:
+    first = f"  first {r.first_chunk_p50_ms:8.2f}" if r.first_chunk_p50_ms is not None else ""
+    return (f"{r.topology:<18} {r.mode:<7} {r.throughput_per_s:9.1f}/s  p50 {r.p50_ms or 0:8.2f}  "
+            f"p95 {r.p95_ms or 0:8.2f}  p99 {r.p99_ms or 0:8.2f} ms  overhead {r.overhead_us_per_run:8.1f} us"
+            f"  peak {r.peak_kib:9.1f} KiB{first}")
+
+
+def compare(results: list[Result], baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = {(r["topology"], r["mode"]): r for r in json.load(f)["results"]}
+    print(f"\nchange vs {baseline_path} (positive = slower / more):")
+    for r in results:
+        old = baseline.get((r.topology, r.mode))
+        if old is None:
+            continue
+        deltas = []
+        for key in ("p50_ms", "throughput_per_s", "overhead_us_per_run", "peak_kib"):
+            new_value, old_value = getattr(r, key), old.get(key)
+            if new_value is not None and old_value:
+                deltas.append(f"{key} {100 * (new_value - old_value) / old_value:+.1f}%")
+        print(f"  {r.topology:<18} {r.mode:<7} " + "  ".join(deltas))
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--topologies", nargs="+", choices=sorted(TOPOLOGIES), default=list(TOPOLOGIES))
+    arg_parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    arg_parser.add_argument("--n", type=int, default=50, help="Runs per topology and mode.")
+    arg_parser.add_argument("--latency", type=float, default=0.02, help="Fake model latency in seconds.")
+    arg_parser.add_argument("--output-words", type=int, default=50, help="Words per fake model reply.")
+    arg_parser.add_argument("--concurrency", type=int, default=16)
+    arg_parser.add_argument("--overhead-n", type=int, default=200)
+    arg_parser.add_argument("--memory-n", type=int, default=10)
+    arg_parser.add_argument("--output", default="chain_benchmark.json")
+    arg_parser.add_argument("--compare", help="Earlier results JSON to diff against.")
+    args = arg_parser.parse_args()
+
+    results = []
+    for topology in args.topologies:
+        results.extend(bench(topology, args.modes, args))
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "langchain_core": langchain_core.__version__,
+            "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "args": vars(args),
+        },
+        "results": [asdict(r) for r in results],
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {len(results)} results to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Persistent two-tier response cache for chat models.
+
+``TieredResponseCache`` implements LangChain's ``BaseCache`` so it can sit in
+front of any chat model, either globally with ``set_llm_cache(cache)`` or per
+model with ``ChatGroq(..., cache=cache)``. Lookups hit a small in-memory LRU
+(L1) first and then a SQLite file (L2). Entries are keyed on the normalized
+message list plus the model's ``llm_string`` (model name and generation params).
+
+L1 hits still count as use of the L2 row: their access times are queued and
+written in one batch, at the latest before the next eviction, so hot keys are
+not the first to go. Row count and total size are kept as running counters so
+an ``update`` does not scan the table.
+
+``shared_cache(path)`` returns one instance per file, so builders that run
+many times in a process reuse one connection (and one registry model, since
+the model registry keys on ``TieredResponseCache.cache_key``).
+"""
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+
+@dataclass
+class CacheStats:
+    l1_hits: int = 0
+    l2_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expired: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.l1_hits + self.l2_hits + self.misses
+        return (self.l1_hits + self.l2_hits) / total if total else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+def _strip_ids(value: Any) -> Any:
+    # Message ids are per-run noise; two identical prompts must map to one key.
+    if isinstance(value, dict):
+        return {k: _strip_ids(v) for k, v in value.items() if k != "id" or not isinstance(v, (str, type(None)))}
+    if isinstance(value, list):
+        return [_strip_ids(v) for v in value]
+    return value
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Return a canonical form of the serialized message list passed to ``lookup``."""
+    try:
+        parsed = json.loads(prompt)
+    except ValueError:
+        return prompt.strip()
+    return json.dumps(_strip_ids(parsed), sort_keys=True, separators=(",", ":"))
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    return hashlib.sha256(f"{normalize_prompt(prompt)}\x00{llm_string}".encode()).hexdigest()
+
+
+class TieredResponseCache(BaseCache):
+    """In-memory LRU in front of a size-bounded SQLite cache.
+
+    Args:
+        path (str): SQLite database file. Defaults to ".llm_cache.sqlite3".
+        max_entries (int): Max rows kept on disk before LRU eviction. Defaults to 10000.
+        max_bytes (int | None): Optional cap on the total size of stored responses.
+        ttl (float | None): Seconds an entry stays valid. ``None`` never expires.
+        l1_size (int): Entries kept in the in-memory tier. Defaults to 256.
+        touch_batch (int): L1 hits whose access time is queued before it is written to L2.
+            Defaults to 64.
+    """
+
+    def __init__(
+        self,
+        path: str = ".llm_cache.sqlite3",
+        max_entries: int = 10_000,
+        max_bytes: int | None = None,
+        ttl: float | None = None,
+        l1_size: int = 256,
+        touch_batch: int = 64,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.l1_size = l1_size
+        self.touch_batch = touch_batch
+        self.stats = CacheStats()
+        self._l1: OrderedDict[str, tuple[float, RETURN_VAL_TYPE]] = OrderedDict()
+        self._touched: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses(created)")
+        self._count, self._total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+
+    @property
+    def cache_key(self) -> tuple:
+        """Settings that identify this cache, for registries that key models on their params."""
+        return (os.path.realpath(self.path), self.max_entries, self.max_bytes, self.ttl, self.l1_size)
+
+    def _is_expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def _touch(self, key: str, now: float) -> None:
+        self._touched[key] = now
+        if len(self._touched) >= self.touch_batch:
+            self._flush_touches()
+
+    def _flush_touches(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE responses SET accessed = ? WHERE key = ?", [(t, k) for k, t in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _remember(self, key: str, created: float, value: RETURN_VAL_TYPE) -> None:
+        self._l1[key] = (created, value)
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.l1_size:
+            self._l1.popitem(last=False)
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is not None and not self._is_expired(entry[0], now):
+                self._l1.move_to_end(key)
+                self._touch(key, now)
+                self.stats.l1_hits += 1
+                return entry[1]
+            row = self._conn.execute("SELECT value, created, size FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._l1.pop(key, None)
+                self.stats.misses += 1
+                return None
+            value, created, size = row
+            if self._is_expired(created, now):
+                self._l1.pop(key, None)
+                self._touched.pop(key, None)
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count -= 1
+                self._total -= size
+                self.stats.expired += 1
+                self.stats.misses += 1
+                return None
+            self._touch(key, now)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                generations = loads(value, allowed_objects="core")
+            self._remember(key, created, generations)
+            self.stats.l2_hits += 1
+            return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = cache_key(prompt, llm_string)
+        value = dumps(return_val)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+            self._touched.pop(key, None)
+            if old is None:
+                self._count += 1
+            else:
+                self._total -= old[0]
+            self._total += len(value)
+            self._remember(key, now, return_val)
+            self._evict()
+
+    def _evict(self) -> None:
+        if self.ttl is not None:
+            cutoff = time.time() - self.ttl
+            expired, expired_size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses WHERE created < ?", (cutoff,)
+            ).fetchone()
+            if expired:
+                self._conn.execute("DELETE FROM responses WHERE created < ?", (cutoff,))
+                self._count -= expired
+                self._total -= expired_size
+                self.stats.expired += expired
+        excess = self._count - self.max_entries
+        total = self._total
+
+        def over_budget() -> bool:
+            return excess > 0 or (self.max_bytes is not None and total > self.max_bytes)
+
+        if not over_budget():
+            return
+        # Recent L1 hits must be on disk before the coldest rows are chosen.
+        self._flush_touches()
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if not over_budget():
+                break
+            doomed.append((key,))
+            excess -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        for (key,) in doomed:
+            self._l1.pop(key, None)
+        self._count -= len(doomed)
+        self._total = total
+        self.stats.evictions += len(doomed)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._l1.clear()
+            self._touched.clear()
+            self._conn.execute("DELETE FROM responses")
+            self._count = self._total = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touches()
+            self._conn.close()
+
+
+@functools.cache
+def shared_cache(path: str = ".llm_cache.sqlite3") -> TieredResponseCache:
+    """The process-wide ``TieredResponseCache`` for ``path``, created on first use."""
+    return TieredResponseCache(path)
@@ -0,0 +1,448 @@
+"""Single-flight coalescing of identical in-flight chat model calls.
+
+Under batch load the parallel chains send the same prompt to the same model
+many times at once (every request for a popular topic renders the same
+tweet / notes / joke prompt). ``SingleFlightChatModel`` wraps a model so that
+while one call for a given request is in flight, identical requests wait for
+it and share its result instead of going upstream. Requests are identical when
+their messages (ids ignored), the wrapped model and its generation params
+match, the same key ``TieredResponseCache`` uses. Nothing is kept after the
+call finishes; this is not a cache.
+
+Streams are shared too: a waiter that joins a streaming call replays the
+chunks received so far and then follows the live stream. Threads (the
+executor ``RunnableParallel`` and ``batch`` use) coalesce with threads, and
+coroutines with coroutines on the same event loop.
+
+A caller that stops early never takes the shared call down with it. A thread
+that closes its stream hands the rest of it to a background thread if anyone
+is still waiting, and closes the upstream stream otherwise. On an event loop
+the upstream call runs as its own task, so cancelling the coroutine that
+started it leaves the waiters unaffected. The task is cancelled only when
+nobody is waiting any more.
+
+    model = SingleFlightChatModel(model=get_groq_llm())
+    chain = RunnableParallel(tweet=template1 | model | parser, post=template2 | model | parser)
+    chain.batch(inputs)
+    print(model.stats)
+"""
+import asyncio
+import contextvars
+import json
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Iterator, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.caches import BaseCache
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, message_chunk_to_message
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableBinding
+from pydantic import PrivateAttr
+
+from Cache.response_cache import cache_key
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0
+    upstream: int = 0
+    coalesced: int = 0
+
+    @property
+    def coalesced_rate(self) -> float:
+        return self.coalesced / self.calls if self.calls else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "coalesced_rate": round(self.coalesced_rate, 4)}
+
+
+def _as_chunk(message: BaseMessage) -> AIMessageChunk:
+    """A whole reply as one stream chunk (non-streaming upstream, or a waiter on a non-streaming call)."""
+    tool_call_chunks = [
+        {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+        for i, call in enumerate(getattr(message, "tool_calls", None) or [])
+    ]
+    return AIMessageChunk(
+        content=message.content,
+        tool_call_chunks=tool_call_chunks,
+        usage_metadata=getattr(message, "usage_metadata", None),
+        response_metadata=message.response_metadata,
+        id=message.id,
+    )
+
+
+def _joined(chunks: list[AIMessageChunk]) -> BaseMessage:
+    return message_chunk_to_message(sum(chunks[1:], chunks[0])) if chunks else AIMessage("")
+
+
+def _mark(message: BaseMessage) -> BaseMessage:
+    # A copy per waiter, tagged so callbacks (e.g. StageMetricsHandler) can tell it was shared.
+    return message.model_copy(update={"response_metadata": {**message.response_metadata, "coalesced": True}})
+
+
+class _Flight:
+    """One upstream call and everything it has produced so far, shared across threads."""
+
+    def __init__(self):
+        self.chunks: list[AIMessageChunk] = []
+        self.message: BaseMessage | None = None
+        self.error: BaseException | None = None
+        self.done = False
+        self.waiters = 0
+        self._cond = threading.Condition()
+
+    def push(self, chunk: AIMessageChunk) -> None:
+        with self._cond:
+            self.chunks.append(chunk)
+            self._cond.notify_all()
+
+    def finish(self, message: BaseMessage | None = None, error: BaseException | None = None) -> None:
+        with self._cond:
+            self.message, self.error, self.done = message, error, True
+            self._cond.notify_all()
+
+    def result(self) -> BaseMessage:
+        with self._cond:
+            self._cond.wait_for(lambda: self.done)
+        if self.error is not None:
+            raise self.error
+        return self.message
+
+    def follow(self) -> Iterator[AIMessageChunk]:
+        seen = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: seen < len(self.chunks) or self.done)
+                chunks, done = self.chunks[seen:], self.done
+            seen += len(chunks)
+            yield from chunks
+            if done:
+                break
+        if self.error is not None:
+            raise self.error
+        if not seen:
+            yield _as_chunk(self.message)
+
+
+class _AsyncFlight:
+    """``_Flight`` for coroutines on one event loop."""
+
+    def __init__(self):
+        self.chunks: list[AIMessageChunk] = []
+        self.message: BaseMessage | None = None
+        self.error: BaseException | None = None
+        self.done = asyncio.Event()
+        self._changed = asyncio.Event()
+        # Coroutines reading this flight, the one that started it included.
+        self.listeners = 0
+        self.task: asyncio.Task | None = None
+
+    def push(self, chunk: AIMessageChunk) -> None:
+        self.chunks.append(chunk)
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def finish(self, message: BaseMessage | None = None, error: BaseException | None = None) -> None:
+        self.message, self.error = message, error
+        self.done.set()
+        self._changed.set()
+
+    async def result(self) -> BaseMessage:
+        await self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.message
+
+    async def follow(self) -> AsyncIterator[AIMessageChunk]:
+        seen = 0
+        while True:
+            changed = self._changed
+            while seen < len(self.chunks):
+                seen += 1
+                yield self.chunks[seen - 1]
+            if self.done.is_set() and seen == len(self.chunks):
+                break
+            await changed.wait()
+        if self.error is not None:
+            raise self.error
+        if not seen:
+            yield _as_chunk(self.message)
+
+
+class SingleFlightChatModel(BaseChatModel):
+    """Chat model wrapper that merges identical concurrent requests into one upstream call.
+
+    Args:
+        model (BaseChatModel | Runnable): The wrapped model. Any message-in,
+            message-out runnable works, e.g. a ``Scheduler``; only chat models
+            get their generation params (and ``stop``) in the key.
+        stats (SingleFlightStats): Counters of calls, upstream calls and coalesced calls;
+            pass one in to share it between wrappers.
+    """
+
+    model: Runnable
+    stats: SingleFlightStats | None = None
+    # The wrapped model consults its own cache; a second lookup here would only add latency.
+    cache: BaseCache | bool | None = False
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _flights: dict[str, _Flight] = PrivateAttr(default_factory=dict)
+    _async_flights: dict[tuple[asyncio.AbstractEventLoop, str], _AsyncFlight] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context: Any) -> None:
+        if self.stats is None:
+            self.stats = SingleFlightStats()
+
+    @property
+    def _llm_type(self) -> str:
+        return "single-flight"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        params = getattr(self.model, "_identifying_params", None)
+        return {"model": params if params is not None else repr(self.model)}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable:
+        # Bind on this wrapper (not the inner model) so tool-calling requests coalesce too;
+        # the provider-formatted tool kwargs are forwarded upstream on each call.
+        bound = self.model.bind_tools(tools, **kwargs)
+        if bound is self.model:
+            return self
+        if isinstance(bound, RunnableBinding) and bound.bound is self.model:
+            return self.bind(**bound.kwargs)
+        return bound
+
+    def _key(self, messages: list[BaseMessage], stop: list[str] | None, kwargs: dict[str, Any]) -> str:
+        if isinstance(self.model, BaseChatModel):
+            llm_string = self.model._get_llm_string(stop=stop, **kwargs)
+        else:
+            llm_string = f"{type(self.model).__name__}:{id(self.model)}"
+        return cache_key(dumps(messages), llm_string)
+
+    def _upstream_args(self, stop: list[str] | None, kwargs: dict[str, Any]) -> dict[str, Any]:
+        if isinstance(self.model, BaseChatModel):
+            return {"stop": stop, **kwargs}
+        return {}
+
+    def _join(self, key: str) -> tuple[_Flight, bool]:
+        """The in-flight call for ``key`` and whether the caller leads it."""
+        with self._lock:
+            self.stats.calls += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.stats.coalesced += 1
+                flight.waiters += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            self.stats.upstream += 1
+            return flight, True
+
+    def _ajoin(self, key: str) -> tuple[_AsyncFlight, bool]:
+        slot = (asyncio.get_running_loop(), key)
+        with self._lock:
+            self.stats.calls += 1
+            flight = self._async_flights.get(slot)
+            if flight is not None:
+                self.stats.coalesced += 1
+                flight.listeners += 1
+                return flight, False
+            flight = self._async_flights[slot] = _AsyncFlight()
+            flight.listeners = 1
+            self.stats.upstream += 1
+            return flight, True
+
+    def _land(self, key: Any, flights: dict) -> None:
+        # New requests after this point start a fresh call.
+        with self._lock:
+            flights.pop(key, None)
+
+    def _leave(self, flight: _Flight) -> None:
+        with self._lock:
+            flight.waiters -= 1
+
+    def _aleave(self, slot: tuple, flight: _AsyncFlight) -> None:
+        """Stop listening to ``flight``; cancel its upstream task if nobody else is."""
+        with self._lock:
+            flight.listeners -= 1
+            if flight.listeners or flight.done.is_set():
+                return
+            if self._async_flights.get(slot) is flight:
+                del self._async_flights[slot]
+        flight.task.cancel()
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        key = self._key(messages, stop, kwargs)
+        flight, leader = self._join(key)
+        if not leader:
+            try:
+                return ChatResult(generations=[ChatGeneration(message=_mark(flight.result()))])
+            finally:
+                self._leave(flight)
+        try:
+            message = self.model.invoke(messages, **self._upstream_args(stop, kwargs))
+        except BaseException as exc:
+            self._land(key, self._flights)
+            flight.finish(error=exc)
+            raise
+        self._land(key, self._flights)
+        flight.finish(message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        key = self._key(messages, stop, kwargs)
+        slot = (asyncio.get_running_loop(), key)
+        flight, leader = self._ajoin(key)
+        if leader:
+            flight.task = asyncio.ensure_future(
+                self._acall(slot, flight, self.model.ainvoke(messages, **self._upstream_args(stop, kwargs)))
+            )
+        try:
+            message = await flight.result()
+        finally:
+            self._aleave(slot, flight)
+        return ChatResult(generations=[ChatGeneration(message=message if leader else _mark(message))])
+
+    async def _acall(self, slot: tuple, flight: _AsyncFlight, call: Any) -> None:
+        try:
+            message = await call
+        except asyncio.CancelledError as exc:
+            # Only reached once every listener has gone.
+            flight.finish(error=exc)
+            raise
+        except Exception as exc:
+            self._land(slot, self._async_flights)
+            flight.finish(error=exc)
+        else:
+            self._land(slot, self._async_flights)
+            flight.finish(message)
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        key = self._key(messages, stop, kwargs)
+        flight, leader = self._join(key)
+        if leader:
+            chunks = self._lead(key, flight, self.model.stream(messages, **self._upstream_args(stop, kwargs)))
+        else:
+            chunks = flight.follow()
+        try:
+            for i, chunk in enumerate(chunks):
+                if not leader and i == 0:
+                    chunk = _mark(chunk)
+                if run_manager:
+                    run_manager.on_llm_new_token(chunk.text, chunk=ChatGenerationChunk(message=chunk))
+                yield ChatGenerationChunk(message=chunk)
+        finally:
+            chunks.close()
+            if not leader:
+                self._leave(flight)
+
+    def _lead(self, key: str, flight: _Flight, upstream: Iterator[BaseMessage]) -> Iterator[AIMessageChunk]:
+        received: list[AIMessageChunk] = []
+        upstream = (_as_chunk(c) if not isinstance(c, AIMessageChunk) else c for c in upstream)
+        try:
+            for chunk in upstream:
+                received.append(chunk)
+                flight.push(chunk)
+                yield chunk
+        except GeneratorExit:
+            # Our own consumer stopped early. Waiters get the rest from a background
+            # thread; with none, the upstream stream is closed.
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                waiting = flight.waiters > 0
+            if waiting:
+                threading.Thread(
+                    target=contextvars.copy_context().run, args=(self._drain, flight, upstream, received),
+                    name="single-flight-drain", daemon=True,
+                ).start()
+            else:
+                upstream.close()
+                flight.finish(_joined(received))
+            raise
+        except BaseException as exc:
+            self._land(key, self._flights)
+            flight.finish(error=exc)
+            raise
+        self._land(key, self._flights)
+        flight.finish(_joined(received))
+
+    @staticmethod
+    def _drain(flight: _Flight, upstream: Iterator[AIMessageChunk], received: list[AIMessageChunk]) -> None:
+        try:
+            for chunk in upstream:
+                received.append(chunk)
+                flight.push(chunk)
+                if not flight.waiters:
+                    break
+            upstream.close()
+        except Exception as exc:
+            flight.finish(error=exc)
+        else:
+            flight.finish(_joined(received))
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        key = self._key(messages, stop, kwargs)
+        slot = (asyncio.get_running_loop(), key)
+        flight, leader = self._ajoin(key)
+        if leader:
+            flight.task = asyncio.ensure_future(
+                self._apump(slot, flight, self.model.astream(messages, **self._upstream_args(stop, kwargs)))
+            )
+        chunks = flight.follow()
+        first = True
+        try:
+            async for chunk in chunks:
+                if not leader and first:
+                    chunk = _mark(chunk)
+                first = False
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=ChatGenerationChunk(message=chunk))
+                yield ChatGenerationChunk(message=chunk)
+        finally:
+            await chunks.aclose()
+            self._aleave(slot, flight)
+
+    async def _apump(self, slot: tuple, flight: _AsyncFlight, upstream: AsyncIterator[BaseMessage]) -> None:
+        """Read the upstream stream into ``flight``; the leader follows it like any waiter."""
+        received: list[AIMessageChunk] = []
+        try:
+            async for chunk in upstream:
+                chunk = chunk if isinstance(chunk, AIMessageChunk) else _as_chunk(chunk)
+                received.append(chunk)
+                flight.push(chunk)
+        except asyncio.CancelledError as exc:
+            flight.finish(error=exc)
+            raise
+        except Exception as exc:
+            self._land(slot, self._async_flights)
+            flight.finish(error=exc)
+        else:
+            self._land(slot, self._async_flights)
+            flight.finish(_joined(received))
@@ -0,0 +1,489 @@
+"""Per-stage timing and metrics for any chain, exported as JSONL and Prometheus.
+
+``StageMetricsHandler`` is a callback handler: pass it in the config of any
+chain call and every runnable the chain runs (prompt, model, parser, the
+``add_sentiment`` lambda, each branch predicate, ...) is timed as a stage.
+For each stage it keeps in-process histograms of
+
+- wall time, start to end of the run;
+- queueing time, the gap between the moment the run could have started (its
+  parent started, or its previous sibling finished) and the moment it did;
+  rate limiters, executor queues and framework glue all show up here;
+
+plus counters for errors, retries (``with_retry`` attempts), model tokens, model
+cache hits and calls coalesced by ``SingleFlightChatModel``. Stages are named after the runnable, prefixed with the nearest
+parallel key or branch (``sentiment/PromptTemplate``, ``condition:1/RunnableLambda``)
+so the same template used in two places stays apart.
+
+Finished runs can also be appended to a JSONL trace file, and the aggregates
+rendered in the Prometheus text format, written to a file or served over HTTP:
+
+    metrics = StageMetricsHandler(trace_path="traces.jsonl")
+    chain.invoke({"text": text}, config={"callbacks": [metrics]})
+    print(metrics.hot_stages())
+    metrics.write_prometheus("chain.prom")   # or metrics.serve_prometheus(9464)
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Sequence
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SCOPE_TAGS = ("map:key:", "condition:", "branch:")
+
+
+class Histogram:
+    """Fixed-bucket histogram; ``observe`` is one bisect and two adds."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate of the ``q`` quantile (0-1), interpolated inside its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else lower
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+
+@dataclass
+class StageStats:
+    stage: str
+    kind: str
+    duration: Histogram
+    queue: Histogram
+    errors: int = 0
+    retries: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "stage": self.stage,
+            "kind": self.kind,
+            "count": self.duration.count,
+            "total_s": round(self.duration.sum, 6),
+            "mean_ms": round(1000 * self.duration.sum / self.duration.count, 3) if self.duration.count else None,
+            "p95_ms": _ms(self.duration.quantile(0.95)),
+            "queue_mean_ms": round(1000 * self.queue.sum / self.queue.count, 3) if self.queue.count else None,
+            "errors": self.errors,
+            "retries": self.retries,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+        }
+
+
+@dataclass
+class _Run:
+    stage: str
+    kind: str
+    scope: str
+    trace_id: UUID
+    parent_run_id: UUID | None
+    start: float
+    queue: float
+    started_at: float = 0.0
+    last_child_end: float = 0.0
+    model: str | None = None
+    usage: tuple[int, int, bool, bool] = field(default=(0, 0, False, False))
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def _name(serialized: dict[str, Any] | None, kwargs: dict[str, Any]) -> str:
+    if kwargs.get("name"):
+        return kwargs["name"]
+    if serialized:
+        return serialized.get("name") or (serialized.get("id") or ["unknown"])[-1]
+    return "unknown"
+
+
+def _usage(response: LLMResult) -> tuple[int, int, bool, bool]:
+    """``(input_tokens, output_tokens, cached, coalesced)`` of a model call.
+
+    Tokens are only counted for calls that went upstream.
+    """
+    input_tokens = output_tokens = 0
+    cached = coalesced = False
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            # Set by SingleFlightChatModel on replies shared with a concurrent identical call.
+            coalesced = coalesced or bool(message is not None and message.response_metadata.get("coalesced"))
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                # LangChain zeroes ``total_cost`` on responses served from the LLM cache.
+                cached = cached or usage.get("total_cost") == 0
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+    if not (input_tokens or output_tokens) and response.llm_output:
+        token_usage = response.llm_output.get("token_usage") or response.llm_output.get("usage") or {}
+        input_tokens = token_usage.get("prompt_tokens", 0) or token_usage.get("input_tokens", 0)
+        output_tokens = token_usage.get("completion_tokens", 0) or token_usage.get("output_tokens", 0)
+    if cached or coalesced:
+        input_tokens = output_tokens = 0
+    return input_tokens, output_tokens, cached, coalesced
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class StageMetricsHandler(BaseCallbackHandler):
+    """Callback handler that aggregates per-stage metrics and optionally writes traces.
+
+    One handler can be shared by any number of concurrent calls and threads.
+
+    Args:
+        trace_path (str | None): JSONL file finished runs are appended to. ``None`` keeps
+            only the aggregates.
+        flush_every (int): Trace records buffered before they are written. Defaults to 256.
+        buckets (Sequence[float]): Histogram bucket bounds in seconds.
+        namespace (str): Prefix of the Prometheus metric names. Defaults to "langchain".
+    """
+
+    # Called directly on the event loop in async runs instead of via an executor;
+    # every callback here is a few dict operations under a lock, plus one buffered
+    # trace write (outside the lock) every ``flush_every`` runs.
+    run_inline = True
+
+    def __init__(
+        self,
+        trace_path: str | None = None,
+        flush_every: int = 256,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        namespace: str = "langchain",
+    ):
+        self.trace_path = trace_path
+        self.flush_every = flush_every
+        self.buckets = tuple(buckets)
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._runs: dict[UUID, _Run] = {}
+        self._stages: dict[tuple[str, str], StageStats] = {}
+        self._pending: list[str] = []
+        # Held while a batch of trace records is written; never taken before ``_lock``.
+        self._write_lock = threading.Lock()
+        self._trace_file = None
+
+    # -- run bookkeeping ---------------------------------------------------
+
+    def _start(
+        self,
+        kind: str,
+        serialized: dict[str, Any] | None,
+        run_id: UUID,
+        parent_run_id: UUID | None,
+        tags: list[str] | None,
+        kwargs: dict[str, Any],
+    ) -> None:
+        now = time.perf_counter()
+        name = _name(serialized, kwargs)
+        with self._lock:
+            parent = self._runs.get(parent_run_id) if parent_run_id else None
+            scope = parent.scope if parent else ""
+            retry = False
+            for tag in tags or ():
+                if tag.startswith(SCOPE_TAGS):
+                    scope = tag.removeprefix("map:key:")
+                elif tag.startswith("retry:attempt:"):
+                    retry = True
+            if parent:
+                queue = max(0.0, now - max(parent.start, parent.last_child_end))
+                trace_id = parent.trace_id
+            else:
+                queue, trace_id = 0.0, run_id
+            run = _Run(f"{scope}/{name}" if scope else name, kind, scope, trace_id, parent_run_id, now, queue)
+            if self.trace_path:
+                run.started_at = time.time()
+                run.model = (kwargs.get("metadata") or {}).get("ls_model_name")
+            self._runs[run_id] = run
+            if retry:
+                # ``with_retry`` tags every attempt after the first one.
+                self._stats(run).retries += 1
+
+    def _stats(self, run: _Run) -> StageStats:
+        stats = self._stages.get((run.stage, run.kind))
+        if stats is None:
+            stats = StageStats(run.stage, run.kind, Histogram(self.buckets), Histogram(self.buckets))
+            self._stages[(run.stage, run.kind)] = stats
+        return stats
+
+    def _end(self, run_id: UUID, error: BaseException | None = None) -> None:
+        now = time.perf_counter()
+        batch = None
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+            if run is None:
+                return
+            wall = now - run.start
+            stats = self._stats(run)
+            stats.duration.observe(wall)
+            stats.queue.observe(run.queue)
+            input_tokens, output_tokens, cached, coalesced = run.usage
+            stats.input_tokens += input_tokens
+            stats.output_tokens += output_tokens
+            stats.cache_hits += cached
+            stats.coalesced += coalesced
+            if error is not None:
+                stats.errors += 1
+            parent = self._runs.get(run.parent_run_id) if run.parent_run_id else None
+            if parent is not None:
+                parent.last_child_end = max(parent.last_child_end, now)
+            if self.trace_path:
+                self._pending.append(json.dumps({
+                    "trace_id": str(run.trace_id),
+                    "run_id": str(run_id),
+                    "parent_run_id": str(run.parent_run_id) if run.parent_run_id else None,
+                    "stage": run.stage,
+                    "kind": run.kind,
+                    "model": run.model,
+                    "start": round(run.started_at, 6),
+                    "wall_ms": round(wall * 1000, 3),
+                    "queue_ms": round(run.queue * 1000, 3),
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "cached": cached,
+                    "coalesced": coalesced,
+                    "error": f"{type(error).__name__}: {error}" if error is not None else None,
+                }))
+                if len(self._pending) >= self.flush_every:
+                    batch = self._take_pending()
+        if batch is not None:
+            self._write(batch)
+
+    # -- callbacks ---------------------------------------------------------
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, **kwargs: Any) -> None:
+        self._start("chain", serialized, run_id, parent_run_id, tags, kwargs)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, tags=None, **kwargs: Any) -> None:
+        self._start("llm", serialized, run_id, parent_run_id, tags, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, tags=None, **kwargs: Any) -> None:
+        self._start("llm", serialized, run_id, parent_run_id, tags, kwargs)
+
+    def on_llm_end(self, response: LLMResult, *, run_id, **kwargs: Any) -> None:
+        usage = _usage(response)
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None:
+                run.usage = usage
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, tags=None, **kwargs: Any) -> None:
+        self._start("retriever", serialized, run_id, parent_run_id, tags, kwargs)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, tags=None, **kwargs: Any) -> None:
+        self._start("tool", serialized, run_id, parent_run_id, tags, kwargs)
+
+    def on_tool_end(self, output, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def on_retry(self, retry_state, *, run_id, **kwargs: Any) -> None:
+        # Fired by runnables that report retries explicitly rather than by tagging attempts.
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None:
+                self._stats(run).retries += 1
+
+    # -- reading and exporting ---------------------------------------------
+
+    def stages(self) -> list[StageStats]:
+        with self._lock:
+            return list(self._stages.values())
+
+    def hot_stages(self, n: int = 10, kinds: Sequence[str] | None = None) -> list[dict[str, Any]]:
+        """Summaries of the ``n`` stages with the most total wall time.
+
+        Outer stages include the time of the stages they contain, so filter with
+        ``kinds=("llm",)`` or look for the deepest stage near the top.
+        """
+        stages = [s for s in self.stages() if kinds is None or s.kind in kinds]
+        stages.sort(key=lambda s: s.duration.sum, reverse=True)
+        return [s.summary() for s in stages[:n]]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+    def prometheus_text(self) -> str:
+        """All aggregates in the Prometheus text exposition format."""
+        ns = self.namespace
+        lines: list[str] = []
+        stages = sorted(self.stages(), key=lambda s: (s.kind, s.stage))
+        with self._lock:
+            for metric, attr, help_text in (
+                ("stage_duration_seconds", "duration", "Wall time of each runnable stage."),
+                ("stage_queue_seconds", "queue", "Time a stage waited after it could have started."),
+            ):
+                lines += [f"# HELP {ns}_{metric} {help_text}", f"# TYPE {ns}_{metric} histogram"]
+                for s in stages:
+                    hist: Histogram = getattr(s, attr)
+                    labels = f'stage="{_label(s.stage)}",kind="{s.kind}"'
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, hist.counts):
+                        cumulative += count
+                        lines.append(f'{ns}_{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{ns}_{metric}_bucket{{{labels},le="+Inf"}} {hist.count}')
+                    lines.append(f"{ns}_{metric}_sum{{{labels}}} {hist.sum}")
+                    lines.append(f"{ns}_{metric}_count{{{labels}}} {hist.count}")
+            for metric, attr, help_text in (
+                ("stage_errors_total", "errors", "Runs of a stage that raised."),
+                ("stage_retries_total", "retries", "Retry attempts made by a stage."),
+                ("llm_cache_hits_total", "cache_hits", "Model calls answered from the LLM cache."),
+                ("llm_coalesced_total", "coalesced", "Model calls that shared an identical in-flight call."),
+            ):
+                lines += [f"# HELP {ns}_{metric} {help_text}", f"# TYPE {ns}_{metric} counter"]
+                for s in stages:
+                    if attr in ("cache_hits", "coalesced") and s.kind != "llm":
+                        continue
+                    lines.append(f'{ns}_{metric}{{stage="{_label(s.stage)}",kind="{s.kind}"}} {getattr(s, attr)}')
+            lines += [f"# HELP {ns}_llm_tokens_total Model tokens by direction.", f"# TYPE {ns}_llm_tokens_total counter"]
+            for s in stages:
+                if s.kind == "llm":
+                    for direction in ("input", "output"):
+                        value = getattr(s, f"{direction}_tokens")
+                        lines.append(f'{ns}_llm_tokens_total{{stage="{_label(s.stage)}",direction="{direction}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write ``prometheus_text`` atomically, e.g. for node_exporter's textfile collector."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+    def serve_prometheus(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve ``prometheus_text`` on ``http://host:port/metrics`` from a daemon thread.
+
+        Returns:
+            ThreadingHTTPServer: Call ``shutdown()`` on it to stop serving.
+        """
+        handler = self
+
+        class MetricsRequest(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body = handler.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsRequest)
+        threading.Thread(target=server.serve_forever, name="prometheus-metrics", daemon=True).start()
+        return server
+
+    def _take_pending(self) -> list[str]:
+        """Swap out the buffered records; call under ``_lock`` and pass the result to ``_write``.
+
+        The write lock is taken before ``_lock`` is released, so batches reach the
+        file in the order they were taken while the file I/O itself runs outside
+        ``_lock`` and never stalls the other callbacks.
+        """
+        batch, self._pending = self._pending, []
+        self._write_lock.acquire()
+        return batch
+
+    def _write(self, batch: list[str], close: bool = False) -> None:
+        try:
+            if batch:
+                if self._trace_file is None:
+                    self._trace_file = open(self.trace_path, "a")
+                self._trace_file.write("\n".join(batch) + "\n")
+                self._trace_file.flush()
+            if close and self._trace_file is not None:
+                self._trace_file.close()
+                self._trace_file = None
+        finally:
+            self._write_lock.release()
+
+    def flush(self) -> None:
+        """Write buffered trace records."""
+        with self._lock:
+            batch = self._take_pending()
+        self._write(batch)
+
+    def close(self) -> None:
+        with self._lock:
+            batch = self._take_pending()
+        self._write(batch, close=True)
+
+
+if __name__ == "__main__":
+    import sys
+
+    from langchain_core.caches import InMemoryCache
+
+    from BasicLLM.fake_llm import FakeChatModel
+    from Chain.conditional_chain import build_chain
+
+    # Offline demo: a flaky fake model behind a retry and an LLM cache.
+    model = FakeChatModel(
+        respond=lambda messages: '{"sentiment": "neutral"}' if "sentiment" in messages[-1].text else "Thanks for writing in.",
+        latency=0.05,
+        error_rate=0.2,
+        seed=7,
+        cache=InMemoryCache(),
+    )
+    chain = build_chain(model.with_retry(stop_after_attempt=5, wait_exponential_jitter=False))
+    metrics = StageMetricsHandler(trace_path=sys.argv[1] if len(sys.argv) > 1 else None)
+    texts = [{"text": f"Order {i % 5} arrived on Tuesday."} for i in range(20)]
+    chain.batch(texts, config={"callbacks": [metrics], "max_concurrency": 4})
+    metrics.close()
+    for row in metrics.hot_stages(8):
+        print(json.dumps(row))
+    print(metrics.prometheus_text()[:1500])
@@ -0,0 +1,299 @@
+"""Run any chain over a JSONL file with bounded concurrency and resumable checkpoints.
+
+Each input line is a JSON object passed to ``chain.ainvoke``. Results are
+appended to the output JSONL as they complete, tagged with the input line
+index, and a small checkpoint file records which indices are done so a crashed
+run can be restarted with the same arguments and pick up where it stopped.
+The checkpoint also stores how far into the output it has accounted for; on
+resume, rows written after that offset are recovered from the output itself
+and a torn last line is cut off. Failed records are retried on every run, so
+the output may hold an error row followed by a later result for one index.
+
+    python -m Chain.batch_runner conditional inputs.jsonl results.jsonl --concurrency 32
+    python -m Chain.batch_runner complex inputs.jsonl results.jsonl --fake-latency 0.2
+    python -m Chain.batch_runner conditional inputs.jsonl results.jsonl --trace traces.jsonl --metrics chain.prom
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import re
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from BasicLLM.fake_llm import FakeChatModel, chat_model_params
+from Callbacks.stage_metrics import StageMetricsHandler
+
+CHAINS = {
+    "conditional": "Chain.conditional_chain:build_chain",
+    "parallel": "Chain.parallel_chain:build_chain",
+    "complex": "Chain.complex_chain:build_chain",
+}
+
+
+# The JSON schema in a PydanticOutputParser's format instructions.
+_OUTPUT_SCHEMA = re.compile(r"Here is the output schema:\s*```\s*(\{.*\})\s*```", re.S)
+
+
+def _fake_instance(schema: dict, root: dict) -> Any:
+    """Smallest value valid for ``schema``: first enum member, one array item, placeholder scalars."""
+    if "$ref" in schema:
+        schema = root.get("$defs", {}).get(schema["$ref"].rpartition("/")[2], {})
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "anyOf" in schema:
+        return _fake_instance(schema["anyOf"][0], root)
+    kind = schema.get("type", "object" if "properties" in schema else "string")
+    if kind == "object":
+        return {key: _fake_instance(value, root) for key, value in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_fake_instance(schema.get("items", {}), root)]
+    return {"integer": 1, "number": 1.0, "boolean": False, "null": None}.get(kind, "fake")
+
+
+def _fake_reply(messages: list[BaseMessage]) -> str:
+    # conditional_chain parses its classification step with a PydanticOutputParser.
+    if "sentiment" in messages[-1].text:
+        return '{"sentiment": "neutral"}'
+    # Any other parser that asks for JSON gets an instance of its schema.
+    match = _OUTPUT_SCHEMA.search(messages[-1].text)
+    if match:
+        schema = json.loads(match.group(1))
+        return json.dumps(_fake_instance(schema, schema))
+    return "fake reply"
+
+
+def load_chain(name: str, fake_latency: float | None = None) -> Runnable:
+    """Build a chain from ``CHAINS`` or a ``module:function`` spec.
+
+    Args:
+        name (str): A key of ``CHAINS`` or a ``package.module:builder`` path.
+        fake_latency (float | None): When set, every model argument of the builder
+            is replaced with a ``FakeChatModel`` that waits this many seconds.
+    Returns:
+        Runnable: The chain to run.
+    """
+    module_name, _, attr = CHAINS.get(name, name).partition(":")
+    builder = getattr(importlib.import_module(module_name), attr or "build_chain")
+    if fake_latency is None:
+        return builder()
+    models = {
+        name: FakeChatModel(respond=_fake_reply, latency=fake_latency, jitter=fake_latency / 2, seed=i)
+        for i, name in enumerate(chat_model_params(builder))
+    }
+    return builder(**models)
+
+
+@dataclass
+class Checkpoint:
+    """Done indices as a contiguous low watermark plus the stragglers above it."""
+
+    path: str
+    watermark: int = 0
+    done: set[int] = field(default_factory=set)
+    offset: int = 0
+
+    @classmethod
+    def load(cls, path: str, output_path: str | None = None) -> "Checkpoint":
+        checkpoint = cls(path)
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            checkpoint = cls(path, data["watermark"], set(data["done"]), data.get("offset", 0))
+        if output_path is not None:
+            checkpoint.recover(output_path)
+        return checkpoint
+
+    def recover(self, output_path: str) -> None:
+        """Mark rows written after ``offset`` and truncate a torn last line."""
+        if not os.path.exists(output_path):
+            self.watermark, self.done, self.offset = 0, set(), 0
+            return
+        with open(output_path, "rb+") as f:
+            if f.seek(0, os.SEEK_END) < self.offset:
+                # The output was replaced since the checkpoint: trust only the file.
+                self.watermark, self.done, self.offset = 0, set(), 0
+            f.seek(self.offset)
+            tail = f.read()
+            complete = tail.rfind(b"\n") + 1
+            if complete < len(tail):
+                f.truncate(self.offset + complete)
+        for line in tail[:complete].splitlines():
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            if "error" not in row:
+                self.mark(row["index"])
+        self.offset += complete
+
+    def is_done(self, index: int) -> bool:
+        return index < self.watermark or index in self.done
+
+    def mark(self, index: int) -> None:
+        self.done.add(index)
+        while self.watermark in self.done:
+            self.done.remove(self.watermark)
+            self.watermark += 1
+
+    def save(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"watermark": self.watermark, "done": sorted(self.done), "offset": self.offset}, f)
+        os.replace(tmp, self.path)
+
+
+@dataclass
+class RunStats:
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        if len(self.latencies) == 1:
+            return self.latencies[0]
+        return statistics.quantiles(self.latencies, n=100, method="inclusive")[int(q) - 1]
+
+    def summary(self) -> dict[str, Any]:
+        done = self.completed + self.failed
+        return {
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput_rps": round(done / self.elapsed, 2) if self.elapsed else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+        }
+
+
+def read_records(path: str) -> Iterator[tuple[int, dict]]:
+    """Yield ``(index, record)`` pairs without loading the whole file."""
+    with open(path) as f:
+        for index, line in enumerate(f):
+            if line.strip():
+                yield index, json.loads(line)
+
+
+def _jsonable(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    return value
+
+
+async def run_batch(
+    chain: Runnable,
+    input_path: str,
+    output_path: str,
+    checkpoint_path: str | None = None,
+    concurrency: int = 16,
+    checkpoint_every: int = 100,
+    config: RunnableConfig | None = None,
+) -> RunStats:
+    """Stream ``input_path`` through ``chain`` and append results to ``output_path``.
+
+    Args:
+        chain (Runnable): The chain to invoke once per record.
+        input_path (str): JSONL file of chain inputs.
+        output_path (str): JSONL file results are appended to.
+        checkpoint_path (str | None): Defaults to ``output_path + ".ckpt"``.
+        concurrency (int): Max records in flight. Defaults to 16.
+        checkpoint_every (int): Records between checkpoint writes. Defaults to 100.
+        config (RunnableConfig | None): Passed to every ``ainvoke``, e.g. callbacks.
+    Returns:
+        RunStats: Counts and per-record latencies for this run.
+    """
+    checkpoint = Checkpoint.load(checkpoint_path or f"{output_path}.ckpt", output_path)
+    stats = RunStats()
+    pending: set[asyncio.Task] = set()
+    since_save = 0
+
+    async def process(index: int, record: dict) -> tuple[int, dict, float]:
+        start = time.perf_counter()
+        try:
+            row = {"index": index, "output": _jsonable(await chain.ainvoke(record, config))}
+        except Exception as exc:
+            row = {"index": index, "error": f"{type(exc).__name__}: {exc}"}
+        return index, row, time.perf_counter() - start
+
+    def collect(tasks: set[asyncio.Task], out) -> None:
+        nonlocal since_save
+        for task in tasks:
+            index, row, latency = task.result()
+            out.write(json.dumps(row, default=str) + "\n")
+            stats.latencies.append(latency)
+            if "error" in row:
+                stats.failed += 1
+            else:
+                checkpoint.mark(index)
+                stats.completed += 1
+            since_save += 1
+        out.flush()
+        checkpoint.offset = out.tell()
+        if since_save >= checkpoint_every:
+            checkpoint.save()
+            since_save = 0
+
+    start = time.perf_counter()
+    try:
+        with open(output_path, "a") as out:
+            for index, record in read_records(input_path):
+                if checkpoint.is_done(index):
+                    stats.skipped += 1
+                    continue
+                if len(pending) >= concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    collect(done, out)
+                pending.add(asyncio.create_task(process(index, record)))
+            if pending:
+                done, _ = await asyncio.wait(pending)
+                collect(done, out)
+    finally:
+        checkpoint.save()
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Run a chain over a JSONL file.")
+    arg_parser.add_argument("chain", help=f"one of {sorted(CHAINS)} or module:function")
+    arg_parser.add_argument("input")
+    arg_parser.add_argument("output")
+    arg_parser.add_argument("--checkpoint")
+    arg_parser.add_argument("--concurrency", type=int, default=16)
+    arg_parser.add_argument("--checkpoint-every", type=int, default=100)
+    arg_parser.add_argument("--fake-latency", type=float, help="use offline fake models with this latency (s)")
+    arg_parser.add_argument("--trace", help="append per-stage JSONL traces to this file")
+    arg_parser.add_argument("--metrics", help="write per-stage Prometheus metrics to this file")
+    args = arg_parser.parse_args()
+
+    chain = load_chain(args.chain, args.fake_latency)
+    metrics = StageMetricsHandler(trace_path=args.trace) if args.trace or args.metrics else None
+    config = {"callbacks": [metrics]} if metrics else None
+    stats = asyncio.run(
+        run_batch(chain, args.input, args.output, args.checkpoint, args.concurrency, args.checkpoint_every, config)
+    )
+    print(json.dumps(stats.summary(), indent=2))
+    if metrics:
+        metrics.close()
+        if args.metrics:
+            metrics.write_prometheus(args.metrics)
+        print("hot stages:")
+        for row in metrics.hot_stages(5, kinds=("llm", "retriever", "tool")) + metrics.hot_stages(5, kinds=("chain",)):
+            print(f"  {row['kind']:<6} {row['stage']:<48} {row['count']:>6} runs  {row['mean_ms']:>9} ms mean  "
+                  f"{row['queue_mean_ms']:>9} ms queued")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,12 @@
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import PromptTemplate
-from langchain_groq import ChatGroq
+from langchain_core.language_models import BaseChatModel
 from dotenv import load_dotenv
 
-load_dotenv()
+from BasicLLM.model_registry import get_groq_llm
+from Cache.response_cache import shared_cache
 
-chatModel = ChatGroq(model="llama-3.1-8b-instant")
+load_dotenv()
 
 template1 = PromptTemplate(
     template="Write a detailed summary of the following topics: {topics}",
@@ -19,8 +20,17 @@ template2 = PromptTemplate(
 
 parser = StrOutputParser()
 
-chain = template1 | chatModel | parser | template2 | chatModel | parser
 
-result = chain.invoke({"topics": "Artificial Intelligence, Machine Learning, Deep Learning"})
+def build_chain(chatModel: BaseChatModel | None = None):
+    if chatModel is None:
+        # Repeated runs of the same topics are answered from the local response cache.
+        chatModel = get_groq_llm(cache=shared_cache())
+    return template1 | chatModel | parser | template2 | chatModel | parser
+
+
+if __name__ == "__main__":
+    chain = build_chain()
+
+    result = chain.invoke({"topics": "Artificial Intelligence, Machine Learning, Deep Learning"})
 
-print("Result ===> ",result)
\ No newline at end of file
+    print("Result ===> ",result)
@@ -1,14 +1,15 @@
 from langchain_core.output_parsers import StrOutputParser, PydanticOutputParser
 from pydantic import BaseModel, Field
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnableBranch, RunnableLambda, RunnablePassthrough
 from dotenv import load_dotenv
 from typing import Literal
 
-load_dotenv()
+from BasicLLM.model_registry import get_gemini_llm
+from Chain.sentiment_fastpath import FastPathSentiment, FastPathStats
 
-model = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
+load_dotenv()
 
 
 class Condition(BaseModel):
@@ -24,7 +25,8 @@ template1 = PromptTemplate(
     partial_variables={"format_instructions": pydantic_parser.get_format_instructions()}
 )
 
-classification_chain = template1 | model | pydantic_parser
+# Shared by every chain built below so callers can read the fast-path hit rate.
+fast_path_stats = FastPathStats()
 
 # Create a chain that preserves the original text and adds the sentiment
 def add_sentiment(inputs):
@@ -47,25 +49,42 @@ neutral_propmt = PromptTemplate(
     input_variables=["text"]
 )
 
-positive_chain = positive_propmt | model | parser
-negative_chain = negative_propmt | model | parser
-neutral_chain = neutral_propmt | model | parser
-
-branch = RunnableBranch(
-    (lambda x: x["sentiment"] == 'positive', positive_chain),
-    (lambda x: x["sentiment"] == 'negative', negative_chain),
-    neutral_chain  # default case
-)
-
-# Combine original text with sentiment, then route to appropriate branch
-conditional_chain = (
-    {"text": RunnablePassthrough(), "sentiment": classification_chain}
-    | RunnableLambda(add_sentiment)
-    | branch
-)
-
-text = '''The phone is terrible. I hate the battery life'''
-result = conditional_chain.invoke({"text": text})
-print("Result ===> ", result)
-
 
+def build_chain(model: BaseChatModel | None = None, fast_path_threshold: float | None = 0.75):
+    if model is None:
+        model = get_gemini_llm()
+
+    classification_chain = template1 | model | pydantic_parser
+    if fast_path_threshold is not None:
+        # Obvious positive/negative texts are labelled locally; the rest still go to the model.
+        classification_chain = FastPathSentiment(
+            classification_chain,
+            to_output=lambda label: Condition(sentiment=label),
+            threshold=fast_path_threshold,
+            stats=fast_path_stats,
+        ).as_runnable()
+
+    positive_chain = positive_propmt | model | parser
+    negative_chain = negative_propmt | model | parser
+    neutral_chain = neutral_propmt | model | parser
+
+    branch = RunnableBranch(
+        (lambda x: x["sentiment"] == 'positive', positive_chain),
+        (lambda x: x["sentiment"] == 'negative', negative_chain),
+        neutral_chain  # default case
+    )
+
+    # Combine original text with sentiment, then route to appropriate branch
+    return (
+        {"text": RunnablePassthrough(), "sentiment": classification_chain}
+        | RunnableLambda(add_sentiment)
+        | branch
+    )
+
+
+if __name__ == "__main__":
+    conditional_chain = build_chain()
+
+    text = '''The phone is terrible. I hate the battery life'''
+    result = conditional_chain.invoke({"text": text})
+    print("Result ===> ", result)
@@ -0,0 +1,225 @@
+"""Map-reduce summarization for documents larger than one prompt.
+
+The loaders used to put ``documents[0].page_content`` into a single prompt.
+``MapReduceSummarizer`` instead:
+
+1. reads the source lazily (``read_chunks`` walks a memory-mapped file),
+2. splits it into chunks under ``token_budget``,
+3. summarizes chunks concurrently, at most ``concurrency`` at a time,
+4. collapses the partial summaries in groups that fit the budget, level by
+   level, until one final reduce is possible.
+
+Each collapse level runs in parallel, so wall time grows with the depth of the
+reduction tree (``log`` of the document length), not with its length.
+``astream`` yields ``SummaryProgress`` events along the way.
+
+    python -m Chain.map_reduce_summary Document_loader/ai_poem.txt
+    python -m Chain.map_reduce_summary big.txt --fake --token-budget 500
+"""
+import argparse
+import asyncio
+import mmap
+import os
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterable, Iterator
+
+from dotenv import load_dotenv
+from langchain_core.language_models import BaseChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable, RunnableLambda
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from BasicLLM.model_registry import get_groq_llm
+from BasicLLM.scheduler import estimate_tokens
+
+map_template = PromptTemplate(
+    template="Write a concise summary of the following text: \n {text}",
+    input_variables=["text"]
+)
+
+reduce_template = PromptTemplate(
+    template="The following are summaries of consecutive parts of one document. "
+             "Combine them into a single concise summary: \n {text}",
+    input_variables=["text"]
+)
+
+
+def read_chunks(path: str, chunk_bytes: int = 1 << 20) -> Iterator[str]:
+    """Yield the file in pieces of about ``chunk_bytes``, cut after a newline.
+
+    The file is memory-mapped, so only the pages being decoded are resident.
+    """
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        start, size = 0, len(data)
+        while start < size:
+            end = min(start + chunk_bytes, size)
+            if end < size:
+                newline = data.rfind(b"\n", start, end)
+                # No newline in the window: cut anyway, but not inside a UTF-8 sequence.
+                if newline >= 0:
+                    end = newline + 1
+                else:
+                    while end > start and data[end] & 0xC0 == 0x80:
+                        end -= 1
+            yield data[start:end].decode("utf-8", errors="replace")
+            start = end
+
+
+@dataclass
+class SummaryProgress:
+    """``stage`` is "map", "collapse" or "done"; ``level`` is the reduction depth."""
+
+    stage: str
+    level: int
+    completed: int
+    total: int | None
+    elapsed_s: float
+    summary: str | None = None
+
+
+class MapReduceSummarizer:
+    """Summarize arbitrarily long text with a concurrent map and a tree reduction.
+
+    Args:
+        map_chain (Runnable): ``{"text": chunk} -> summary``.
+        reduce_chain (Runnable): ``{"text": joined summaries} -> summary``.
+        token_budget (int): Max estimated tokens of text per prompt. Defaults to 3000.
+        concurrency (int): Model calls in flight at once. Defaults to 8.
+        separator (str): Placed between partial summaries in a reduce prompt.
+    """
+
+    def __init__(
+        self,
+        map_chain: Runnable,
+        reduce_chain: Runnable,
+        token_budget: int = 3000,
+        concurrency: int = 8,
+        separator: str = "\n\n",
+    ):
+        self.map_chain = map_chain
+        self.reduce_chain = reduce_chain
+        self.token_budget = token_budget
+        self.concurrency = concurrency
+        self.separator = separator
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=token_budget, chunk_overlap=0, length_function=estimate_tokens
+        )
+
+    def _chunks(self, pieces: Iterable[str]) -> Iterator[str]:
+        for piece in pieces:
+            yield from self.splitter.split_text(piece)
+
+    def _groups(self, summaries: list[str]) -> list[list[str]]:
+        """Consecutive groups whose joined text stays under the budget (at least one per group)."""
+        groups, current, used = [], [], 0
+        for summary in summaries:
+            tokens = estimate_tokens(summary + self.separator)
+            if current and used + tokens > self.token_budget:
+                groups.append(current)
+                current, used = [], 0
+            current.append(summary)
+            used += tokens
+        if current:
+            groups.append(current)
+        return groups
+
+    async def astream(self, source: str | Iterable[str]) -> AsyncIterator[SummaryProgress]:
+        """Summarize ``source`` (text or an iterable of text pieces), yielding progress events."""
+        started = time.perf_counter()
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def call(chain: Runnable, text: str) -> str:
+            async with limit:
+                return await chain.ainvoke({"text": text})
+
+        # Map: chunks are read lazily; at most ``2 * concurrency`` of them are held in memory.
+        summaries: dict[int, str] = {}
+        in_flight: set[asyncio.Task] = set()
+
+        async def map_one(index: int, chunk: str) -> None:
+            summaries[index] = await call(self.map_chain, chunk)
+
+        total = 0
+        for index, chunk in enumerate(self._chunks([source] if isinstance(source, str) else source)):
+            total += 1
+            in_flight.add(asyncio.create_task(map_one(index, chunk)))
+            if len(in_flight) >= self.concurrency * 2:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()
+                yield SummaryProgress("map", 0, len(summaries), None, time.perf_counter() - started)
+        for next_done in asyncio.as_completed(in_flight):
+            await next_done
+            yield SummaryProgress("map", 0, len(summaries), total, time.perf_counter() - started)
+        if not total:
+            yield SummaryProgress("done", 0, 0, 0, time.perf_counter() - started, summary="")
+            return
+
+        # Reduce: collapse every group of a level concurrently until a single group remains.
+        current = [summaries[i] for i in range(total)]
+        level = 0
+        while len(current) > 1:
+            level += 1
+            groups = self._groups(current)
+            if len(groups) == len(current):
+                # Every summary fills the budget alone; pair them up so the tree still shrinks.
+                groups = [current[i:i + 2] for i in range(0, len(current), 2)]
+            tasks = [asyncio.create_task(call(self.reduce_chain, self.separator.join(g))) for g in groups]
+            for completed, next_done in enumerate(asyncio.as_completed(tasks), 1):
+                await next_done
+                yield SummaryProgress("collapse", level, completed, len(tasks), time.perf_counter() - started)
+            current = [task.result() for task in tasks]
+        yield SummaryProgress("done", level, 1, 1, time.perf_counter() - started, summary=current[0])
+
+    async def ainvoke(self, source: str | Iterable[str], config: dict | None = None) -> str:
+        async for event in self.astream(source):
+            if event.stage == "done":
+                return event.summary
+
+    def invoke(self, source: str | Iterable[str], config: dict | None = None) -> str:
+        return asyncio.run(self.ainvoke(source, config))
+
+    def as_runnable(self) -> Runnable:
+        return RunnableLambda(self.invoke, afunc=self.ainvoke, name="MapReduceSummarizer")
+
+
+def build_summarizer(
+    model: BaseChatModel | None = None, token_budget: int = 3000, concurrency: int = 8
+) -> MapReduceSummarizer:
+    if model is None:
+        model = get_groq_llm()
+    parser = StrOutputParser()
+    return MapReduceSummarizer(
+        map_template | model | parser, reduce_template | model | parser, token_budget, concurrency
+    )
+
+
+async def _print_progress(summarizer: MapReduceSummarizer, path: str) -> None:
+    async for event in summarizer.astream(read_chunks(path)):
+        if event.stage == "done":
+            print(f"\ndone in {event.elapsed_s:.2f}s, {event.level} reduce level(s)")
+            print("Result ===> ", event.summary)
+        else:
+            total = "?" if event.total is None else event.total
+            print(f"\r{event.stage} level {event.level}: {event.completed}/{total}", end="", flush=True)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("path")
+    arg_parser.add_argument("--token-budget", type=int, default=3000)
+    arg_parser.add_argument("--concurrency", type=int, default=8)
+    arg_parser.add_argument("--fake", action="store_true", help="Use an offline model with 0.2s latency.")
+    args = arg_parser.parse_args()
+
+    load_dotenv()
+    chat_model = None
+    if args.fake:
+        from BasicLLM.fake_llm import FakeChatModel
+
+        chat_model = FakeChatModel(response="a short summary of this part", latency=0.2)
+    asyncio.run(_print_progress(build_summarizer(chat_model, args.token_budget, args.concurrency), args.path))
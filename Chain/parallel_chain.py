@@ -1,14 +1,16 @@
+import sys
+
 from langchain_core.output_parsers import StrOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_groq import ChatGroq
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import PromptTemplate
 from dotenv import load_dotenv
-from langchain_core.runnables import RunnableParallel
+from langchain_core.runnables import Runnable, RunnableParallel
 
-load_dotenv()
+from BasicLLM.model_registry import get_gemini_llm, get_groq_llm
+from BasicLLM.scheduler import Provider, Scheduler
+from Cache.single_flight import SingleFlightChatModel
 
-model1 = ChatGroq(model="llama-3.1-8b-instant")
-model2 = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
+load_dotenv()
 
 parser = StrOutputParser()
 
@@ -27,14 +29,45 @@ template3 = PromptTemplate(
     input_variables=["notes", "questions"]
 )
 
-parallel_chain = RunnableParallel({
-    "notes": template1 | model1 | parser,
-    "questions": template2 | model2 | parser
-})
 
-merge_chain = template3 | model1 | parser
+def build_chain(
+    model1: BaseChatModel | Runnable | None = None,
+    model2: BaseChatModel | Runnable | None = None,
+    coalesce: bool = False,
+):
+    if model1 is None:
+        model1 = get_groq_llm()
+    if model2 is None:
+        model2 = get_gemini_llm()
+    if coalesce:
+        # Identical prompts in flight at once (same topic under batch load) share one call.
+        model1 = SingleFlightChatModel(model=model1)
+        model2 = SingleFlightChatModel(model=model2)
+
+    parallel_chain = RunnableParallel({
+        "notes": template1 | model1 | parser,
+        "questions": template2 | model2 | parser
+    })
+
+    merge_chain = template3 | model1 | parser
+
+    return parallel_chain | merge_chain
+
+
+def build_scheduled_chain(model1: BaseChatModel | None = None, model2: BaseChatModel | None = None):
+    """Same chain, but every step may run on either provider.
+
+    Both schedulers share the two providers, so rate limits and latency stats
+    are per provider; each step still prefers its original model on ties.
+    """
+    # Free-tier request and token limits of the two providers.
+    groq = Provider("groq", model1 or get_groq_llm(), requests_per_second=0.5, tokens_per_minute=6000)
+    gemini = Provider("gemini", model2 or get_gemini_llm(), requests_per_second=0.15, tokens_per_minute=250000)
+    return build_chain(
+        Scheduler([groq, gemini]).as_runnable(),
+        Scheduler([gemini, groq]).as_runnable(),
+    )
 
-chain = parallel_chain | merge_chain
 
 text = ''' Cross decomposition algorithms find the fundamental relations between two matrices (X and Y). They are latent variable approaches to modeling the covariance structures in these two spaces. They will try to find the multidimensional direction in the X space that explains the maximum multidimensional variance direction in the Y space. In other words, PLS projects both X and Y into a lower-dimensional subspace such that the covariance between transformed(X) and transformed(Y) is maximal.
 
@@ -42,8 +75,9 @@ PLS draws similarities with Principal Component Regression (PCR), where the samp
 
 Apart from CCA, the PLS estimators are particularly suited when the matrix of predictors has more variables than observations, and when there is multicollinearity among the features. By contrast, standard linear regression would fail in these cases unless it is regularized.'''
 
-result = chain.invoke({"topic": text})
-
-print("Result ===> ",result)
+if __name__ == "__main__":
+    chain = build_scheduled_chain() if "--scheduled" in sys.argv else build_chain()
 
+    result = chain.invoke({"topic": text})
 
+    print("Result ===> ",result)
@@ -0,0 +1,355 @@
+"""Retrieval-augmented answers over the VectorSearch store with multi-query retrieval.
+
+``MultiQueryRAG`` connects the vector store to a prompt | model | parser chain:
+
+1. the expander model rewrites the question into ``n_queries`` search queries,
+   one per line; each line starts its retrieval as soon as it has streamed, so
+   retrievals overlap the rest of the expansion,
+2. retrievals (embed + ``fetch_k`` nearest neighbours) run concurrently on a
+   thread pool, together with one for the original question,
+3. hits are merged and deduplicated by document ID,
+4. ``mmr_select`` re-ranks the candidates against all queries at once with
+   NumPy: one matrix product for relevance and one vector update per pick,
+5. the top documents are packed under ``token_budget`` and the model is called
+   once for the answer.
+
+Retrieval therefore adds the latency of the slowest single retrieval, not the
+sum, and there is exactly one generation call after it. The expansion itself
+is an LLM call; with ``expand_timeout`` it is time-boxed: the answer waits for
+the question's own retrieval and for at most ``expand_timeout`` seconds in
+total, and uses whichever sub-query retrievals have finished by then.
+
+    python -m Chain.rag_chain "What are the benefits of edge computing?"
+    python -m Chain.rag_chain_harness          # offline, fake embeddings and model
+"""
+import hashlib
+import re
+import sys
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langchain_core.vectorstores import VectorStore
+
+from BasicLLM.model_registry import get_groq_llm
+from BasicLLM.scheduler import estimate_tokens
+
+parser = StrOutputParser()
+
+expand_template = PromptTemplate(
+    template="Write {n} different search queries that together cover the following question. "
+             "Put one query per line, without numbering or any other text. \n Question: {question}",
+    input_variables=["n", "question"]
+)
+
+answer_template = PromptTemplate(
+    template="Answer the question using only the context below. If the context does not contain the answer, "
+             "say so. \n Context: \n {context} \n Question: {question}",
+    input_variables=["context", "question"]
+)
+
+_LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+CONTEXT_SEPARATOR = "\n\n"
+
+
+def _lines(chunks: Iterable[str]) -> Iterator[str]:
+    """Complete lines of a text stream, each yielded as soon as its newline arrives."""
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split("\n")
+        yield from lines
+    yield buffer
+
+
+def clean_query(line: str) -> str:
+    return _LIST_MARKER.sub("", line).strip().strip('"')
+
+
+def mmr_select(
+    query_vectors: np.ndarray, candidate_vectors: np.ndarray, k: int, lambda_mult: float = 0.5
+) -> list[int]:
+    """Maximal Marginal Relevance over candidates, vectorised with NumPy.
+
+    Relevance of a candidate is its best cosine similarity to any query, so a
+    document that answers one sub-query well is not diluted by the others. Each
+    pick costs one matrix-vector product against the new pick and an
+    elementwise max; there is no loop over candidate pairs.
+
+    Args:
+        query_vectors (np.ndarray): ``(q, d)`` or ``(d,)`` query embeddings.
+        candidate_vectors (np.ndarray): ``(n, d)`` candidate embeddings.
+        k (int): Number of candidates to select.
+        lambda_mult (float): 1 is pure relevance, 0 is pure diversity. Defaults to 0.5.
+    Returns:
+        list[int]: Indices into ``candidate_vectors``, in selection order.
+    """
+    candidates = np.asarray(candidate_vectors, dtype=np.float32)
+    k = min(k, len(candidates))
+    if k <= 0:
+        return []
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+    queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+    relevance = (candidates @ queries.T).max(axis=1)
+    best = int(np.argmax(relevance))
+    selected = [best]
+    redundancy = candidates @ candidates[best]
+    available = np.ones(len(candidates), dtype=bool)
+    available[best] = False
+    for _ in range(k - 1):
+        scores = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, candidates @ candidates[best], out=redundancy)
+    return selected
+
+
+def pack_context(documents: list[Document], token_budget: int) -> list[Document]:
+    """Documents, in rank order, that fit in ``token_budget`` estimated tokens.
+
+    A document that does not fit is skipped so a smaller, lower-ranked one may
+    still use the remaining budget.
+    """
+    packed, used = [], 0
+    separator = estimate_tokens(CONTEXT_SEPARATOR)
+    for doc in documents:
+        cost = estimate_tokens(doc.page_content) + (separator if packed else 0)
+        if used + cost <= token_budget:
+            packed.append(doc)
+            used += cost
+    return packed
+
+
+def _doc_key(doc: Document) -> str:
+    return doc.id or hashlib.sha256(doc.page_content.encode()).hexdigest()
+
+
+def search_with_vectors(store: VectorStore, vector: list[float], k: int) -> tuple[list[Document], np.ndarray]:
+    """``k`` nearest documents to ``vector`` together with their stored embeddings."""
+    collection = getattr(store, "_collection", None)
+    if collection is not None:
+        # langchain_community's Chroma returns neither IDs nor embeddings; query the collection.
+        raw = collection.query(
+            query_embeddings=[vector], n_results=k, include=["documents", "metadatas", "embeddings"]
+        )
+        documents = [
+            Document(page_content=text, metadata=metadata or {}, id=i)
+            for i, text, metadata in zip(raw["ids"][0], raw["documents"][0], raw["metadatas"][0])
+        ]
+        return documents, np.asarray(raw["embeddings"][0], dtype=np.float32).reshape(len(documents), -1)
+    documents = store.similarity_search_by_vector(vector, k=k)
+    if hasattr(store, "get_vectors") and all(doc.id for doc in documents):
+        return documents, store.get_vectors([doc.id for doc in documents])
+    # Unknown store: re-embed the hits in one call.
+    return documents, np.asarray(store.embeddings.embed_documents([d.page_content for d in documents]))
+
+
+@dataclass
+class Retrieval:
+    """What ``MultiQueryRAG.retrieve`` found, with per-step timings in seconds."""
+
+    question: str
+    queries: list[str]
+    candidates: int
+    documents: list[Document]
+    expand_s: float = 0.0
+    retrieval_s: list[float] = field(default_factory=list)
+    rerank_s: float = 0.0
+    elapsed_s: float = 0.0
+
+    @property
+    def context(self) -> str:
+        return CONTEXT_SEPARATOR.join(doc.page_content for doc in self.documents)
+
+
+class MultiQueryRAG:
+    """Multi-query retrieval, MMR re-ranking and token-budgeted answering.
+
+    Args:
+        store (VectorStore): Store to search, e.g. the notebook's ``Chroma`` or a ``NumpyVectorStore``.
+        model (BaseChatModel | Runnable): Generates the answer.
+        expander (BaseChatModel | Runnable | None): Writes the sub-queries. Defaults to ``model``.
+        embeddings (Embeddings | None): Query embedder. Defaults to ``store.embeddings``.
+        n_queries (int): Sub-queries to generate; 0 retrieves for the question only. Defaults to 3.
+        fetch_k (int): Candidates retrieved per query. Defaults to 8.
+        k (int): Documents kept after MMR. Defaults to 4.
+        lambda_mult (float): MMR relevance/diversity trade-off. Defaults to 0.5.
+        token_budget (int): Estimated tokens of context sent to the model. Defaults to 1500.
+        max_workers (int): Retrievals run at once. Defaults to 8.
+        expand_timeout (float | None): Seconds from the start of ``retrieve`` after which
+            sub-queries still being written or retrieved are left out. ``None`` waits for
+            the whole expansion.
+    """
+
+    def __init__(
+        self,
+        store: VectorStore,
+        model: BaseChatModel | Runnable,
+        expander: BaseChatModel | Runnable | None = None,
+        embeddings: Embeddings | None = None,
+        n_queries: int = 3,
+        fetch_k: int = 8,
+        k: int = 4,
+        lambda_mult: float = 0.5,
+        token_budget: int = 1500,
+        max_workers: int = 8,
+        expand_timeout: float | None = None,
+    ):
+        self.store = store
+        self.model = model
+        self.embeddings = embeddings or store.embeddings
+        self.n_queries = n_queries
+        self.fetch_k = fetch_k
+        self.k = k
+        self.lambda_mult = lambda_mult
+        self.token_budget = token_budget
+        self.expand_timeout = expand_timeout
+        self.expand_chain = expand_template | (expander or model) | parser
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag-retrieve")
+        # ``build_chain`` only returns the runnable; the pool goes when the last reference to this object does.
+        self._finalizer = weakref.finalize(self, self._pool.shutdown, wait=False, cancel_futures=True)
+
+    def _retrieve_one(self, query: str) -> tuple[np.ndarray, list[Document], np.ndarray, float]:
+        start = time.perf_counter()
+        vector = self.embeddings.embed_query(query)
+        documents, vectors = search_with_vectors(self.store, vector, self.fetch_k)
+        return np.asarray(vector, dtype=np.float32), documents, vectors, time.perf_counter() - start
+
+    def _expand(self, question: str, config: RunnableConfig | None) -> Iterator[str]:
+        if self.n_queries <= 0:
+            return
+        seen = {question.strip().lower()}
+        stream = self.expand_chain.stream({"n": self.n_queries, "question": question}, config)
+        emitted = 0
+        for line in _lines(stream):
+            query = clean_query(line)
+            if query and query.lower() not in seen:
+                seen.add(query.lower())
+                yield query
+                emitted += 1
+                if emitted == self.n_queries:
+                    return
+
+    def retrieve(self, question: str, config: RunnableConfig | None = None) -> Retrieval:
+        """Expand, retrieve concurrently, merge and re-rank, then pack under the token budget."""
+        start = time.perf_counter()
+        searches: list[tuple[str, Future]] = [(question, self._pool.submit(self._retrieve_one, question))]
+        lock = threading.Lock()
+        closed = False
+
+        def expand() -> None:
+            for query in self._expand(question, config):
+                with lock:
+                    if closed:
+                        return
+                    searches.append((query, self._pool.submit(self._retrieve_one, query)))
+
+        if self.expand_timeout is None:
+            expand()
+        else:
+            expansion = self._pool.submit(expand)
+            try:
+                expansion.result(timeout=self.expand_timeout)
+            except TimeoutError:
+                pass  # keeps streaming in the background; no new sub-queries are taken
+        with lock:
+            closed = True
+            taken = list(searches)
+        expand_s = time.perf_counter() - start
+
+        taken[0][1].result()
+        if self.expand_timeout is not None:
+            deadline = start + self.expand_timeout
+            wait([future for _, future in taken[1:]], timeout=max(0.0, deadline - time.perf_counter()))
+            taken = taken[:1] + [(query, future) for query, future in taken[1:] if future.done()]
+
+        queries, query_vectors, candidates, candidate_vectors, timings = [], [], {}, [], []
+        for query, future in taken:
+            vector, documents, vectors, elapsed = future.result()
+            queries.append(query)
+            query_vectors.append(vector)
+            timings.append(elapsed)
+            for doc, doc_vector in zip(documents, vectors):
+                key = _doc_key(doc)
+                if key not in candidates:
+                    candidates[key] = doc
+                    candidate_vectors.append(doc_vector)
+
+        rerank_start = time.perf_counter()
+        ranked = list(candidates.values())
+        order = mmr_select(np.stack(query_vectors), np.array(candidate_vectors), self.k, self.lambda_mult) if ranked else []
+        documents = pack_context([ranked[i] for i in order], self.token_budget)
+        return Retrieval(
+            question=question,
+            queries=queries,
+            candidates=len(ranked),
+            documents=documents,
+            expand_s=expand_s,
+            retrieval_s=timings,
+            rerank_s=time.perf_counter() - rerank_start,
+            elapsed_s=time.perf_counter() - start,
+        )
+
+    def as_runnable(self) -> Runnable:
+        """``{"question": ...}`` in, the model's answer out."""
+
+        def retrieve(inputs: dict, config: RunnableConfig) -> dict:
+            retrieval = self.retrieve(inputs["question"], config)
+            return {"question": inputs["question"], "context": retrieval.context}
+
+        return RunnableLambda(retrieve, name="MultiQueryRetrieve") | answer_template | self.model | parser
+
+    def close(self) -> None:
+        self._finalizer()
+
+
+def default_store() -> VectorStore:
+    """The notebook's Chroma collection, with the on-disk embedding cache."""
+    from langchain_community.vectorstores import Chroma
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    from VectorSearch.embedding_cache import MmapEmbeddingCache
+
+    return Chroma(
+        embedding_function=MmapEmbeddingCache(
+            GoogleGenerativeAIEmbeddings(model="gemini-embedding-001"), "VectorSearch/embedding_cache"
+        ),
+        persist_directory="VectorSearch/chroma_db",
+        collection_name="tech_docs",
+    )
+
+
+def build_chain(
+    model: BaseChatModel | None = None,
+    expander: BaseChatModel | None = None,
+    store: VectorStore | None = None,
+    expand_timeout: float | None = 1.0,
+):
+    if model is None:
+        model = get_groq_llm()
+    return MultiQueryRAG(store or default_store(), model, expander, expand_timeout=expand_timeout).as_runnable()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    question = sys.argv[1] if len(sys.argv) > 1 else "What are the benefits of edge computing?"
+
+    chain = build_chain()
+
+    result = chain.invoke({"question": question})
+
+    print("Result ===> ", result)
@@ -0,0 +1,203 @@
+"""Offline harness for the multi-query RAG chain.
+
+Everything is local: ``HashingEmbeddings`` with a per-query latency stands in
+for the embedding API, a ``NumpyVectorStore`` holds a synthetic corpus (with
+near-duplicate passages), and ``FakeChatModel``s with their own latencies
+write the sub-queries and the answer. The harness checks that
+
+- ``mmr_select`` picks the same documents as LangChain's reference MMR, faster,
+- MMR keeps near-duplicates out of the context where plain top-k does not,
+- merged hits are deduplicated and the context stays under the token budget,
+- retrieval costs the expansion plus about one retrieval latency, however many
+  sub-queries run,
+- an end-to-end answer costs expansion + one retrieval + one generation, and
+  with ``expand_timeout`` a slow expansion is cut off so the answer costs
+  about the timeout (or one retrieval, if longer) + one generation,
+
+and exits non-zero if any check fails.
+
+    python -m Chain.rag_chain_harness
+    python -m Chain.rag_chain_harness --retrieval-latency 0.1 --queries 6
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+
+from BasicLLM.fake_llm import FakeChatModel
+from BasicLLM.scheduler import estimate_tokens
+from Chain.rag_chain import MultiQueryRAG, mmr_select
+from VectorSearch.hashing_embeddings import HashingEmbeddings
+from VectorSearch.numpy_store import NumpyVectorStore
+
+TOPICS = {
+    "edge": "edge computing processes data near devices to reduce latency and save bandwidth for iot sensors",
+    "cloud": "cloud computing rents virtual machines storage and managed services from providers on demand",
+    "security": "cybersecurity protects networks with encryption firewalls and multi factor authentication",
+    "microservices": "microservices split an application into small services deployed with docker and kubernetes",
+    "ai": "machine learning models learn patterns from data for recommendations and image recognition",
+}
+FACETS = ["overview", "benefits", "costs", "examples", "risks", "history"]
+STOPWORDS = {"what", "are", "the", "of", "is", "a", "and", "to", "for", "with", "from", "on", "in", "how", "why"}
+
+
+def make_corpus() -> list[Document]:
+    documents = []
+    for topic, text in TOPICS.items():
+        for facet in FACETS:
+            documents.append(Document(page_content=f"{topic} {facet}: {text}", metadata={"topic": topic}, id=f"{topic}-{facet}"))
+        # Near-duplicates: the same passage reposted with a trailing note.
+        for copy in range(3):
+            documents.append(Document(
+                page_content=f"{topic} benefits: {text} (mirror {copy})", metadata={"topic": topic}, id=f"{topic}-mirror-{copy}"
+            ))
+    return documents
+
+
+def fake_respond(n_queries: int):
+    def respond(messages: list[BaseMessage]) -> str:
+        prompt = messages[-1].text
+        if "search queries" in prompt:
+            question = prompt.rsplit("Question:", 1)[1].strip().rstrip("?")
+            # Facet plus round number, so any n gives distinct sub-queries.
+            return "\n".join(
+                f"{i + 1}. {question} {FACETS[i % len(FACETS)]} {'' if i < len(FACETS) else i // len(FACETS) + 1}"
+                for i in range(n_queries)
+            )
+        context = prompt.split("Context:", 1)[1].split("Question:", 1)[0]
+        return f"answer from {context.count(':')} passages"
+
+    return respond
+
+
+class Checks:
+    def __init__(self):
+        self.failed = 0
+
+    def check(self, name: str, ok: bool, detail: str) -> None:
+        self.failed += not ok
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name:<34} {detail}")
+
+
+def check_mmr(checks: Checks, rng: np.random.Generator) -> None:
+    print("mmr_select vs langchain_core maximal_marginal_relevance")
+    agree = True
+    for seed in range(20):
+        sample = np.random.default_rng(seed)
+        candidates = sample.standard_normal((40, 32)).astype(np.float32)
+        query = sample.standard_normal(32).astype(np.float32)
+        expected = maximal_marginal_relevance(query, candidates.tolist(), lambda_mult=0.5, k=6)
+        agree &= mmr_select(query, candidates, 6, 0.5) == expected
+    checks.check("same selection (20 random sets)", agree, "")
+
+    candidates = rng.standard_normal((400, 256)).astype(np.float32)
+    query = rng.standard_normal(256).astype(np.float32)
+    timings = {}
+    for name, select in (
+        ("reference", lambda: maximal_marginal_relevance(query, candidates, lambda_mult=0.5, k=10)),
+        ("vectorised", lambda: mmr_select(query, candidates, 10, 0.5)),
+    ):
+        start = time.perf_counter()
+        for _ in range(20):
+            select()
+        timings[name] = (time.perf_counter() - start) / 20 * 1000
+    checks.check(
+        "faster on 400 candidates, k=10", timings["vectorised"] < timings["reference"],
+        f"{timings['vectorised']:.3f} ms vs {timings['reference']:.3f} ms",
+    )
+
+
+def check_retrieval(checks: Checks, args: argparse.Namespace) -> None:
+    embeddings = HashingEmbeddings(latency=args.retrieval_latency, stopwords=STOPWORDS)
+    store = NumpyVectorStore(embeddings)
+    store.add_documents(make_corpus())
+    question = "What are the benefits of edge computing?"
+    expander = FakeChatModel(respond=fake_respond(args.queries), latency=args.expansion_latency)
+    model = FakeChatModel(respond=fake_respond(args.queries), latency=args.generation_latency)
+
+    print(f"\nretrieval ({args.queries} sub-queries, {args.expansion_latency * 1000:.0f} ms expansion, "
+          f"{args.retrieval_latency * 1000:.0f} ms per retrieval)")
+    # One worker per query plus one for a time-boxed expansion, so no retrieval queues.
+    workers = args.queries + 2
+    rag = MultiQueryRAG(store, model, expander, n_queries=args.queries, fetch_k=8, k=4, token_budget=args.token_budget,
+                        max_workers=workers)
+    retrieval = rag.retrieve(question)
+    ids = [doc.id for doc in retrieval.documents]
+    checks.check("sub-queries generated", len(retrieval.queries) == args.queries + 1, f"{retrieval.queries[1:]}")
+    checks.check(
+        "hits merged and deduplicated", len(ids) == len(set(ids)) and retrieval.candidates < 8 * len(retrieval.queries),
+        f"{retrieval.candidates} unique candidates from {8 * len(retrieval.queries)} hits",
+    )
+    context_tokens = sum(estimate_tokens(d.page_content) for d in retrieval.documents)
+    checks.check("context under token budget", context_tokens <= args.token_budget,
+                 f"{context_tokens} <= {args.token_budget} tokens, {len(ids)} documents")
+
+    def near_duplicates(documents: list[Document]) -> int:
+        return sum(doc.id == "edge-benefits" or "edge-mirror" in doc.id for doc in documents)
+
+    unbudgeted = MultiQueryRAG(store, model, expander, n_queries=args.queries, fetch_k=8, k=4, token_budget=10_000)
+    mmr_copies = near_duplicates(unbudgeted.retrieve(question).documents)
+    plain_copies = near_duplicates(store.similarity_search(question, k=4))
+    checks.check("MMR drops near-duplicates", mmr_copies <= 1 < plain_copies,
+                 f"{mmr_copies} copies of the best passage in the top 4 vs {plain_copies} with plain top-k")
+    unbudgeted.close()
+
+    sequential = MultiQueryRAG(store, model, expander, n_queries=args.queries, max_workers=1)
+    serial_s = sequential.retrieve(question).elapsed_s
+    bound = max(retrieval.retrieval_s) + retrieval.expand_s + args.slack
+    checks.check(
+        "retrievals overlap", retrieval.elapsed_s <= bound,
+        f"{retrieval.elapsed_s * 1000:.1f} ms (bound {bound * 1000:.1f} ms, one at a time {serial_s * 1000:.1f} ms)",
+    )
+    sequential.close()
+
+    print(f"\nend to end ({args.generation_latency * 1000:.0f} ms generation)")
+    chain = rag.as_runnable()
+    calls_before = model.calls
+    start = time.perf_counter()
+    answer = chain.invoke({"question": question})
+    elapsed = time.perf_counter() - start
+    bound = args.expansion_latency + args.retrieval_latency + args.generation_latency + args.slack
+    checks.check("one generation call", model.calls - calls_before == 1, repr(answer))
+    checks.check("latency ~ expansion + retrieval + gen", elapsed <= bound,
+                 f"{elapsed * 1000:.1f} ms (bound {bound * 1000:.1f} ms)")
+    rag.close()
+
+    slow_latency = max(0.5, 5 * args.expand_timeout)
+    print(f"\ntime-boxed expansion ({slow_latency * 1000:.0f} ms expander, {args.expand_timeout * 1000:.0f} ms timeout)")
+    slow_expander = FakeChatModel(respond=fake_respond(args.queries), latency=slow_latency)
+    boxed = MultiQueryRAG(store, model, slow_expander, n_queries=args.queries, fetch_k=8, k=4,
+                          token_budget=args.token_budget, max_workers=workers, expand_timeout=args.expand_timeout)
+    start = time.perf_counter()
+    answer = boxed.as_runnable().invoke({"question": question})
+    elapsed = time.perf_counter() - start
+    bound = max(args.retrieval_latency, args.expand_timeout) + args.generation_latency + args.slack
+    checks.check("answer does not wait on expansion", elapsed <= bound,
+                 f"{elapsed * 1000:.1f} ms (bound {bound * 1000:.1f} ms), {answer!r}")
+    boxed.close()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--queries", type=int, default=4, help="Sub-queries per question.")
+    arg_parser.add_argument("--expansion-latency", type=float, default=0.08, help="Fake sub-query writer latency in seconds.")
+    arg_parser.add_argument("--expand-timeout", type=float, default=0.1, help="Expansion time box in seconds.")
+    arg_parser.add_argument("--retrieval-latency", type=float, default=0.05, help="Seconds per query embedding.")
+    arg_parser.add_argument("--generation-latency", type=float, default=0.1, help="Fake answer latency in seconds.")
+    arg_parser.add_argument("--token-budget", type=int, default=60)
+    arg_parser.add_argument("--slack", type=float, default=0.05, help="Scheduling allowance in latency checks.")
+    args = arg_parser.parse_args()
+
+    checks = Checks()
+    check_mmr(checks, np.random.default_rng(0))
+    check_retrieval(checks, args)
+    print(f"\n{'all checks passed' if not checks.failed else f'{checks.failed} check(s) failed'}")
+    sys.exit(1 if checks.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
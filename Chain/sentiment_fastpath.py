@@ -0,0 +1,149 @@
+"""Local fast path in front of the LLM sentiment classifier of conditional_chain.
+
+``LexiconClassifier`` scores text against small positive/negative word lists
+with negation handling. ``FastPathSentiment`` wraps the LLM
+``classification_chain``: when the local classifier is confident enough the
+label is produced directly, otherwise the request falls through to the model.
+"""
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Protocol
+
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+POSITIVE = {
+    "amazing": 2.0, "awesome": 2.0, "excellent": 2.0, "fantastic": 2.0, "love": 2.0, "loved": 2.0,
+    "perfect": 2.0, "outstanding": 2.0, "wonderful": 2.0, "great": 1.5, "superb": 2.0, "brilliant": 2.0,
+    "good": 1.0, "nice": 1.0, "happy": 1.0, "pleased": 1.0, "recommend": 1.0, "reliable": 1.0,
+    "fast": 0.5, "easy": 0.5, "intuitive": 1.0, "satisfied": 1.0, "like": 0.5, "best": 1.5,
+    "exceeded": 1.5, "impressed": 1.5, "thanks": 0.5, "helpful": 1.0, "works": 0.5,
+}
+
+NEGATIVE = {
+    "terrible": 2.0, "awful": 2.0, "horrible": 2.0, "hate": 2.0, "hated": 2.0, "worst": 2.0,
+    "useless": 2.0, "broken": 1.5, "disappointed": 1.5, "disappointing": 1.5, "refund": 1.0,
+    "bad": 1.0, "poor": 1.0, "slow": 0.5, "crash": 1.0, "crashes": 1.0, "annoying": 1.0,
+    "waste": 1.5, "defective": 1.5, "angry": 1.5, "problem": 0.5, "problems": 0.5,
+    "unhappy": 1.5, "garbage": 2.0, "overpriced": 1.0, "rude": 1.5, "fails": 1.0, "failed": 1.0,
+}
+
+NEGATIONS = {"not", "no", "never", "isn't", "wasn't", "don't", "doesn't", "didn't", "can't", "won't", "hardly"}
+INTENSIFIERS = {"very": 1.5, "really": 1.5, "extremely": 2.0, "so": 1.3, "absolutely": 1.8, "totally": 1.5}
+
+_TOKEN = re.compile(r"[a-z']+")
+
+
+class SentimentClassifier(Protocol):
+    def classify(self, text: str) -> tuple[str, float]:
+        """Return ``(label, confidence)`` with confidence in ``[0, 1]``."""
+        ...
+
+
+class LexiconClassifier:
+    """Weighted word-list classifier with negation and intensifier handling.
+
+    Args:
+        negation_window (int): Tokens after a negation whose polarity is flipped. Defaults to 3.
+        saturation (float): Evidence weight at which confidence stops growing. Defaults to 3.
+    """
+
+    def __init__(self, negation_window: int = 3, saturation: float = 3.0):
+        self.negation_window = negation_window
+        self.saturation = saturation
+
+    def classify(self, text: str) -> tuple[str, float]:
+        positive = negative = 0.0
+        negate_left = 0
+        boost = 1.0
+        for token in _TOKEN.findall(text.lower()):
+            if token in NEGATIONS:
+                negate_left = self.negation_window
+                continue
+            if token in INTENSIFIERS:
+                boost = INTENSIFIERS[token]
+                continue
+            weight = POSITIVE.get(token, 0.0) - NEGATIVE.get(token, 0.0)
+            if weight:
+                weight *= boost
+                if negate_left:
+                    weight = -weight * 0.75
+                if weight > 0:
+                    positive += weight
+                else:
+                    negative -= weight
+            boost = 1.0
+            negate_left = max(0, negate_left - 1)
+
+        evidence = positive + negative
+        if not evidence:
+            return "neutral", 0.0
+        # Agreement between the two sides times how much evidence we saw.
+        polarity = (positive - negative) / evidence
+        confidence = abs(polarity) * min(1.0, evidence / self.saturation)
+        if abs(polarity) < 0.34:
+            return "neutral", 0.0
+        return ("positive" if polarity > 0 else "negative"), confidence
+
+
+@dataclass
+class FastPathStats:
+    fast_path: int = 0
+    fallback: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.fast_path + self.fallback
+        return self.fast_path / total if total else 0.0
+
+
+class FastPathSentiment:
+    """Answer confidently-classified inputs locally and send the rest to ``fallback``.
+
+    Args:
+        fallback (Runnable): The LLM classification chain, called with the original inputs.
+        to_output (Callable[[str], Any]): Builds the fallback's output type from a label,
+            e.g. ``lambda label: Condition(sentiment=label)``.
+        classifier (SentimentClassifier | None): Defaults to ``LexiconClassifier()``.
+        threshold (float): Minimum confidence to skip the LLM. Defaults to 0.75.
+        text_key (str): Input key holding the text. Defaults to "text".
+        stats (FastPathStats | None): Counters to update; pass one in to share it.
+    """
+
+    def __init__(
+        self,
+        fallback: Runnable,
+        to_output: Callable[[str], Any],
+        classifier: SentimentClassifier | None = None,
+        threshold: float = 0.75,
+        text_key: str = "text",
+        stats: FastPathStats | None = None,
+    ):
+        self.fallback = fallback
+        self.to_output = to_output
+        self.classifier = classifier or LexiconClassifier()
+        self.threshold = threshold
+        self.text_key = text_key
+        self.stats = stats if stats is not None else FastPathStats()
+        self._lock = threading.Lock()
+
+    def _local(self, inputs: dict) -> Any | None:
+        label, confidence = self.classifier.classify(inputs[self.text_key])
+        hit = label != "neutral" and confidence >= self.threshold
+        with self._lock:
+            if hit:
+                self.stats.fast_path += 1
+            else:
+                self.stats.fallback += 1
+        return self.to_output(label) if hit else None
+
+    def invoke(self, inputs: dict, config: RunnableConfig | None = None) -> Any:
+        result = self._local(inputs)
+        return result if result is not None else self.fallback.invoke(inputs, config)
+
+    async def ainvoke(self, inputs: dict, config: RunnableConfig | None = None) -> Any:
+        result = self._local(inputs)
+        return result if result is not None else await self.fallback.ainvoke(inputs, config)
+
+    def as_runnable(self) -> Runnable:
+        return RunnableLambda(self.invoke, afunc=self.ainvoke, name="FastPathSentiment")
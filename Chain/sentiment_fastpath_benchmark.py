@@ -0,0 +1,101 @@
+"""Offline benchmark for the sentiment fast path of conditional_chain.
+
+Runs two small labeled sets through ``LexiconClassifier`` at a few thresholds
+and reports fast-path hit rate, accuracy on the fast-path hits and per-call
+cost, then runs the full conditional chain against a fake model to count how
+many LLM calls were saved. ``SAMPLE`` is the set the word lists were written
+against, so its accuracy is in-sample and optimistic; ``HELD_OUT`` was labeled
+without looking at the lexicon and is the number to quote. Both sets are tiny,
+so treat the accuracy as a smoke test, not an estimate for real traffic.
+
+    python -m Chain.sentiment_fastpath_benchmark
+"""
+import time
+
+from BasicLLM.fake_llm import FakeChatModel
+from Chain import conditional_chain
+from Chain.sentiment_fastpath import LexiconClassifier
+
+SAMPLE = [
+    ("The phone is terrible. I hate the battery life", "negative"),
+    ("Absolutely love this laptop, the screen is amazing", "positive"),
+    ("Worst purchase ever, it broke after two days. Total waste of money", "negative"),
+    ("Great build quality and really fast delivery, highly recommend", "positive"),
+    ("The package arrived on Tuesday", "neutral"),
+    ("It is a phone. It makes calls.", "neutral"),
+    ("Customer support was rude and useless", "negative"),
+    ("Excellent sound, perfect for the gym, very happy", "positive"),
+    ("Not bad, not great either", "neutral"),
+    ("I am not happy with the camera at all", "negative"),
+    ("The app crashes constantly and the update failed", "negative"),
+    ("Wonderful experience, the staff were helpful and friendly", "positive"),
+    ("Delivery took a week and the box was a bit dented but the product works", "neutral"),
+    ("Really disappointed, asked for a refund", "negative"),
+    ("Fantastic value, exceeded my expectations", "positive"),
+    ("The colour is blue", "neutral"),
+    ("Overpriced garbage, never buying again", "negative"),
+    ("Intuitive interface and reliable performance, I'm impressed", "positive"),
+    ("Battery is okay, screen is fine", "neutral"),
+    ("Horrible fit and poor stitching", "negative"),
+    ("Best headphones I have owned, awesome bass", "positive"),
+    ("Does what it says", "neutral"),
+    ("Didn't like the smell, but the taste is great", "neutral"),
+    ("Brilliant book, loved every chapter", "positive"),
+]
+
+# Not used to tune POSITIVE / NEGATIVE; includes sarcasm, mixed reviews and domain words.
+HELD_OUT = [
+    ("Stopped charging after a month and support never answered", "negative"),
+    ("Sturdy, quiet and the battery lasts all week", "positive"),
+    ("Oh great, another update that deletes my settings", "negative"),
+    ("The manual is in German only", "neutral"),
+    ("Would buy again, my kids adore it", "positive"),
+    ("The zipper snapped on the first trip", "negative"),
+    ("Good camera, bad battery", "neutral"),
+    ("Shipping was quick and the fit is perfect", "positive"),
+    ("Not worth the price", "negative"),
+    ("It is heavier than I expected", "neutral"),
+    ("The best customer service I have dealt with in years", "positive"),
+    ("Arrived damaged and the replacement is also broken", "negative"),
+    ("Works as described", "neutral"),
+    ("Honestly I don't love it, the colours look washed out", "negative"),
+    ("Setup took two minutes, very easy", "positive"),
+    ("Keeps disconnecting from wifi, really annoying", "negative"),
+    ("Nothing special but it does the job", "neutral"),
+    ("Five stars, exactly what I needed", "positive"),
+    ("The lid leaks whenever it is tipped over", "negative"),
+    ("Came in a cardboard box", "neutral"),
+]
+
+
+def evaluate(name: str, samples: list[tuple[str, str]], threshold: float, classifier: LexiconClassifier) -> None:
+    hits = correct = 0
+    start = time.perf_counter()
+    for text, label in samples:
+        predicted, confidence = classifier.classify(text)
+        if predicted != "neutral" and confidence >= threshold:
+            hits += 1
+            correct += predicted == label
+    per_call_us = (time.perf_counter() - start) * 1e6 / len(samples)
+    accuracy = f"{correct / hits:.0%} ({correct}/{hits})" if hits else "n/a"
+    print(f"{name:<9} threshold {threshold:.2f}: fast-path {hits}/{len(samples)} ({hits / len(samples):.0%}), "
+          f"accuracy on fast path {accuracy}, {per_call_us:.1f} us/classification")
+
+
+def main() -> None:
+    classifier = LexiconClassifier()
+    for name, samples in (("tuning", SAMPLE), ("held-out", HELD_OUT)):
+        for threshold in (0.5, 0.75, 0.9):
+            evaluate(name, samples, threshold, classifier)
+
+    for name, samples in (("tuning", SAMPLE), ("held-out", HELD_OUT)):
+        for threshold in (None, 0.75):
+            model = FakeChatModel(respond=lambda m: '{"sentiment": "neutral"}' if "sentiment" in m[-1].text else "reply")
+            chain = conditional_chain.build_chain(model, fast_path_threshold=threshold)
+            chain.batch([{"text": text} for text, _ in samples])
+            print(f"{name:<9} conditional_chain fast_path_threshold={threshold}: "
+                  f"{model.calls} LLM calls for {len(samples)} inputs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Concurrent web loader with per-host limits and a conditional-GET cache.
+
+``WebBaseLoader(url).load()`` fetches one page at a time. ``AsyncWebLoader``
+fetches many URLs over one pooled ``httpx.AsyncClient``, never runs more than
+``per_host`` requests against the same host, and parses HTML in a thread (or
+process) pool so the event loop keeps downloading. Pages are remembered in a
+SQLite cache with their ``ETag`` / ``Last-Modified``; the next run sends
+``If-None-Match`` / ``If-Modified-Since`` and a ``304`` reuses the stored text
+without downloading or parsing the page again. Documents are yielded in
+completion order.
+
+    loader = AsyncWebLoader(urls, per_host=4)
+    async for doc in loader.alazy_load():
+        ...
+"""
+import asyncio
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import AsyncIterator, Iterable, Iterator
+from urllib.parse import urlsplit
+
+import httpx
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+from BasicLLM.model_registry import PoolConfig
+
+
+class _TextExtractor(HTMLParser):
+    """Stdlib fallback for ``BeautifulSoup.get_text`` when bs4 is not installed."""
+
+    SKIP = {"script", "style", "noscript", "template"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts: list[str] = []
+        self.metadata: dict[str, str] = {}
+        self._skipping = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in self.SKIP:
+            self._skipping += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag == "html" and attrs.get("lang"):
+            self.metadata["language"] = attrs["lang"]
+        elif tag == "meta" and attrs.get("name") == "description":
+            self.metadata["description"] = attrs.get("content") or ""
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP and self._skipping:
+            self._skipping -= 1
+        elif tag == "title":
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.metadata["title"] = self.metadata.get("title", "") + data.strip()
+        elif not self._skipping and data.strip():
+            self.parts.append(data.strip())
+
+
+def parse_html(html: str) -> tuple[str, dict[str, str]]:
+    """Page text plus title / description / language, like ``WebBaseLoader``."""
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        extractor = _TextExtractor()
+        extractor.feed(html)
+        return "\n".join(extractor.parts), extractor.metadata
+
+    soup = BeautifulSoup(html, "html.parser")
+    metadata = {}
+    if soup.title and soup.title.string:
+        metadata["title"] = soup.title.string.strip()
+    if description := soup.find("meta", attrs={"name": "description"}):
+        metadata["description"] = description.get("content", "")
+    if soup.html and soup.html.get("lang"):
+        metadata["language"] = soup.html.get("lang")
+    return soup.get_text(), metadata
+
+
+class ResponseCache:
+    """SQLite store of parsed pages keyed by URL, with their validators.
+
+    Args:
+        path (str): Database file. Defaults to ".web_cache.sqlite3".
+    """
+
+    def __init__(self, path: str = ".web_cache.sqlite3"):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT,"
+            " text TEXT NOT NULL, metadata TEXT NOT NULL, fetched REAL NOT NULL)"
+        )
+
+    def get(self, url: str) -> tuple[str | None, str | None, str, dict] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, text, metadata FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, text, metadata = row
+        return etag, last_modified, text, json.loads(metadata)
+
+    def put(self, url: str, etag: str | None, last_modified: str | None, text: str, metadata: dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, text, json.dumps(metadata), time.time()),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+@dataclass
+class LoaderStats:
+    fetched: int = 0
+    not_modified: int = 0
+    errors: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+
+class AsyncWebLoader(BaseLoader):
+    """Load many URLs concurrently, yielding ``Document`` objects as they finish.
+
+    Args:
+        urls (Iterable[str]): Pages to load.
+        per_host (int): Concurrent requests per host. Defaults to 4.
+        pool (PoolConfig | None): Connection limits and timeout of the shared client.
+            Defaults to 64 connections.
+        cache (ResponseCache | None): Conditional-GET cache; ``None`` disables it.
+        parse_executor (Executor | None): Where HTML is parsed. Defaults to a thread pool;
+            pass a ``ProcessPoolExecutor`` for CPU-heavy pages.
+        headers (dict | None): Extra request headers, e.g. a ``User-Agent``.
+        raise_errors (bool): Raise on failed pages instead of counting and skipping them.
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        per_host: int = 4,
+        pool: PoolConfig | None = None,
+        cache: ResponseCache | None = None,
+        parse_executor: Executor | None = None,
+        headers: dict | None = None,
+        raise_errors: bool = False,
+    ):
+        self.urls = list(dict.fromkeys(urls))
+        self.per_host = per_host
+        self.pool = pool or PoolConfig(max_connections=64, max_keepalive_connections=32, timeout=30.0)
+        self.cache = cache
+        self.parse_executor = parse_executor
+        self.headers = headers or {}
+        self.raise_errors = raise_errors
+        self.stats = LoaderStats()
+
+    async def _load_one(
+        self, client: httpx.AsyncClient, url: str, limit: asyncio.Semaphore, executor: Executor
+    ) -> Document | None:
+        # SQLite calls block; keep them off the event loop.
+        cached = await asyncio.to_thread(self.cache.get, url) if self.cache else None
+        headers = dict(self.headers)
+        if cached:
+            etag, last_modified, _, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        try:
+            async with limit:
+                response = await client.get(url, headers=headers)
+            if response.status_code == 304 and cached:
+                self.stats.not_modified += 1
+                return Document(page_content=cached[2], metadata={**cached[3], "source": url, "cached": True})
+            response.raise_for_status()
+        except httpx.HTTPError:
+            self.stats.errors += 1
+            if self.raise_errors:
+                raise
+            return None
+
+        self.stats.fetched += 1
+        self.stats.bytes += len(response.content)
+        text, metadata = await asyncio.get_running_loop().run_in_executor(executor, parse_html, response.text)
+        if self.cache:
+            await asyncio.to_thread(
+                self.cache.put, url, response.headers.get("ETag"), response.headers.get("Last-Modified"), text, metadata
+            )
+        return Document(page_content=text, metadata={**metadata, "source": url, "cached": False})
+
+    async def alazy_load(self) -> AsyncIterator[Document]:
+        started = time.perf_counter()
+        self.stats = LoaderStats()
+        limits: dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        executor = self.parse_executor or ThreadPoolExecutor()
+        try:
+            async with httpx.AsyncClient(
+                limits=self.pool.limits(), timeout=self.pool.timeout, follow_redirects=True
+            ) as client:
+                tasks = [
+                    asyncio.create_task(self._load_one(client, url, limits[urlsplit(url).netloc], executor))
+                    for url in self.urls
+                ]
+                try:
+                    for next_done in asyncio.as_completed(tasks):
+                        doc = await next_done
+                        if doc is not None:
+                            yield doc
+                finally:
+                    for task in tasks:
+                        task.cancel()
+        finally:
+            if self.parse_executor is None:
+                executor.shutdown(wait=False)
+            self.stats.seconds = time.perf_counter() - started
+
+    def lazy_load(self) -> Iterator[Document]:
+        # Run the event loop on a helper thread so this also works inside notebooks.
+        results: queue.Queue = queue.Queue(maxsize=256)
+        done = object()
+        started = threading.Event()
+        pumping: dict = {}
+
+        async def pump() -> None:
+            pumping["loop"], pumping["task"] = asyncio.get_running_loop(), asyncio.current_task()
+            started.set()
+            async for doc in self.alazy_load():
+                # A full queue blocks a worker thread, not the loop that is still downloading.
+                await asyncio.to_thread(results.put, doc)
+
+        def run() -> None:
+            try:
+                asyncio.run(pump())
+                results.put(done)
+            except BaseException as error:
+                results.put(error)
+            finally:
+                started.set()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            while (item := results.get()) is not done:
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # The consumer may stop early: cancel the pump, then keep draining so a blocked
+            # ``put`` returns and the loop, client and parse pool shut down.
+            started.wait()
+            if thread.is_alive():
+                try:
+                    pumping["loop"].call_soon_threadsafe(pumping["task"].cancel)
+                except RuntimeError:
+                    pass  # the loop already closed
+            while thread.is_alive():
+                try:
+                    results.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+            thread.join()
@@ -0,0 +1,127 @@
+"""Benchmark: sequential fetching vs. AsyncWebLoader against a local stand-in site.
+
+The stand-in serves ``--pages`` product pages spread over a few hosts (all on
+127.0.0.1, told apart by port), waits ``--latency`` seconds per response,
+sends an ``ETag`` and answers ``If-None-Match`` with ``304``. It also records
+the peak number of concurrent requests per host, so the per-host limit can be
+checked. The loader runs twice: the second run should be all ``304`` responses.
+
+    python -m Document_loader.async_web_loader_benchmark --pages 200 --latency 0.05
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from Document_loader.async_web_loader import AsyncWebLoader, ResponseCache, parse_html
+
+PAGE = """<html lang="en"><head><title>Product {n}</title>
+<meta name="description" content="Stand-in product page {n}"></head>
+<body><script>var tracking = {n};</script><h1>Product {n}</h1>
+<p>{body}</p></body></html>"""
+
+
+class StandInHost(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency: float):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+        self.full_responses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address
+        return f"http://{host}:{port}"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server: StandInHost = self.server
+        with server._lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            time.sleep(server.latency)
+            n = self.path.rsplit("/", 1)[-1]
+            body = PAGE.format(n=n, body=("Specs and reviews for product " + n + ". ") * 200).encode()
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            with server._lock:
+                server.full_responses += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server._lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def sequential(urls: list[str]) -> float:
+    start = time.perf_counter()
+    with httpx.Client() as client:
+        for url in urls:
+            parse_html(client.get(url).text)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--pages", type=int, default=200)
+    arg_parser.add_argument("--hosts", type=int, default=4)
+    arg_parser.add_argument("--latency", type=float, default=0.05)
+    arg_parser.add_argument("--per-host", type=int, default=8)
+    args = arg_parser.parse_args()
+
+    hosts = [StandInHost(args.latency) for _ in range(args.hosts)]
+    for host in hosts:
+        threading.Thread(target=host.serve_forever, daemon=True).start()
+    urls = [f"{hosts[i % len(hosts)].base_url}/product/{i}" for i in range(args.pages)]
+
+    print(f"sequential      {sequential(urls):6.2f} s")
+    for host in hosts:
+        host.peak = host.full_responses = 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResponseCache(os.path.join(directory, "web_cache.sqlite3"))
+        for label in ("async (cold)", "async (warm)"):
+            loader = AsyncWebLoader(urls, per_host=args.per_host, cache=cache)
+            docs = asyncio.run(_collect(loader))
+            print(f"{label:<15} {loader.stats.seconds:6.2f} s  {len(docs)} docs  "
+                  f"{loader.stats.fetched} downloaded  {loader.stats.not_modified} not modified  "
+                  f"peak per host {max(host.peak for host in hosts)}")
+        cache.close()
+    print("first document ===> ", docs[0].metadata, docs[0].page_content[:60])
+
+    for host in hosts:
+        host.shutdown()
+
+
+async def _collect(loader: AsyncWebLoader) -> list:
+    return [doc async for doc in loader.alazy_load()]
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,36 @@
-from langchain_community.document_loaders import TextLoader
-from langchain_google_genai import ChatGoogleGenerativeAI
+import os
+
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable, RunnableLambda
 from dotenv import load_dotenv
 
+from BasicLLM.model_registry import get_gemini_llm
+from Chain.map_reduce_summary import MapReduceSummarizer, read_chunks, reduce_template
+
 
 load_dotenv()
 
-model = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
 parser = StrOutputParser()
 template1 = PromptTemplate(
-    template="Summarize the following poem in a few sentences: \n {poem}",
-    input_variables=["poem"]
+    template="Summarize the following poem in a few sentences: \n {text}",
+    input_variables=["text"]
 )
 
-loader = TextLoader("ai_poem.txt")
 
-documents = loader.load()
+def build_chain(model: BaseChatModel | None = None) -> Runnable:
+    """``{"path": ...}`` -> summary of the file."""
+    if model is None:
+        model = get_gemini_llm()
+
+    # The file is read lazily and summarized in token-budgeted chunks, so it may be arbitrarily long.
+    summarizer = MapReduceSummarizer(template1 | model | parser, reduce_template | model | parser, token_budget=3000)
+    return RunnableLambda(lambda inputs: read_chunks(inputs["path"]), name="read_chunks") | summarizer.as_runnable()
+
 
-chain = template1 | model | parser
+if __name__ == "__main__":
+    chain = build_chain()
 
-result = chain.invoke({"poem": documents[0].page_content})
-print("Result ===> ",result)
\ No newline at end of file
+    result = chain.invoke({"path": os.path.join(os.path.dirname(__file__), "ai_poem.txt")})
+    print("Result ===> ",result)
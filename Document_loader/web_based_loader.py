@@ -1,21 +1,47 @@
-from langchain_community.document_loaders import WebBaseLoader
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable, RunnableLambda
 from dotenv import load_dotenv
 
+from BasicLLM.model_registry import get_gemini_llm
+from Chain.map_reduce_summary import MapReduceSummarizer, reduce_template
+from Document_loader.async_web_loader import AsyncWebLoader, ResponseCache
+
 load_dotenv()
-model = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
+
 parser = StrOutputParser()
 
 propmt1 = PromptTemplate(
-    template="Summarize the product information from the following webpage: \n {webpage}",
-    input_variables=["webpage"]
+    template="Summarize the product information from the following webpage: \n {text}",
+    input_variables=["text"]
 )
 
-loader = WebBaseLoader("https://www.applegadgetsbd.com/product/macbook-air-m4-15-inch")
-documents = loader.load()
+urls = [
+    "https://www.applegadgetsbd.com/product/macbook-air-m4-15-inch",
+]
+
+
+def build_chain(model: BaseChatModel | None = None, cache: ResponseCache | None = None) -> Runnable:
+    """``{"urls": [...]}`` -> ``{url: summary}`` for every page that loaded."""
+    if model is None:
+        model = get_gemini_llm()
+    if cache is None:
+        # Unchanged pages come back as 304 and are served from the local cache.
+        cache = ResponseCache()
+
+    # Long pages are summarized chunk by chunk instead of in one oversized prompt.
+    summarizer = MapReduceSummarizer(propmt1 | model | parser, reduce_template | model | parser, token_budget=3000)
+
+    def summarize_pages(inputs: dict) -> dict[str, str]:
+        documents = AsyncWebLoader(inputs["urls"], per_host=4, cache=cache).load()
+        return {doc.metadata["source"]: summarizer.invoke(doc.page_content) for doc in documents}
+
+    return RunnableLambda(summarize_pages)
+
+
+if __name__ == "__main__":
+    chain = build_chain()
 
-chain = propmt1 | model | parser
-result = chain.invoke({"webpage": documents[0].page_content})
-print("Result ===> ",result)
\ No newline at end of file
+    for source, summary in chain.invoke({"urls": urls}).items():
+        print(source, "Result ===> ", summary)
@@ -1,25 +1,17 @@
-from langchain_core.output_parsers import JsonOutputParser
+import sys
+
 from langchain_core.prompts import PromptTemplate
-from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 
-load_dotenv()
-
-def get_groq_llm(model: str = "llama-3.1-8b-instant") -> ChatGroq:
-    """Initialize and return a Groq LLM instance.
+from BasicLLM.model_registry import get_groq_llm
+from OutputParser.streaming_json_parser import StreamingJsonOutputParser
 
-    Args:
-        model (str): The Groq model to use. Defaults to "llama-3.1-8b-instant".
-    Returns:
-        ChatGroq: An instance of the Groq LLM.
-    """
-    llm = ChatGroq(model=model)
-    return llm
+load_dotenv()
 
 if __name__ == "__main__":
     groq_llm = get_groq_llm()
 
-    parser = JsonOutputParser()
+    parser = StreamingJsonOutputParser()
 
     template = PromptTemplate(template="Give me the name, age and city of a fictional character who lives in Bangladesh. {format_instructions}",
           input_variables=[],
@@ -27,5 +19,10 @@ if __name__ == "__main__":
 
     chain = template | groq_llm | parser
 
-    response = chain.invoke({})
-    print(response)                  
\ No newline at end of file
+    if "--stream" in sys.argv:
+        # Partial dicts arrive as soon as each field is complete.
+        for partial in chain.stream({}):
+            print(partial)
+    else:
+        response = chain.invoke({})
+        print(response)
\ No newline at end of file
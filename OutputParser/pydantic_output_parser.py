@@ -1,19 +1,19 @@
-from langchain_core.output_parsers import JsonOutputParser, PydanticOutputParser
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import PromptTemplate
-from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 
-load_dotenv()
+from BasicLLM.model_registry import get_groq_llm
+from OutputParser.streaming_json_parser import StreamingPydanticOutputParser
 
-chatModel = ChatGroq(model="llama-3.1-8b-instant")
+load_dotenv()
 
 class Person(BaseModel):
     name: str = Field(description="The name of the person")
     age: int = Field(description="The age of the person")
     city: str = Field(description="The city where the person lives")
 
-parser = PydanticOutputParser(pydantic_object=Person)
+parser = StreamingPydanticOutputParser(pydantic_object=Person)
 
 template = PromptTemplate(
     template="Give me the name, age and city of a fictional character who lives in {place}. {format_instructions}",
@@ -21,10 +21,17 @@ template = PromptTemplate(
     partial_variables={"format_instructions": parser.get_format_instructions()}
 )
 
-prompt = template.invoke({"place": "India"})
 
-chain = template | chatModel | parser
+def build_chain(chatModel: BaseChatModel | None = None):
+    if chatModel is None:
+        chatModel = get_groq_llm()
+
+    return template | chatModel | parser
+
+
+if __name__ == "__main__":
+    chain = build_chain()
 
-result = chain.invoke({"place": "India"})
+    result = chain.invoke({"place": "India"})
 
-print("Result ===> ",result)
+    print("Result ===> ",result)
@@ -1,22 +1,14 @@
-from langchain_core.output_parsers import PydanticOutputParser
+import sys
+
 from langchain_core.prompts import PromptTemplate
-from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 
+from BasicLLM.model_registry import get_groq_llm
+from OutputParser.streaming_json_parser import StreamingPydanticOutputParser
 
-load_dotenv()
-
-def get_groq_llm(model: str = "llama-3.1-8b-instant") -> ChatGroq:
-    """Initialize and return a Groq LLM instance.
 
-    Args:
-        model (str): The Groq model to use. Defaults to "llama-3.1-8b-instant".
-    Returns:
-        ChatGroq: An instance of the Groq LLM.
-    """
-    llm = ChatGroq(model=model)
-    return llm
+load_dotenv()
 
 class Person(BaseModel):
     name: str = Field(description="The name of the person.")
@@ -26,7 +18,7 @@ class Person(BaseModel):
 if __name__ == "__main__":
     groq_llm = get_groq_llm()
 
-    parser = PydanticOutputParser(pydantic_object=Person)
+    parser = StreamingPydanticOutputParser(pydantic_object=Person)
 
     template = PromptTemplate(template="Give me the name, age and city of a fictional character who lives in {country}\n\n. Return the response as following format {format_instructions}\n\n",
           input_variables=["country"],
@@ -34,5 +26,10 @@ if __name__ == "__main__":
 
     chain = template | groq_llm | parser
 
-    response = chain.invoke({"country": "India"})
-    print(response)
+    if "--stream" in sys.argv:
+        # Partial dicts until name, age and city are all in, then validated Person objects.
+        for partial in chain.stream({"country": "India"}):
+            print(partial)
+    else:
+        response = chain.invoke({"country": "India"})
+        print(response)
@@ -1,23 +1,17 @@
+import sys
+
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import PromptTemplate
-from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 
-load_dotenv()
-
-def get_groq_llm(model: str = "llama-3.1-8b-instant") -> ChatGroq:
-    """Initialize and return a Groq LLM instance.
+from BasicLLM.model_registry import get_groq_llm
+from Cache.response_cache import shared_cache
+from Runnable.streaming import print_stream
 
-    Args:
-        model (str): The Groq model to use. Defaults to "llama-3.1-8b-instant".
-    Returns:
-        ChatGroq: An instance of the Groq LLM.
-    """
-    llm = ChatGroq(model=model)
-    return llm
+load_dotenv()
 
 if __name__ == "__main__":
-    groq_model = get_groq_llm()
+    groq_model = get_groq_llm(cache=shared_cache())
 
     template1 = PromptTemplate(template= "Summarize the following {topic} topic", input_variables=["topic"] )
     template2 = PromptTemplate(template= "Write down 5 lines summary on the following {text} text", input_variables=["text"] )
@@ -26,6 +20,9 @@ if __name__ == "__main__":
 
     chain = template1 | groq_model | parse | template2 | groq_model | parse
 
-    response = chain.invoke({'topic': 'Black Holes'})
+    if "--stream" in sys.argv:
+        print_stream(chain, {'topic': 'Black Holes'})
+    else:
+        response = chain.invoke({'topic': 'Black Holes'})
 
-    print(response)
\ No newline at end of file
+        print(response)
@@ -0,0 +1,457 @@
+"""Single-pass streaming JSON / Pydantic output parsers with local repair.
+
+LangChain's ``JsonOutputParser`` streams by concatenating every chunk onto the
+buffer and re-parsing the whole buffer each time, which is quadratic in the
+response length. ``IncrementalJsonParser`` is a small state machine that
+consumes each chunk once and builds the Python object in place, so parsing is
+linear in the response length. The partial results it yields are independent
+copies: each one shallow-copies the containers still open at that point (closed
+ones are shared), so a response that streams one long array costs a C-level
+list copy per chunk that completes a value. That is far cheaper than
+re-parsing but grows with the array, not constant per chunk.
+
+The state machine also tolerates the usual LLM mistakes: prose or a markdown
+fence around the JSON, trailing or missing commas, single-quoted strings,
+unquoted keys, Python literals (``True`` / ``None``), raw newlines inside
+strings and output that stops before the closing brackets (a value cut off
+mid-literal, such as ``tru``, is dropped). The root must be a ``{`` when the
+parser expects an object, so brackets in leading prose are not taken for the
+answer. ``repair_json``
+applies the same rules to a complete text, so a malformed answer can be fixed
+locally instead of calling the model again.
+
+    parser = StreamingPydanticOutputParser(pydantic_object=Person)
+    for partial in (template | model | parser).stream({"country": "India"}):
+        print(partial)  # dicts until every required field is in, then Person objects
+"""
+import json
+from typing import Any, AsyncIterator, Iterable, Iterator
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import BaseMessage
+from langchain_core.output_parsers import JsonOutputParser, PydanticOutputParser
+from langchain_core.outputs import Generation
+from pydantic import BaseModel, ValidationError
+
+_WHITESPACE = " \t\r\n"
+_SCALAR_END = ",}]:" + _WHITESPACE
+_LITERALS = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+_DECODER = json.JSONDecoder(strict=False)
+_MISSING = object()
+
+
+def _decode_string(raw: str, quote: str) -> str:
+    if "\\" not in raw:
+        return raw
+    if quote == "'":
+        raw = raw.replace("\\'", "'").replace('"', '\\"')
+    try:
+        return _DECODER.decode('"' + raw + '"')
+    except ValueError:
+        return raw
+
+
+def _decode_scalar(token: str) -> Any:
+    if token in _LITERALS:
+        return _LITERALS[token]
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    try:
+        return float(token)
+    except ValueError:
+        # A bare word where a value belongs: keep it as a string rather than failing.
+        return token
+
+
+class IncrementalJsonParser:
+    """Feed text chunks; read the partially built object at any time.
+
+    Only completed values appear in ``snapshot()`` (an unfinished string or
+    number is left out until it ends), so every snapshot is a valid prefix of
+    the final object.
+
+    The root is the first ``{`` or ``[`` after a leading markdown fence, if the
+    text has one. Prose before the JSON often contains brackets of its own
+    ("see [1]"), so when the expected shape is known pass ``root="{"``.
+
+    Args:
+        root (str | None): Only accept this opening bracket as the root. Defaults to either.
+    """
+
+    def __init__(self, root: str | None = None):
+        self.root_bracket = root
+        self.root: Any = _MISSING
+        self._prefix = ""
+        self.completed = 0
+        self._stack: list[dict | list] = []
+        self._keys: list[str | None] = []
+        self._slots: list[str | int | None] = []  # where each open container sits in its parent
+        self._state = "start"
+        self._parts: list[str] = []
+        self._quote = '"'
+        self._is_key = False
+        self._escaped = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+    def _find_root(self, text: str) -> int | None:
+        brackets = self.root_bracket or "{["
+        starts = [j for j in (text.find(bracket) for bracket in brackets) if j >= 0]
+        fence = text.find("```")
+        if fence >= 0 and (not starts or fence < min(starts)):
+            # Skip the fence line ("```json") and look for the root after it.
+            newline = text.find("\n", fence)
+            if newline < 0:
+                return None
+            starts = [j for j in (text.find(bracket, newline) for bracket in brackets) if j >= 0]
+        return min(starts) if starts else None
+
+    def feed(self, text: str) -> bool:
+        """Consume ``text``; return True if any value completed."""
+        before = self.completed
+        i = 0
+        if self._state == "start":
+            # Text before the root is kept until the root is found, since a fence may span chunks.
+            text = self._prefix + text
+            root = self._find_root(text)
+            if root is None:
+                self._prefix = text
+                return False
+            self._prefix = ""
+            i = root
+            self._state = "value"
+        n = len(text)
+        while i < n and self._state != "done":
+            state = self._state
+            if state in ("string", "bare_key", "scalar"):
+                i = self._read_token(text, i)
+                continue
+
+            char = text[i]
+            if char in _WHITESPACE:
+                i += 1
+                continue
+            if state == "value":
+                if char == "{" or char == "[":
+                    self._open({} if char == "{" else [])
+                elif char == '"' or char == "'":
+                    self._start_string(char, is_key=False)
+                elif char == "}" or char == "]":
+                    self._close()  # e.g. a trailing comma before the bracket
+                elif char == ",":
+                    pass
+                else:
+                    self._state = "scalar"
+                    continue
+            elif state == "key":
+                if char == '"' or char == "'":
+                    self._start_string(char, is_key=True)
+                elif char == "}" or char == "]":
+                    self._close()
+                elif char == ",":
+                    pass
+                else:
+                    self._state = "bare_key"
+                    continue
+            elif state == "colon":
+                self._state = "value"
+                if char != ":":
+                    continue  # missing colon
+            elif state == "after":
+                if char == ",":
+                    self._state = "key" if isinstance(self._stack[-1], dict) else "value"
+                elif char == "}" or char == "]":
+                    self._close()
+                else:
+                    # Missing comma: treat the character as the start of the next item.
+                    self._state = "key" if isinstance(self._stack[-1], dict) else "value"
+                    continue
+            i += 1
+        return self.completed != before
+
+    def _read_token(self, text: str, i: int) -> int:
+        n = len(text)
+        if self._state == "string":
+            while i < n:
+                if self._escaped:
+                    self._parts.append(text[i])
+                    self._escaped = False
+                    i += 1
+                    continue
+                end = text.find(self._quote, i)
+                backslash = text.find("\\", i, end if end >= 0 else n)
+                if backslash >= 0:
+                    self._parts.append(text[i:backslash + 1])
+                    self._escaped = True
+                    i = backslash + 1
+                    continue
+                if end < 0:
+                    self._parts.append(text[i:])
+                    return n
+                self._parts.append(text[i:end])
+                self._end_string()
+                return end + 1
+            return i
+        start = i
+        while i < n and text[i] not in _SCALAR_END:
+            i += 1
+        self._parts.append(text[start:i])
+        if i < n:
+            self._end_scalar()
+        return i
+
+    def _start_string(self, quote: str, is_key: bool) -> None:
+        self._state, self._quote, self._is_key, self._parts = "string", quote, is_key, []
+
+    def _end_string(self) -> None:
+        value = _decode_string("".join(self._parts), self._quote)
+        self._parts = []
+        if self._is_key:
+            self._keys[-1] = value
+            self._state = "colon"
+        else:
+            self._value(value)
+
+    def _end_scalar(self) -> None:
+        token = "".join(self._parts).strip()
+        self._parts = []
+        if self._state == "bare_key":
+            self._keys[-1] = token.strip("'\"")
+            self._state = "colon"
+        elif token:
+            self._value(_decode_scalar(token))
+        else:
+            self._state = "after"
+
+    def _attach(self, value: Any) -> None:
+        if not self._stack:
+            self.root = value
+            return
+        top = self._stack[-1]
+        if isinstance(top, dict):
+            if self._keys[-1] is not None:
+                top[self._keys[-1]] = value
+                self._keys[-1] = None
+        else:
+            top.append(value)
+
+    def _value(self, value: Any) -> None:
+        self._attach(value)
+        self.completed += 1
+        self._state = "after" if self._stack else "done"
+
+    def _open(self, container: dict | list) -> None:
+        if not self._stack:
+            slot = None
+        elif isinstance(self._stack[-1], dict):
+            slot = self._keys[-1]
+        else:
+            slot = len(self._stack[-1])
+        self._attach(container)
+        self._stack.append(container)
+        self._slots.append(slot)
+        self._keys.append(None)
+        self._state = "key" if isinstance(container, dict) else "value"
+
+    def _close(self) -> None:
+        self._stack.pop()
+        self._keys.pop()
+        self._slots.pop()
+        self.completed += 1
+        self._state = "after" if self._stack else "done"
+
+    def close(self) -> Any:
+        """End of input: finish any open token, close open containers, and return the object.
+
+        Raises:
+            ValueError: If no JSON object or array was found at all.
+        """
+        if self._state == "string" and not self._is_key:
+            self._end_string()
+        elif self._state == "scalar":
+            # A cut-off literal ("tru") is dropped rather than kept as a string.
+            token = "".join(self._parts).strip()
+            self._parts = []
+            if token and _decode_scalar(token) is not token:
+                self._value(_decode_scalar(token))
+        while self._stack:
+            self._close()
+        if self.root is _MISSING:
+            raise ValueError("No JSON object found")
+        return self.root
+
+    def snapshot(self) -> Any:
+        """Copy of the partial object; closed containers never change again, so they are shared.
+
+        Costs one shallow copy of every open container, i.e. O(items in them).
+        """
+        if self.root is _MISSING:
+            return None
+        if not self._stack:
+            return self.root
+        copied = shell = type(self._stack[0])(self._stack[0])
+        for container, slot in zip(self._stack[1:], self._slots[1:]):
+            child = type(container)(container)
+            shell[slot] = child
+            shell = child
+        return copied
+
+
+def repair_json(text: str, root: str | None = None) -> Any:
+    """Parse ``text`` strictly if possible, otherwise with the tolerant incremental parser.
+
+    Args:
+        text (str): Model output.
+        root (str | None): "{" or "[" when the expected shape is known.
+    """
+    stripped = text.strip()
+    try:
+        return json.loads(stripped)
+    except ValueError:
+        pass
+    parser = IncrementalJsonParser(root)
+    parser.feed(stripped)
+    return parser.close()
+
+
+def _text_of(chunk: str | BaseMessage) -> str:
+    return chunk.text if isinstance(chunk, BaseMessage) else chunk
+
+
+def _parse_or_raise(text: str, root: str | None = None) -> Any:
+    try:
+        return repair_json(text, root)
+    except ValueError as e:
+        raise OutputParserException(f"Invalid json output: {text}", llm_output=text) from e
+
+
+class StreamingJsonOutputParser(JsonOutputParser):
+    """``JsonOutputParser`` that streams partial objects without re-parsing the buffer.
+
+    ``diff=True`` is not supported; every chunk yields the full partial object.
+    With ``pydantic_object`` set the root must be a JSON object.
+    """
+
+    def _root(self) -> str | None:
+        return "{" if self.pydantic_object is not None else None
+
+    def parse_result(self, result: list[Generation], *, partial: bool = False) -> Any:
+        text = result[0].text
+        try:
+            return _parse_or_raise(text, self._root())
+        except OutputParserException:
+            if partial:
+                return None
+            raise
+
+    def _partials(self, parser: IncrementalJsonParser, text: str) -> Iterator[Any]:
+        if parser.feed(text):
+            yield parser.snapshot()
+
+    def _transform(self, input: Iterator[str | BaseMessage]) -> Iterator[Any]:
+        parser = IncrementalJsonParser(self._root())
+        for chunk in input:
+            yield from self._partials(parser, _text_of(chunk))
+        yield from self._final(parser)
+
+    async def _atransform(self, input: AsyncIterator[str | BaseMessage]) -> AsyncIterator[Any]:
+        parser = IncrementalJsonParser(self._root())
+        async for chunk in input:
+            for partial in self._partials(parser, _text_of(chunk)):
+                yield partial
+        for final in self._final(parser):
+            yield final
+
+    def _final(self, parser: IncrementalJsonParser) -> Iterable[Any]:
+        if parser.done:
+            return
+        # The stream stopped before the JSON was closed: yield the repaired object.
+        try:
+            before = parser.completed
+            parser.close()
+        except ValueError as e:
+            raise OutputParserException("No JSON object in the model output") from e
+        if parser.completed != before:
+            yield parser.snapshot()
+
+
+class StreamingPydanticOutputParser(PydanticOutputParser):
+    """``PydanticOutputParser`` that streams partial dicts, then validated models.
+
+    While required fields are still missing the stream yields partial dicts.
+    From the first snapshot that validates it yields ``pydantic_object``
+    instances. The final object is validated with ``model_validate_json`` on the
+    raw text when that is valid JSON, and from the repaired object otherwise.
+    """
+
+    def _required(self) -> set[str]:
+        return {
+            field.alias or name
+            for name, field in self.pydantic_object.model_fields.items()
+            if field.is_required()
+        }
+
+    def _validate_text(self, text: str) -> BaseModel:
+        stripped = text.strip()
+        try:
+            return self.pydantic_object.model_validate_json(stripped)
+        except ValidationError:
+            pass
+        obj = _parse_or_raise(stripped, "{")
+        try:
+            return self.pydantic_object.model_validate(obj)
+        except ValidationError as e:
+            raise OutputParserException(
+                f"Failed to parse {self.pydantic_object.__name__} from completion {text}. Got: {e}", llm_output=text
+            ) from e
+
+    def parse_result(self, result: list[Generation], *, partial: bool = False) -> BaseModel | None:
+        try:
+            return self._validate_text(result[0].text)
+        except OutputParserException:
+            if partial:
+                return None
+            raise
+
+    def _stream(self, chunks: Iterable[str], parser: IncrementalJsonParser, state: dict) -> Iterator[Any]:
+        for text in chunks:
+            state["raw"].append(text)
+            if not parser.feed(text):
+                continue
+            partial = parser.snapshot()
+            if isinstance(partial, dict) and state["required"] <= partial.keys():
+                try:
+                    model = self.pydantic_object.model_validate(partial)
+                except ValidationError:
+                    model = None
+                if model is not None:
+                    if model != state["last"]:
+                        state["last"] = model
+                        yield model
+                    continue
+            if state["last"] is None:
+                yield partial
+
+    def _finish(self, state: dict) -> Iterator[BaseModel]:
+        model = self._validate_text("".join(state["raw"]))
+        if model != state["last"]:
+            yield model
+
+    def _transform(self, input: Iterator[str | BaseMessage]) -> Iterator[Any]:
+        parser = IncrementalJsonParser("{")
+        state = {"raw": [], "last": None, "required": self._required()}
+        yield from self._stream((_text_of(chunk) for chunk in input), parser, state)
+        yield from self._finish(state)
+
+    async def _atransform(self, input: AsyncIterator[str | BaseMessage]) -> AsyncIterator[Any]:
+        parser = IncrementalJsonParser("{")
+        state = {"raw": [], "last": None, "required": self._required()}
+        async for chunk in input:
+            for partial in self._stream([_text_of(chunk)], parser, state):
+                yield partial
+        for final in self._finish(state):
+            yield final
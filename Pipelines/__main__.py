@@ -0,0 +1,109 @@
+"""Single entry point for the example pipelines.
+
+    python -m Pipelines list
+    python -m Pipelines run conditional '{"text": "The battery died in an hour"}'
+    cat inputs.jsonl | python -m Pipelines run parallel -        # one JSON output line per input
+    python -m Pipelines run conditional --fake-latency 0.1       # offline, example input
+    python -m Pipelines serve --preload conditional &            # warm daemon on a Unix socket
+    python -m Pipelines status | stop
+
+``run`` sends its requests to the daemon when one is listening and otherwise
+runs the pipeline in-process, importing only that pipeline's modules and
+building its models on first use. This module imports nothing but the standard
+library, so the daemon path starts in a few tens of milliseconds.
+"""
+import argparse
+import json
+import sys
+
+from Pipelines.catalog import PIPELINES
+from Pipelines.daemon import DEFAULT_SOCKET, DaemonUnavailable, request, request_many
+
+
+def _inputs(args: argparse.Namespace) -> list[dict]:
+    if args.input is None:
+        return [PIPELINES[args.pipeline][1]]
+    if args.input == "-":
+        return [json.loads(line) for line in sys.stdin if line.strip()]
+    return [json.loads(args.input)]
+
+
+def run(args: argparse.Namespace) -> int:
+    inputs = _inputs(args)
+    if not args.local and args.fake_latency is None:
+        try:
+            failed = 0
+            messages = ({"pipeline": args.pipeline, "input": value} for value in inputs)
+            for reply in request_many(messages, args.socket):
+                if "error" in reply:
+                    failed += 1
+                    print(reply["error"], file=sys.stderr)
+                else:
+                    print(json.dumps(reply["output"]))
+            return 1 if failed else 0
+        except DaemonUnavailable:
+            pass
+
+    from Pipelines.catalog import build, dumps
+
+    chain = build(args.pipeline, args.fake_latency)
+    for value in inputs:
+        print(dumps(chain.invoke(value)))
+    return 0
+
+
+def serve(args: argparse.Namespace) -> int:
+    from dotenv import load_dotenv
+
+    from Pipelines.daemon import PipelineDaemon
+
+    load_dotenv()
+    with PipelineDaemon(args.socket, args.fake_latency, args.preload) as server:
+        print(f"serving {len(PIPELINES)} pipelines on {args.socket}", file=sys.stderr, flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(prog="python -m Pipelines", description="Run the example pipelines.")
+    arg_parser.add_argument("--socket", default=DEFAULT_SOCKET, help="daemon socket path")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="list pipelines")
+
+    run_parser = commands.add_parser("run", help="run a pipeline")
+    run_parser.add_argument("pipeline", choices=sorted(PIPELINES))
+    run_parser.add_argument("input", nargs="?", help="JSON object, or - for JSONL on stdin; defaults to the example input")
+    run_parser.add_argument("--local", action="store_true", help="run in-process even if a daemon is up")
+    run_parser.add_argument("--fake-latency", type=float, help="offline fake models with this latency (s)")
+
+    serve_parser = commands.add_parser("serve", help="start the warm daemon")
+    serve_parser.add_argument("--preload", nargs="*", default=[], choices=sorted(PIPELINES))
+    serve_parser.add_argument("--fake-latency", type=float, help="serve offline fake models with this latency (s)")
+
+    commands.add_parser("status", help="show daemon status")
+    commands.add_parser("stop", help="stop the daemon")
+    args = arg_parser.parse_args()
+
+    if args.command == "list":
+        for name, (spec, example) in PIPELINES.items():
+            print(f"{name:<16} {spec:<52} {json.dumps(example)}")
+        return 0
+    if args.command == "run":
+        return run(args)
+    if args.command == "serve":
+        return serve(args)
+    try:
+        reply = request({"command": "status" if args.command == "status" else "shutdown"}, args.socket, timeout=5)
+    except DaemonUnavailable as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(json.dumps(reply["status"], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
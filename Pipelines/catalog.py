@@ -0,0 +1,54 @@
+"""Named example pipelines for the ``python -m Pipelines`` CLI and daemon.
+
+Only names and ``module:builder`` paths live here, so listing pipelines or
+sending a request to the daemon imports nothing from LangChain or the provider
+SDKs; ``build`` imports the one module a pipeline needs when it is run.
+"""
+import json
+from typing import Any
+
+# name -> (builder, example input)
+PIPELINES: dict[str, tuple[str, dict]] = {
+    "conditional": ("Chain.conditional_chain:build_chain", {"text": "The phone is terrible. I hate the battery life"}),
+    "parallel": ("Chain.parallel_chain:build_chain", {"topic": "partial least squares regression"}),
+    "complex": ("Chain.complex_chain:build_chain", {"topics": "AI, ML, DL"}),
+    "sequence": ("Runnable.sequesnce_runnable:build_chain", {"topic": "programming"}),
+    "passthrough": ("Runnable.runnable_passthrough:build_chain", {"topic": "programming"}),
+    "branch": ("Runnable.runnable_branch:build_chain", {"topic": "history"}),
+    "social": ("Runnable.parallel_runnable:build_chain", {"topic": "the benefits of using AI in business"}),
+    "person": ("OutputParser.pydantic_output_parser:build_chain", {"place": "India"}),
+    "summarize-file": ("Document_loader.text_loader:build_chain", {"path": "Document_loader/ai_poem.txt"}),
+    "summarize-web": ("Document_loader.web_based_loader:build_chain",
+                      {"urls": ["https://www.applegadgetsbd.com/product/macbook-air-m4-15-inch"]}),
+}
+
+
+def build(name: str, fake_latency: float | None = None, lazy: bool = True) -> Any:
+    """Build the pipeline ``name``.
+
+    Args:
+        name (str): A key of ``PIPELINES``.
+        fake_latency (float | None): Use offline fake models with this latency instead.
+        lazy (bool): Defer building the real models (and importing their SDKs) to
+            the first call. Defaults to True.
+    Returns:
+        Runnable: The pipeline.
+    """
+    if name not in PIPELINES:
+        raise KeyError(f"Unknown pipeline {name!r}; choose from {sorted(PIPELINES)}")
+    from BasicLLM.model_registry import registry
+    from Chain.batch_runner import load_chain
+
+    with registry.deferred(lazy):
+        return load_chain(PIPELINES[name][0], fake_latency)
+
+
+def _default(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    return str(value)
+
+
+def dumps(value: Any) -> str:
+    """One-line JSON for a pipeline output (pydantic models and messages included)."""
+    return json.dumps(value, default=_default)
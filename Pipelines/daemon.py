@@ -0,0 +1,187 @@
+"""Warm pipeline daemon on a local Unix socket.
+
+A cron job that runs ``python -m Chain.conditional_chain`` pays for importing
+LangChain and the provider SDKs, building the models and opening TLS
+connections on every run, which is most of its wall time. The daemon does that
+once: it keeps built pipelines, models and the registry's keep-alive pools in
+one long-lived process and answers requests over a Unix socket, so the client
+only needs the standard library.
+
+The protocol is newline-delimited JSON; a connection may carry any number of
+requests, each answered in order:
+
+    {"pipeline": "conditional", "input": {"text": "..."}}  ->  {"output": ...} | {"error": "..."}
+    {"command": "status"}                                  ->  {"status": {...}}
+    {"command": "shutdown"}                                ->  {"status": "stopping"}
+
+    python -m Pipelines serve --preload conditional parallel &
+    python -m Pipelines run conditional '{"text": "Great phone"}'   # uses the daemon
+"""
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Iterable, Iterator
+
+DEFAULT_SOCKET = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), f"langchain-pipelines-{os.getuid()}.sock"
+)
+
+
+class DaemonUnavailable(ConnectionError):
+    """No daemon is listening on the socket."""
+
+
+def connect(socket_path: str = DEFAULT_SOCKET, timeout: float | None = None) -> socket.socket:
+    """Open a connection to the daemon.
+
+    Raises:
+        DaemonUnavailable: If the socket does not exist or nothing listens on it.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        sock.close()
+        raise DaemonUnavailable(f"no pipeline daemon on {socket_path}") from e
+    return sock
+
+
+def request_many(
+    messages: Iterable[dict], socket_path: str = DEFAULT_SOCKET, timeout: float | None = None
+) -> Iterator[dict]:
+    """Send ``messages`` over one connection and yield the replies in order."""
+    with connect(socket_path, timeout) as sock, sock.makefile("rwb") as stream:
+        for message in messages:
+            stream.write(json.dumps(message).encode() + b"\n")
+            stream.flush()
+            line = stream.readline()
+            if not line:
+                raise ConnectionError("pipeline daemon closed the connection")
+            yield json.loads(line)
+
+
+def request(message: dict, socket_path: str = DEFAULT_SOCKET, timeout: float | None = None) -> dict:
+    return next(request_many([message], socket_path, timeout))
+
+
+class _Connection(socketserver.StreamRequestHandler):
+    server: "PipelineDaemon"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                reply = self.server.dispatch(json.loads(line))
+            except Exception as exc:
+                reply = json.dumps({"error": f"{type(exc).__name__}: {exc}"})
+            self.wfile.write(reply.encode() + b"\n")
+            self.wfile.flush()
+
+
+class PipelineDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serve catalog pipelines from one warm process, one thread per connection.
+
+    Args:
+        socket_path (str): Where to listen. Defaults to ``DEFAULT_SOCKET``.
+        fake_latency (float | None): Serve offline fake models with this latency.
+        preload (Iterable[str]): Pipelines to build (models included) before serving.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, fake_latency: float | None = None, preload: Iterable[str] = ()):
+        self.socket_path = socket_path
+        self.fake_latency = fake_latency
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        # name -> Future of the built chain; a build runs outside every lock.
+        self._chains: dict[str, Future] = {}
+        self._chains_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._claim_socket()
+        super().__init__(socket_path, _Connection)
+        os.chmod(socket_path, 0o600)
+        for name in preload:
+            self.chain(name)
+
+    def _claim_socket(self) -> None:
+        if not os.path.exists(self.socket_path):
+            return
+        try:
+            connect(self.socket_path, timeout=1.0).close()
+        except DaemonUnavailable:
+            os.unlink(self.socket_path)  # left behind by a daemon that died
+        else:
+            raise RuntimeError(f"a pipeline daemon is already listening on {self.socket_path}")
+
+    def chain(self, name: str) -> Any:
+        """The built pipeline ``name``; concurrent first requests share one build."""
+        with self._chains_lock:
+            future = self._chains.get(name)
+            owner = future is None
+            if owner:
+                future = self._chains[name] = Future()
+        if owner:
+            from Pipelines.catalog import build
+
+            try:
+                # Not lazy: the point of the daemon is to pay for the models up front.
+                future.set_result(build(name, self.fake_latency, lazy=False))
+            except BaseException as exc:
+                with self._chains_lock:
+                    del self._chains[name]  # let a later request try again
+                future.set_exception(exc)
+                raise
+        return future.result()
+
+    def dispatch(self, message: dict) -> str:
+        from Pipelines.catalog import dumps
+
+        command = message.get("command")
+        if command == "status":
+            return dumps({"status": self.status()})
+        if command == "shutdown":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return dumps({"status": "stopping"})
+        with self._stats_lock:
+            self.requests += 1
+        try:
+            output = self.chain(message["pipeline"]).invoke(message.get("input", {}))
+        except Exception:
+            with self._stats_lock:
+                self.errors += 1
+            raise
+        return dumps({"output": output})
+
+    def status(self) -> dict[str, Any]:
+        with self._chains_lock:
+            built = sorted(name for name, future in self._chains.items() if future.done())
+        with self._stats_lock:
+            requests, errors = self.requests, self.errors
+        return {
+            "pid": os.getpid(),
+            "socket": self.socket_path,
+            "uptime_s": round(time.time() - self.started, 1),
+            "pipelines": built,
+            "requests": requests,
+            "errors": errors,
+            "fake_latency": self.fake_latency,
+        }
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        from BasicLLM.model_registry import registry
+
+        registry.close()
@@ -0,0 +1,84 @@
+"""Cold-start benchmark for the pipeline CLI: in-process runs versus the warm daemon.
+
+Every case is a fresh ``python`` subprocess, timed from spawn to exit, so the
+numbers are what a cron job or shell script actually waits for:
+
+    import_sdks   reference: importing langchain_core chat models and the provider SDKs
+    list          ``python -m Pipelines list`` (standard library only)
+    local         ``run --fake-latency 0``: imports the pipeline and builds it in-process
+    daemon        ``run`` against a warm daemon started once for the whole benchmark
+
+Fake models keep the runs offline, so what is measured is startup, not network.
+
+    python -m Pipelines.startup_benchmark --runs 10 --pipeline conditional
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from Pipelines.daemon import DaemonUnavailable, request
+
+SDK_IMPORTS = (
+    "import langchain_core.language_models.chat_models, langchain_groq, langchain_google_genai"
+)
+
+
+def time_command(argv: list[str], runs: int) -> list[float]:
+    """Wall-clock seconds of ``runs`` fresh subprocesses of ``argv``."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, check=True, stdout=subprocess.DEVNULL, stdin=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def wait_for_daemon(socket_path: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            request({"command": "status"}, socket_path, timeout=1)
+            return
+        except DaemonUnavailable:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--pipeline", default="conditional")
+    arg_parser.add_argument("--runs", type=int, default=5, help="Subprocesses per case.")
+    args = arg_parser.parse_args()
+
+    socket_path = os.path.join(tempfile.mkdtemp(), "bench.sock")
+    cli = [sys.executable, "-m", "Pipelines", "--socket", socket_path]
+    cases = {
+        "import_sdks": [sys.executable, "-c", SDK_IMPORTS],
+        "list": cli + ["list"],
+        "local": cli + ["run", args.pipeline, "--fake-latency", "0"],
+        "daemon": cli + ["run", args.pipeline],
+    }
+
+    daemon = subprocess.Popen(cli + ["serve", "--fake-latency", "0", "--preload", args.pipeline], stderr=subprocess.DEVNULL)
+    try:
+        wait_for_daemon(socket_path)
+        print(f"{'case':<12} {'median':>9} {'min':>9} {'max':>9}   ({args.runs} runs, pipeline {args.pipeline})")
+        for name, argv in cases.items():
+            timings = time_command(argv, args.runs)
+            print(f"{name:<12} {statistics.median(timings) * 1000:7.1f}ms "
+                  f"{min(timings) * 1000:7.1f}ms {max(timings) * 1000:7.1f}ms", flush=True)
+    finally:
+        try:
+            request({"command": "shutdown"}, socket_path, timeout=5)
+        except DaemonUnavailable:
+            pass
+        daemon.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
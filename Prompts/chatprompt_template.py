@@ -1,13 +1,12 @@
-from langchain_core.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+from langchain_core.prompts import ChatPromptTemplate
 
-def get_chat_prompt(technology: str, sector: str) -> ChatPromptTemplate:
-    chat_prompt = ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(f"You are a helpful assistant knowledgeable about {technology}."),
-        HumanMessagePromptTemplate.from_template(f"Explain the impact of {technology} in the {sector} sector."),
-    ])
+from Prompts.template_registry import prompts
 
-    return chat_prompt
+def get_chat_prompt() -> ChatPromptTemplate:
+    # Compiled once by the registry; values are supplied when formatting.
+    return prompts.langchain("tech_sector")
 
 if __name__ == "__main__":
-    chat_prompt = get_chat_prompt("Artificial Intelligence", "healthcare")
-    print(chat_prompt.format_messages())
+    chat_prompt = get_chat_prompt()
+    print(chat_prompt.format_messages(technology="Artificial Intelligence", sector="healthcare"))
+    print(prompts.render("tech_sector", technology="Artificial Intelligence", sector="healthcare"))
@@ -0,0 +1,192 @@
+"""Token-budgeted conversation memory with rolling summaries and saved sessions.
+
+Re-sending the whole chat history makes every turn slower and more expensive
+than the last. ``ConversationMemory`` keeps the prompt bounded instead:
+
+* a fixed system message is built once and always comes first, so the prompt
+  prefix is byte-identical across turns (what provider prompt caches key on),
+* only the most recent turns that fit in ``token_budget`` are sent verbatim,
+* older turns are folded into a running summary on a background thread, so no
+  turn waits for the summarizer; the summary is sent as a human/AI exchange
+  after the system message, never as a second system message, because
+  providers such as Gemini merge all system messages into one instruction
+  and the prefix would change with every summary,
+* ``save`` / ``load`` keep a session on disk as JSON.
+
+    memory = ConversationMemory("You are a blog writer.", summarizer=build_summarizer(model))
+    reply = model.invoke(memory.messages("Write about edge AI"))
+    memory.add_turn("Write about edge AI", reply.content)
+"""
+import json
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable
+
+from BasicLLM.scheduler import estimate_tokens
+
+summary_template = PromptTemplate(
+    template="Progressively summarize the conversation, keeping names, decisions and open requests.\n\n"
+             "Current summary:\n{summary}\n\nNew lines of conversation:\n{lines}\n\nNew summary:",
+    input_variables=["summary", "lines"]
+)
+
+
+def build_summarizer(model: BaseChatModel) -> Runnable:
+    return summary_template | model | StrOutputParser()
+
+
+class ConversationMemory:
+    """Sliding-window chat history under a token budget.
+
+    Args:
+        system_prompt (str): Constant instructions; sent first on every turn.
+        summarizer (Runnable | None): ``{"summary", "lines"} -> str``. With ``None``
+            evicted turns are simply dropped.
+        token_budget (int): Estimated tokens of verbatim history sent per turn. Defaults to 2000.
+        path (str | None): Session file used by ``save``.
+        count_tokens (Callable[[str], int]): Token estimator. Defaults to ~4 characters per token.
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        summarizer: Runnable | None = None,
+        token_budget: int = 2000,
+        path: str | None = None,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+    ):
+        self.system_message = SystemMessage(content=system_prompt)
+        self.summarizer = summarizer
+        self.token_budget = token_budget
+        self.path = path
+        self.count_tokens = count_tokens
+        self.summary = ""
+        self._turns: deque[tuple[HumanMessage, AIMessage, int]] = deque()
+        self._window_tokens = 0
+        self._evicted: list[tuple[HumanMessage, AIMessage]] = []
+        self._lock = threading.Lock()
+        # One summarizer at a time, whether on the worker or in ``wait``.
+        self._summary_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-summary")
+        self._pending: Future | None = None
+
+    def messages(self, user_input: str | BaseMessage) -> list[BaseMessage]:
+        """Prompt for the next turn: system prefix, summary exchange, recent turns, then ``user_input``."""
+        human = user_input if isinstance(user_input, BaseMessage) else HumanMessage(content=user_input)
+        with self._lock:
+            messages: list[BaseMessage] = [self.system_message]
+            if self.summary:
+                messages.extend((
+                    HumanMessage(content="Summarize our conversation so far."),
+                    AIMessage(content=f"Summary of the earlier conversation: {self.summary}"),
+                ))
+            for turn_human, turn_ai, _ in self._turns:
+                messages.extend((turn_human, turn_ai))
+        messages.append(human)
+        return messages
+
+    def add_turn(self, user_input: str | BaseMessage, reply: str | BaseMessage) -> None:
+        """Record a completed turn and evict the oldest ones beyond the budget."""
+        human = user_input if isinstance(user_input, BaseMessage) else HumanMessage(content=user_input)
+        ai = reply if isinstance(reply, BaseMessage) else AIMessage(content=reply)
+        tokens = self.count_tokens(human.text) + self.count_tokens(ai.text)
+        with self._lock:
+            self._turns.append((human, ai, tokens))
+            self._window_tokens += tokens
+            # Always keep the latest turn, even when it alone exceeds the budget.
+            while self._window_tokens > self.token_budget and len(self._turns) > 1:
+                old_human, old_ai, old_tokens = self._turns.popleft()
+                self._window_tokens -= old_tokens
+                self._evicted.append((old_human, old_ai))
+            if self._evicted and self.summarizer is None:
+                self._evicted.clear()
+            elif self._evicted and (self._pending is None or self._pending.done()):
+                self._pending = self._executor.submit(self._summarize)
+
+    def _summarize(self) -> None:
+        # Drains everything evicted so far, including turns evicted while a previous summary ran.
+        # Turns leave ``_evicted`` only once their summary is in, so a failing summarizer
+        # loses nothing: they stay queued (and saved) for the next attempt.
+        with self._summary_lock:
+            while True:
+                with self._lock:
+                    evicted = list(self._evicted)
+                    summary = self.summary
+                if not evicted:
+                    return
+                lines = "\n".join(f"{m.type}: {m.text}" for turn in evicted for m in turn)
+                new_summary = self.summarizer.invoke({"summary": summary or "(none)", "lines": lines})
+                with self._lock:
+                    self.summary = new_summary
+                    del self._evicted[:len(evicted)]
+
+    def wait(self) -> None:
+        """Block until background summarization has caught up."""
+        with self._lock:
+            pending = self._pending
+        if pending is not None:
+            try:
+                pending.result()
+            except BaseException:
+                # Report a failed summary once; its turns are still queued for the next try.
+                with self._lock:
+                    if self._pending is pending:
+                        self._pending = None
+                raise
+        # A turn evicted just as the worker was finishing is summarized here.
+        with self._lock:
+            behind = bool(self._evicted)
+        if behind and self.summarizer is not None:
+            self._summarize()
+
+    @property
+    def window_tokens(self) -> int:
+        return self._window_tokens
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "system_prompt": self.system_message.content,
+                "summary": self.summary,
+                "token_budget": self.token_budget,
+                "turns": [[h.content, a.content] for h, a, _ in self._turns],
+                # Evicted but not yet summarized; resummarized after a reload.
+                "evicted": [[h.content, a.content] for h, a in self._evicted],
+            }
+
+    def save(self, path: str | None = None) -> None:
+        path = path or self.path
+        if path is None:
+            raise ValueError("No session path given")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, summarizer: Runnable | None = None, **kwargs) -> "ConversationMemory":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        kwargs.setdefault("token_budget", data["token_budget"])
+        memory = cls(data["system_prompt"], summarizer, path=path, **kwargs)
+        memory.summary = data["summary"]
+        memory._evicted = [(HumanMessage(content=h), AIMessage(content=a)) for h, a in data["evicted"]]
+        for human, ai in data["turns"]:
+            memory.add_turn(human, ai)
+        return memory
+
+    def close(self) -> None:
+        """Finish pending summaries, save the session if it has a path, and stop the worker."""
+        self.wait()
+        if self.path:
+            self.save()
+        self._executor.shutdown()
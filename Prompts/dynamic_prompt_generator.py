@@ -1,12 +1,16 @@
 from langchain_core.prompts import PromptTemplate
 
+from Prompts.template_registry import prompts
+
 def get_prompt() -> PromptTemplate:
-    template = "Write a topic on {topic} in a {style} style."
-    prompt =  PromptTemplate(template=template, input_variables=["topic", "style"])
-    return prompt
+    return prompts.langchain("topic_style")
 
 
 if __name__ == "__main__":
     prompt = get_prompt()
     print(prompt.format(topic="Ai in daily life", style="informal"))
     print(prompt.format(topic="Ai in health", style="normal"))
+    print(prompts.render_batch("topic_style", [
+        {"topic": "Ai in daily life", "style": "informal"},
+        {"topic": "Ai in health", "style": "normal"},
+    ]))
@@ -1,48 +1,51 @@
-from langchain_core.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, AIMessage
+import os
+import re
+
+from langchain_core.prompts import HumanMessagePromptTemplate
 from dotenv import load_dotenv
 
+from BasicLLM.model_registry import get_gemini_llm
+from Prompts.conversation_memory import ConversationMemory, build_summarizer
+
 load_dotenv()
 
-def get_gemini_llm(model: str = "gemini-2.5-flash") -> ChatGoogleGenerativeAI:
-    llm = ChatGoogleGenerativeAI(model=model)
-    return llm
+# Compiled once; only the instruction changes from turn to turn.
+instruction_prompt = HumanMessagePromptTemplate.from_template(
+    "Write a blog on the topic of {technology} where instructions are {sector}."
+)
+
+
+def get_system_prompt(technology: str) -> str:
+    return f"You are a professional blog writer and you will write blogs consciously. Blog would be written in short as like a paragraph about the topic provided by the user. The blog should be written about {technology}."
+
 
-def get_chat_prompt(technology: str, sector: str) -> ChatPromptTemplate:
-    chat_prompt = ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(f"You are a professional blog writer and you will write blogs consciously. Blog would be written in short as like a paragraph about the topic provided by the user. The blog should be written about {technology}."),
-        HumanMessagePromptTemplate.from_template(f"Write a blog on the topic of {technology} where instructions are {sector}."),
-    ])
+def session_path(technology: str) -> str:
+    name = re.sub(r"[^a-z0-9]+", "-", technology.lower()).strip("-") or "session"
+    return os.path.join(".chat_sessions", f"{name}.json")
 
-    return chat_prompt
 
 if __name__ == "__main__":
     gemini_llm = get_gemini_llm()
     topic = input("Enter the blog topic: ")
-    chat_history = []
-    while True:
-        user_input = input("Write instruction for blog (type 'exit' to quit):")
-        if user_input.lower() == 'exit':
-            break
-        # Create initial system message and prompt
-        chat_prompt = get_chat_prompt(topic, user_input)
-        messages = chat_prompt.format_messages()
-
-        # Add all previous conversation history
-        messages.extend(chat_history)
-
-        # Add current user message
-        messages.append(HumanMessage(content=user_input))
-
-        # Get response from LLM
-        response = gemini_llm.invoke(messages)
-        print("Blog Idea:", response.content)
-
-         # Store the conversation in chat_history
-        chat_history.append(HumanMessage(content=user_input))
-        chat_history.append(AIMessage(content=response.content))
-
-        print("\n--- Conversation History ---")
-        for msg in chat_history:
-            print(f"{msg.type}: {msg.content}")
\ No newline at end of file
+    path = session_path(topic)
+    # Older turns are summarized in the background so each request stays about the same size.
+    if os.path.exists(path):
+        memory = ConversationMemory.load(path, summarizer=build_summarizer(gemini_llm))
+        print(f"Resumed session from {path}")
+    else:
+        memory = ConversationMemory(get_system_prompt(topic), summarizer=build_summarizer(gemini_llm), token_budget=2000, path=path)
+    try:
+        while True:
+            user_input = input("Write instruction for blog (type 'exit' to quit):")
+            if user_input.lower() == 'exit':
+                break
+            message = instruction_prompt.format(technology=topic, sector=user_input)
+
+            # Get response from LLM
+            response = gemini_llm.invoke(memory.messages(message))
+            print("Blog Idea:", response.content)
+
+            memory.add_turn(message, response)
+            memory.save()
+    finally:
+        memory.close()
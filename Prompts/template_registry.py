@@ -0,0 +1,132 @@
+"""Registry of prompt templates that are parsed and validated once.
+
+``PromptTemplate(...)`` / ``ChatPromptTemplate.from_messages(...)`` parse and
+validate their template (and build pydantic models) on construction, and the
+scripts used to do that on every call, sometimes with the values already
+f-string-inlined so no two calls could share a template. The registry compiles
+each template once into a format string plus its variable set; rendering is a
+``str.format_map`` per message, and ``render_batch`` turns a list of input dicts
+into prompts without touching the parser again. ``langchain`` hands out one
+cached LangChain template per name for use inside chains.
+
+    from Prompts.template_registry import prompts
+    prompts.render_batch("tech_sector", [{"technology": "AI", "sector": "health"}, ...])
+"""
+import string
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterable, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
+from langchain_core.prompts.base import BasePromptTemplate
+
+MESSAGE_TYPES = {"system": SystemMessage, "human": HumanMessage, "ai": AIMessage}
+
+
+def _variables(template: str) -> frozenset[str]:
+    """Named fields of an f-string template; rejects positional and attribute/index fields."""
+    names = set()
+    for _, field, _, _ in string.Formatter().parse(template):
+        if field is None:
+            continue
+        if not field.isidentifier():
+            raise ValueError(f"Unsupported template field {{{field}}} in {template!r}")
+        names.add(field)
+    return frozenset(names)
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """A validated template: ``messages`` is ``((role, format_string), ...)``, role None for plain text."""
+
+    name: str
+    messages: tuple[tuple[str | None, str], ...]
+    input_variables: frozenset[str]
+
+    @property
+    def is_chat(self) -> bool:
+        return self.messages[0][0] is not None
+
+    def _check(self, values: dict[str, Any]) -> None:
+        if not self.input_variables <= values.keys():
+            missing = sorted(self.input_variables - values.keys())
+            raise KeyError(f"Prompt {self.name!r} is missing variables {missing}")
+
+    def render(self, values: dict[str, Any]) -> str | list[BaseMessage]:
+        """A string for text templates, a message list for chat templates."""
+        self._check(values)
+        if not self.is_chat:
+            return self.messages[0][1].format_map(values)
+        return [MESSAGE_TYPES[role](content=text.format_map(values)) for role, text in self.messages]
+
+    def render_batch(self, batch: Iterable[dict[str, Any]]) -> list[str] | list[list[BaseMessage]]:
+        return [self.render(values) for values in batch]
+
+
+class PromptRegistry:
+    """Named, compiled prompt templates shared across a process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._compiled: dict[str, CompiledTemplate] = {}
+        self._langchain: dict[str, BasePromptTemplate] = {}
+
+    def register(self, name: str, template: str | Sequence[tuple[str, str]]) -> CompiledTemplate:
+        """Compile ``template`` (a string or ``[(role, text), ...]``) under ``name``.
+
+        Raises:
+            ValueError: On malformed braces, unsupported fields or unknown roles, at
+                registration instead of on first use.
+        """
+        messages = ((None, template),) if isinstance(template, str) else tuple((r, t) for r, t in template)
+        if not messages:
+            raise ValueError(f"Prompt {name!r} has no messages")
+        variables: set[str] = set()
+        for role, text in messages:
+            if role is not None and role not in MESSAGE_TYPES:
+                raise ValueError(f"Unknown message role {role!r} in prompt {name!r}")
+            variables |= _variables(text)
+        compiled = CompiledTemplate(name, messages, frozenset(variables))
+        with self._lock:
+            self._compiled[name] = compiled
+            self._langchain.pop(name, None)
+        return compiled
+
+    def get(self, name: str) -> CompiledTemplate:
+        try:
+            return self._compiled[name]
+        except KeyError:
+            raise KeyError(f"No prompt registered as {name!r}") from None
+
+    def render(self, name: str, values: dict[str, Any] | None = None, **kwargs: Any) -> str | list[BaseMessage]:
+        return self.get(name).render({**(values or {}), **kwargs})
+
+    def render_batch(self, name: str, batch: Iterable[dict[str, Any]]) -> list[str] | list[list[BaseMessage]]:
+        return self.get(name).render_batch(batch)
+
+    def langchain(self, name: str) -> BasePromptTemplate:
+        """The LangChain ``PromptTemplate`` / ``ChatPromptTemplate`` for ``name``, built once."""
+        template = self._langchain.get(name)
+        if template is None:
+            compiled = self.get(name)
+            if compiled.is_chat:
+                template = ChatPromptTemplate.from_messages(list(compiled.messages))
+            else:
+                template = PromptTemplate(
+                    template=compiled.messages[0][1], input_variables=sorted(compiled.input_variables)
+                )
+            with self._lock:
+                template = self._langchain.setdefault(name, template)
+        return template
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._compiled
+
+
+prompts = PromptRegistry()
+prompts.register("topic_style", "Write a topic on {topic} in a {style} style.")
+prompts.register("tech_sector", [
+    ("system", "You are a helpful assistant knowledgeable about {technology}."),
+    ("human", "Explain the impact of {technology} in the {sector} sector."),
+])
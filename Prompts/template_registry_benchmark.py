@@ -0,0 +1,58 @@
+"""Benchmark: constructing a template per call vs. the compiled prompt registry.
+
+Renders ``--n`` chat prompts four ways: the old ``get_chat_prompt`` pattern
+(f-string values, new ``ChatPromptTemplate`` per call), one shared
+``ChatPromptTemplate.format_messages``, and the registry's ``render_batch`` for
+chat and text prompts.
+
+    python -m Prompts.template_registry_benchmark --n 100000
+"""
+import argparse
+import time
+
+from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, PromptTemplate, SystemMessagePromptTemplate
+
+from Prompts.template_registry import prompts
+
+
+def construct_per_call(technology: str, sector: str) -> ChatPromptTemplate:
+    return ChatPromptTemplate.from_messages([
+        SystemMessagePromptTemplate.from_template(f"You are a helpful assistant knowledgeable about {technology}."),
+        HumanMessagePromptTemplate.from_template(f"Explain the impact of {technology} in the {sector} sector."),
+    ])
+
+
+def run(label: str, n: int, func) -> float:
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    assert len(result) == n
+    print(f"{label:<32} {elapsed:7.3f} s  {elapsed * 1e6 / n:8.2f} us/prompt")
+    return elapsed
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--n", type=int, default=20_000)
+    args = arg_parser.parse_args()
+
+    batch = [{"technology": f"technology {i}", "sector": f"sector {i % 50}"} for i in range(args.n)]
+    topics = [{"topic": f"topic {i}", "style": "informal"} for i in range(args.n)]
+
+    baseline = run("chat: construct per call", args.n,
+                   lambda: [construct_per_call(v["technology"], v["sector"]).format_messages() for v in batch])
+    shared = prompts.langchain("tech_sector")
+    run("chat: shared ChatPromptTemplate", args.n, lambda: [shared.format_messages(**v) for v in batch])
+    registry = run("chat: registry.render_batch", args.n, lambda: prompts.render_batch("tech_sector", batch))
+    print(f"  registry speedup over construct-per-call: {baseline / registry:.1f}x")
+
+    text_baseline = run("text: construct per call", args.n, lambda: [
+        PromptTemplate(template="Write a topic on {topic} in a {style} style.", input_variables=["topic", "style"]).format(**v)
+        for v in topics
+    ])
+    text_registry = run("text: registry.render_batch", args.n, lambda: prompts.render_batch("topic_style", topics))
+    print(f"  registry speedup over construct-per-call: {text_baseline / text_registry:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
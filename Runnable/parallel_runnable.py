@@ -1,12 +1,14 @@
 from langchain_core.runnables import RunnableSequence, RunnableParallel
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.language_models import BaseChatModel
 
 from dotenv import load_dotenv
 
+from BasicLLM.model_registry import get_gemini_llm
+from Cache.single_flight import SingleFlightChatModel
+
 load_dotenv()
-model1 = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
 
 parser = StrOutputParser()
 
@@ -20,13 +22,24 @@ template2 = PromptTemplate(
     input_variables=["topic"]
 )
 
-parallel_chain = RunnableParallel({
-    "tweet": RunnableSequence(template1, model1, parser),
-    "linkedin_post": RunnableSequence(template2, model1, parser)
-})
 
-result = parallel_chain.invoke({"topic": "the benefits of using AI in business"})
-print("Result ===> ",result)
+def build_chain(model1: BaseChatModel | None = None, coalesce: bool = False):
+    if model1 is None:
+        model1 = get_gemini_llm()
+    if coalesce:
+        model1 = SingleFlightChatModel(model=model1)
+
+    return RunnableParallel({
+        "tweet": RunnableSequence(template1, model1, parser),
+        "linkedin_post": RunnableSequence(template2, model1, parser)
+    })
+
+
+if __name__ == "__main__":
+    parallel_chain = build_chain()
+
+    result = parallel_chain.invoke({"topic": "the benefits of using AI in business"})
+    print("Result ===> ",result)
 
-print("Tweet ===> ",result["tweet"])
-print("LinkedIn Post ===> ",result["linkedin_post"])
\ No newline at end of file
+    print("Tweet ===> ",result["tweet"])
+    print("LinkedIn Post ===> ",result["linkedin_post"])
@@ -1,13 +1,16 @@
+import sys
+
 from langchain_core.runnables import RunnableSequence, RunnableParallel, RunnablePassthrough, RunnableBranch
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.language_models import BaseChatModel
 
 from dotenv import load_dotenv
 
-load_dotenv()
+from BasicLLM.model_registry import get_gemini_llm
+from Runnable.streaming_branch import EarlyDecisionBranch
 
-model = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
+load_dotenv()
 
 prompt1 = PromptTemplate(
     template="Write a Detailed report on the following topic: {topic}.",
@@ -21,13 +24,45 @@ prompt2 = PromptTemplate(
 
 parser = StrOutputParser()
 
-res_gen_result = RunnableSequence(prompt1, model, parser)
 
-branch = RunnableBranch(
-    (lambda x: len(x.split()) > 200, RunnableSequence(prompt2, model, parser)),
-    RunnablePassthrough()
-)
+def build_chain(model: BaseChatModel | None = None):
+    if model is None:
+        model = get_gemini_llm()
+
+    res_gen_result = RunnableSequence(prompt1, model, parser)
+
+    branch = RunnableBranch(
+        (lambda x: len(x.split()) > 200, RunnableSequence(prompt2, model, parser)),
+        RunnablePassthrough()
+    )
+
+    return RunnableSequence(res_gen_result, branch)
+
+
+def build_early_chain(model: BaseChatModel | None = None, section_words: int | None = None):
+    """Same routing, but decided while the report is still streaming.
+
+    By default a long report is summarized in one call, as in ``build_chain``.
+    With ``section_words`` summarizing starts during generation: sections of
+    that many words are summarized as they finish and the section summaries
+    are summarized once more, so the result is still a single summary, at the
+    cost of one extra call per section.
+    """
+    if model is None:
+        model = get_gemini_llm()
+
+    summarize = RunnableSequence(prompt2, model, parser)
+    return EarlyDecisionBranch(
+        source=RunnableSequence(prompt1, model),
+        threshold_words=200,
+        on_exceed=summarize,
+        default=RunnablePassthrough(),
+        section_words=section_words,
+        combine=summarize,
+    ).as_runnable()
+
 
-final_chain = RunnableSequence(res_gen_result, branch)
+if __name__ == "__main__":
+    final_chain = build_early_chain() if "--early" in sys.argv else build_chain()
 
-print(final_chain.invoke({"topic": "Bangldesh 1971 history"}))
\ No newline at end of file
+    print(final_chain.invoke({"topic": "Bangldesh 1971 history"}))
@@ -1,13 +1,17 @@
+import sys
+
 from langchain_core.runnables import RunnableSequence, RunnableParallel, RunnablePassthrough
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.language_models import BaseChatModel
 
 from dotenv import load_dotenv
 
-load_dotenv()
+from BasicLLM.model_registry import get_gemini_llm
+from Cache.single_flight import SingleFlightChatModel
+from Runnable.streaming import print_stream
 
-model = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
+load_dotenv()
 
 prompt1 = PromptTemplate(
     template="Write a Joke about the following topic.\n {topic}. Pick One.",
@@ -21,16 +25,29 @@ prompt2 = PromptTemplate(
     input_variables=["joke"]
 )
 
-joke_gen_chain = RunnableSequence(prompt1, model, parser)
 
-parallel_chain = RunnableParallel({
-    "joke": RunnablePassthrough(),
-    "explaination": RunnableSequence(prompt2, model, parser)
-})
+def build_chain(model: BaseChatModel | None = None, coalesce: bool = False):
+    if model is None:
+        model = get_gemini_llm()
+    if coalesce:
+        model = SingleFlightChatModel(model=model)
+
+    joke_gen_chain = RunnableSequence(prompt1, model, parser)
+
+    parallel_chain = RunnableParallel({
+        "joke": RunnablePassthrough(),
+        "explaination": RunnableSequence(prompt2, model, parser)
+    })
+
+    return RunnableSequence(joke_gen_chain, parallel_chain)
 
-final_chain = RunnableSequence(joke_gen_chain, parallel_chain)
 
-result = final_chain.invoke({"topic": "programming"})
+if __name__ == "__main__":
+    final_chain = build_chain()
 
-print("Result ===> ",result)
+    if "--stream" in sys.argv:
+        print_stream(final_chain, {"topic": "programming"})
+    else:
+        result = final_chain.invoke({"topic": "programming"})
 
+        print("Result ===> ",result)
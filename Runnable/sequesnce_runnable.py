@@ -1,13 +1,16 @@
+import sys
+
 from langchain_core.runnables import RunnableSequence
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.language_models import BaseChatModel
 
 from dotenv import load_dotenv
 
-load_dotenv()
+from BasicLLM.model_registry import get_gemini_llm
+from Runnable.streaming import print_stream
 
-model = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
+load_dotenv()
 
 template1 = PromptTemplate(
     template="Write a joke about the following topic.\n {topic}. Select only one.",
@@ -21,6 +24,17 @@ template2 = PromptTemplate(
     input_variables=["joke"]
 )
 
-chain = RunnableSequence(template1, model, parser, template2, model, parser)
-result = chain.invoke({"topic": "programming"})
-print("Result ===> ",result)
\ No newline at end of file
+
+def build_chain(model: BaseChatModel | None = None):
+    if model is None:
+        model = get_gemini_llm()
+    return RunnableSequence(template1, model, parser, template2, model, parser)
+
+
+if __name__ == "__main__":
+    chain = build_chain()
+    if "--stream" in sys.argv:
+        print_stream(chain, {"topic": "programming"})
+    else:
+        result = chain.invoke({"topic": "programming"})
+        print("Result ===> ",result)
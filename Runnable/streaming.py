@@ -0,0 +1,178 @@
+"""Stage-by-stage streaming for multi-LLM ``RunnableSequence`` pipelines.
+
+A plain ``chain.stream()`` on ``prompt | model | parser | prompt | model | parser``
+still blocks on the second prompt, and langchain buffers the first stage by
+re-concatenating every chunk onto the growing string. ``StreamingPipeline``
+splits the sequence after each ``StrOutputParser``, collects intermediate text
+with a single ``"".join`` the moment its stage finishes, and yields the final
+stage's chunks as they arrive, recording time-to-first-token per stage.
+
+    pipeline = StreamingPipeline(chain)
+    for token in pipeline.stream({"topic": "programming"}):
+        print(token, end="", flush=True)
+    print(pipeline.report())
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import Runnable, RunnableSequence
+
+
+@dataclass
+class StageTiming:
+    name: str
+    first_chunk_s: float | None = None
+    total_s: float = 0.0
+
+
+@dataclass
+class StreamReport:
+    stages: list[StageTiming] = field(default_factory=list)
+    time_to_first_token_s: float | None = None
+    total_s: float = 0.0
+
+    def __str__(self) -> str:
+        lines = [f"time to first token: {_ms(self.time_to_first_token_s)}   total: {_ms(self.total_s)}"]
+        for i, stage in enumerate(self.stages, 1):
+            lines.append(f"  stage {i} {stage.name}: first chunk {_ms(stage.first_chunk_s)}, total {_ms(stage.total_s)}")
+        return "\n".join(lines)
+
+
+def _ms(seconds: float | None) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.1f} ms"
+
+
+def split_stages(chain: Runnable) -> list[Runnable]:
+    """Split a sequence into sub-sequences that each end with a ``StrOutputParser``."""
+    steps = chain.steps if isinstance(chain, RunnableSequence) else [chain]
+    stages, current = [], []
+    for step in steps:
+        current.append(step)
+        if isinstance(step, StrOutputParser):
+            stages.append(current)
+            current = []
+    if current:
+        stages.append(current)
+    return [RunnableSequence(*stage) if len(stage) > 1 else stage[0] for stage in stages]
+
+
+def text_of(chunk: Any) -> str:
+    """Printable text of a final-stage chunk; dict chunks come from ``RunnableParallel``."""
+    if isinstance(chunk, str):
+        return chunk
+    if isinstance(chunk, dict):
+        return "".join(text_of(value) for value in chunk.values())
+    return str(getattr(chunk, "content", chunk))
+
+
+def _stage_name(stage: Runnable) -> str:
+    steps = stage.steps if isinstance(stage, RunnableSequence) else [stage]
+    return " | ".join(step.get_name() for step in steps)
+
+
+class StreamingPipeline:
+    """Streams the last stage of ``chain`` and times every stage.
+
+    Args:
+        chain (Runnable): Usually a ``RunnableSequence`` of prompt/model/parser stages.
+    """
+
+    def __init__(self, chain: Runnable):
+        self.stages = split_stages(chain)
+        self._report = StreamReport()
+
+    def report(self) -> StreamReport:
+        """Timings of the most recent ``stream`` / ``astream`` run."""
+        return self._report
+
+    def _collect(self, stage: Runnable, value: Any, timing: StageTiming, started: float) -> Any:
+        pieces = []
+        for chunk in stage.stream(value):
+            if timing.first_chunk_s is None:
+                timing.first_chunk_s = time.perf_counter() - started
+            pieces.append(chunk)
+        return "".join(pieces) if pieces and isinstance(pieces[0], str) else _merge(pieces)
+
+    def stream(self, inputs: Any) -> Iterator[Any]:
+        report = self._report = StreamReport()
+        run_started = time.perf_counter()
+        value = inputs
+        for stage in self.stages[:-1]:
+            timing = StageTiming(_stage_name(stage))
+            started = time.perf_counter()
+            value = self._collect(stage, value, timing, started)
+            timing.total_s = time.perf_counter() - started
+            report.stages.append(timing)
+
+        last = self.stages[-1]
+        timing = StageTiming(_stage_name(last))
+        report.stages.append(timing)
+        started = time.perf_counter()
+        for chunk in last.stream(value):
+            now = time.perf_counter()
+            if timing.first_chunk_s is None:
+                timing.first_chunk_s = now - started
+                report.time_to_first_token_s = now - run_started
+            yield chunk
+        timing.total_s = time.perf_counter() - started
+        report.total_s = time.perf_counter() - run_started
+
+    async def astream(self, inputs: Any) -> AsyncIterator[Any]:
+        report = self._report = StreamReport()
+        run_started = time.perf_counter()
+        value = inputs
+        for stage in self.stages[:-1]:
+            timing = StageTiming(_stage_name(stage))
+            started = time.perf_counter()
+            pieces = []
+            async for chunk in stage.astream(value):
+                if timing.first_chunk_s is None:
+                    timing.first_chunk_s = time.perf_counter() - started
+                pieces.append(chunk)
+            value = "".join(pieces) if pieces and isinstance(pieces[0], str) else _merge(pieces)
+            timing.total_s = time.perf_counter() - started
+            report.stages.append(timing)
+
+        last = self.stages[-1]
+        timing = StageTiming(_stage_name(last))
+        report.stages.append(timing)
+        started = time.perf_counter()
+        async for chunk in last.astream(value):
+            now = time.perf_counter()
+            if timing.first_chunk_s is None:
+                timing.first_chunk_s = now - started
+                report.time_to_first_token_s = now - run_started
+            yield chunk
+        timing.total_s = time.perf_counter() - started
+        report.total_s = time.perf_counter() - run_started
+
+
+def _merge(pieces: list[Any]) -> Any:
+    # Non-text stages (e.g. a RunnableParallel mid-pipeline) stream addable chunks.
+    if not pieces:
+        return None
+    merged = pieces[0]
+    for piece in pieces[1:]:
+        merged = merged + piece
+    return merged
+
+
+def print_stream(chain: Runnable, inputs: Any) -> StreamReport:
+    """Print the final stage's tokens as they arrive, then the stage timings."""
+    pipeline = StreamingPipeline(chain)
+    current_key = None
+    for chunk in pipeline.stream(inputs):
+        if isinstance(chunk, dict):
+            for key, value in chunk.items():
+                if key != current_key:
+                    print(f"\n{key} ===> ", end="")
+                    current_key = key
+                print(text_of(value), end="", flush=True)
+        else:
+            print(text_of(chunk), end="", flush=True)
+    print()
+    report = pipeline.report()
+    print(report)
+    return report
@@ -0,0 +1,214 @@
+"""Word-count branch that decides on the token stream instead of the final text.
+
+``runnable_branch.py`` can only test ``len(x.split()) > 200`` once the whole
+report exists, and only then starts summarising. ``EarlyDecisionBranch``
+streams the report, counts words incrementally (one pass over each chunk, no
+re-split of the growing text) and knows the branch as soon as the threshold is
+crossed. By default ``on_exceed`` then runs once on the complete text, at the
+same cost as ``RunnableBranch``. With ``section_words`` it instead starts
+summarising finished sections in background workers while generation goes on,
+which is faster but costs one call per section plus ``combine``. Short reports
+fall through to ``default`` with the complete text.
+
+The source may yield strings or message chunks. Streaming the model directly
+(``prompt | model``, no ``StrOutputParser``) avoids the parser's per-chunk hop
+to a thread pool, which dominates under concurrent ``abatch`` load.
+"""
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+
+class WordCounter:
+    """Counts whitespace-separated words across chunk boundaries."""
+
+    def __init__(self):
+        self.words = 0
+        self._in_word = False
+
+    def feed(self, chunk: str) -> int:
+        """Add ``chunk`` and return the running word count."""
+        in_word = self._in_word
+        words = self.words
+        for char in chunk:
+            if char.isspace():
+                in_word = False
+            elif not in_word:
+                in_word = True
+                words += 1
+        self._in_word = in_word
+        self.words = words
+        return words
+
+    @property
+    def at_boundary(self) -> bool:
+        return not self._in_word
+
+
+@dataclass
+class BranchDecision:
+    branch: str = "default"
+    decided_at_words: int | None = None
+    sections: list[int] = field(default_factory=list)
+
+
+class _Sectioner:
+    """Accumulates chunks, makes the branch decision and cuts sections at word boundaries."""
+
+    def __init__(self, threshold_words: int, section_words: int):
+        self.threshold_words = threshold_words
+        self.section_words = section_words
+        self.decision = BranchDecision()
+        self.counter = WordCounter()
+        self.pieces: list[str] = []
+        self.section_start = 0
+
+    @property
+    def decided(self) -> bool:
+        return self.decision.decided_at_words is not None
+
+    def _cut(self) -> str:
+        section, self.pieces = "".join(self.pieces), []
+        self.decision.sections.append(self.counter.words - self.section_start)
+        self.section_start = self.counter.words
+        return section
+
+    def push(self, chunk: str) -> str | None:
+        """Add ``chunk``; return a finished section once one is ready."""
+        section = None
+        # Chunks usually start with the space before a word, so a boundary can sit
+        # either at the end of the buffer or at the start of the new chunk.
+        if (
+            self.decided
+            and self.counter.words - self.section_start >= self.section_words
+            and (self.counter.at_boundary or chunk[:1].isspace())
+        ):
+            section = self._cut()
+        self.pieces.append(chunk)
+        words = self.counter.feed(chunk)
+        if not self.decided and words > self.threshold_words:
+            self.decision.branch = "on_exceed"
+            self.decision.decided_at_words = words
+        return section
+
+    def tail(self) -> str | None:
+        if not "".join(self.pieces).strip():
+            return None
+        return self._cut()
+
+
+class EarlyDecisionBranch:
+    """Stream ``source`` and branch on word count as soon as it is known.
+
+    Args:
+        source (Runnable): Chain producing text chunks, e.g. ``prompt | model | StrOutputParser()``.
+        threshold_words (int): Word count above which ``on_exceed`` is used.
+        on_exceed (Runnable): Applied to the text (or each finished section) once the
+            threshold is crossed, e.g. a summarizer.
+        default (Runnable): Applied to the full text when the threshold is never crossed.
+        section_words (int | None): Hand ``on_exceed`` sections of this many words while
+            the source is still streaming. ``None`` (the default) makes one call on the
+            full text instead.
+        combine (Runnable | None): Merges the section outputs (joined by blank lines).
+            ``None`` returns the joined outputs directly.
+        max_workers (int): Sections processed concurrently. Defaults to 4.
+    """
+
+    def __init__(
+        self,
+        source: Runnable,
+        threshold_words: int,
+        on_exceed: Runnable,
+        default: Runnable,
+        section_words: int | None = None,
+        combine: Runnable | None = None,
+        max_workers: int = 4,
+    ):
+        self.source = source
+        self.threshold_words = threshold_words
+        self.on_exceed = on_exceed
+        self.default = default
+        self.section_words = section_words
+        self.combine = combine
+        self.max_workers = max_workers
+
+    def _sectioner(self) -> _Sectioner:
+        # Without sections the cut never happens before the tail, so there is one call.
+        return _Sectioner(self.threshold_words, self.section_words or float("inf"))
+
+    def _joined(self, outputs: list[Any]) -> Any | None:
+        """Final answer when no combine call is needed, else ``None``."""
+        if len(outputs) == 1:
+            return outputs[0]
+        if self.combine is None:
+            return "\n\n".join(str(output) for output in outputs)
+        return None
+
+    def invoke(self, inputs: Any, config: RunnableConfig | None = None) -> Any:
+        return self.invoke_with_decision(inputs, config)[0]
+
+    async def ainvoke(self, inputs: Any, config: RunnableConfig | None = None) -> Any:
+        return (await self.ainvoke_with_decision(inputs, config))[0]
+
+    def invoke_with_decision(self, inputs: Any, config: RunnableConfig | None = None) -> tuple[Any, BranchDecision]:
+        """The result together with the branch taken, where and into which sections."""
+        sectioner = self._sectioner()
+        futures: list[Future] = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for chunk in self.source.stream(inputs, config):
+                section = sectioner.push(_text(chunk))
+                if section is not None:
+                    futures.append(pool.submit(self.on_exceed.invoke, section, config))
+            if not sectioner.decided:
+                return self.default.invoke("".join(sectioner.pieces), config), sectioner.decision
+            tail = sectioner.tail()
+            if tail is not None:
+                futures.append(pool.submit(self.on_exceed.invoke, tail, config))
+            outputs = [future.result() for future in futures]
+        joined = self._joined(outputs)
+        if joined is None:
+            joined = self.combine.invoke("\n\n".join(str(output) for output in outputs), config)
+        return joined, sectioner.decision
+
+    async def ainvoke_with_decision(
+        self, inputs: Any, config: RunnableConfig | None = None
+    ) -> tuple[Any, BranchDecision]:
+        sectioner = self._sectioner()
+        tasks: list[asyncio.Task] = []
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def run_section(section: str) -> Any:
+            async with semaphore:
+                return await self.on_exceed.ainvoke(section, config)
+
+        try:
+            async for chunk in self.source.astream(inputs, config):
+                section = sectioner.push(_text(chunk))
+                if section is not None:
+                    tasks.append(asyncio.create_task(run_section(section)))
+            if not sectioner.decided:
+                return await self.default.ainvoke("".join(sectioner.pieces), config), sectioner.decision
+            tail = sectioner.tail()
+            if tail is not None:
+                tasks.append(asyncio.create_task(run_section(tail)))
+            outputs = await asyncio.gather(*tasks)
+        except BaseException:
+            # The source (or a section) failed or we were cancelled: stop the other sections.
+            for task in tasks:
+                task.cancel()
+            raise
+        joined = self._joined(outputs)
+        if joined is None:
+            joined = await self.combine.ainvoke("\n\n".join(str(output) for output in outputs), config)
+        return joined, sectioner.decision
+
+    def as_runnable(self) -> Runnable:
+        return RunnableLambda(self.invoke, afunc=self.ainvoke, name="EarlyDecisionBranch")
+
+
+def _text(chunk: str | BaseMessage) -> str:
+    return chunk if isinstance(chunk, str) else chunk.text
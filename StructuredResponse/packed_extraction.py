@@ -0,0 +1,185 @@
+"""Packed structured extraction: many inputs per ``with_structured_output`` call.
+
+One review per call pays the request overhead and the instruction / schema
+prompt for every review. ``PackedExtractor`` groups reviews into packs under a
+token budget, asks for a generated ``<Schema>Batch`` (a list of the schema
+with an ``index`` field), and splits the answer back into one ``Schema`` per
+input, in input order. Items are validated one by one; only an item that is
+missing or invalid is re-extracted on its own.
+
+    extractor = PackedExtractor(get_groq_llm(), Schema, token_budget=3000)
+    results = extractor.batch(reviews)
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel, Field, ValidationError, create_model
+
+from BasicLLM.scheduler import estimate_tokens
+from OutputParser.streaming_json_parser import repair_json
+
+INSTRUCTIONS = (
+    "Extract the requested fields from each numbered input below. Return exactly one item per input, "
+    "in the same order, and set `index` to the input's number. Treat every input independently.\n\n"
+)
+
+
+@lru_cache(maxsize=None)
+def packed_schema(schema: type[BaseModel]) -> type[BaseModel]:
+    """``<Schema>Batch`` with ``items: list[<Schema>Item]``; each item is the schema plus ``index``."""
+    item = create_model(
+        f"{schema.__name__}Item",
+        __base__=schema,
+        index=(int, Field(description="The number of the input this item was extracted from.")),
+    )
+    return create_model(
+        f"{schema.__name__}Batch",
+        items=(list[item], Field(description="One extracted item per input, in input order.")),
+    )
+
+
+@dataclass
+class PackStats:
+    items: int = 0
+    packs: int = 0
+    retried: int = 0
+    failed: int = 0
+
+    @property
+    def calls(self) -> int:
+        return self.packs + self.retried
+
+
+class PackedExtractor:
+    """Extract ``schema`` from many texts with few model calls.
+
+    Args:
+        model (BaseChatModel): A chat model that supports ``with_structured_output``.
+        schema (type[BaseModel]): Per-input result schema.
+        token_budget (int): Max estimated tokens of input text per pack. Defaults to 3000.
+        max_items (int): Max inputs per pack. Defaults to 25.
+        concurrency (int): Packs in flight at once. Defaults to 4.
+        **structured_kwargs: Passed to ``with_structured_output``, e.g. ``strict=True``.
+    """
+
+    def __init__(
+        self,
+        model: BaseChatModel,
+        schema: type[BaseModel],
+        token_budget: int = 3000,
+        max_items: int = 25,
+        concurrency: int = 4,
+        **structured_kwargs: Any,
+    ):
+        self.schema = schema
+        self.token_budget = token_budget
+        self.max_items = max_items
+        self.concurrency = concurrency
+        self.stats = PackStats()
+        self._batch_schema = packed_schema(schema)
+        # include_raw keeps the raw tool call, so one bad item does not discard the whole pack.
+        self._packed = model.with_structured_output(self._batch_schema, include_raw=True, **structured_kwargs)
+        self._single = model.with_structured_output(schema, **structured_kwargs)
+
+    def pack(self, texts: Sequence[str]) -> list[list[int]]:
+        """Indices of ``texts`` grouped greedily under ``token_budget`` and ``max_items``."""
+        packs, current, used = [], [], 0
+        for i, text in enumerate(texts):
+            tokens = estimate_tokens(text) + 4
+            if current and (used + tokens > self.token_budget or len(current) >= self.max_items):
+                packs.append(current)
+                current, used = [], 0
+            current.append(i)
+            used += tokens
+        if current:
+            packs.append(current)
+        return packs
+
+    @staticmethod
+    def prompt(texts: Sequence[str]) -> str:
+        # Instructions first and unchanged across packs, so the prompt prefix is cacheable.
+        return INSTRUCTIONS + "\n\n".join(f"[{n}] {text}" for n, text in enumerate(texts))
+
+    def _raw_items(self, output: dict) -> list[Any]:
+        if output.get("parsed") is not None:
+            return list(output["parsed"].items)
+        raw: AIMessage = output["raw"]
+        if raw.tool_calls:
+            payload = raw.tool_calls[0]["args"]
+        else:
+            try:
+                payload = repair_json(raw.text)
+            except ValueError:
+                return []
+        items = payload.get("items", []) if isinstance(payload, dict) else payload
+        return items if isinstance(items, list) else []
+
+    def _demux(self, size: int, output: dict | Exception) -> list[BaseModel | None]:
+        """Per-position results of one pack; ``None`` where the item is missing or invalid."""
+        results: list[BaseModel | None] = [None] * size
+        if isinstance(output, Exception):
+            return results
+        fields = self.schema.model_fields.keys()
+        for item in self._raw_items(output):
+            data = item.model_dump() if isinstance(item, BaseModel) else item
+            if not isinstance(data, dict):
+                continue
+            index = data.get("index")
+            if not isinstance(index, int) or not 0 <= index < size or results[index] is not None:
+                continue
+            try:
+                results[index] = self.schema.model_validate({k: v for k, v in data.items() if k in fields})
+            except ValidationError:
+                pass
+        return results
+
+    def _plan(self, texts: Sequence[str]) -> tuple[list[list[int]], list[str]]:
+        packs = self.pack(texts)
+        self.stats.items += len(texts)
+        self.stats.packs += len(packs)
+        return packs, [self.prompt([texts[i] for i in pack]) for pack in packs]
+
+    def _collect(
+        self, texts: Sequence[str], packs: list[list[int]], outputs: list[dict | Exception]
+    ) -> tuple[list[BaseModel | None], list[int]]:
+        results: list[BaseModel | None] = [None] * len(texts)
+        for pack, output in zip(packs, outputs):
+            for i, result in zip(pack, self._demux(len(pack), output)):
+                results[i] = result
+        missing = [i for i, result in enumerate(results) if result is None]
+        self.stats.retried += len(missing)
+        return results, missing
+
+    def _finish(self, results: list, missing: list[int], retries: list, return_exceptions: bool) -> list:
+        for i, retry in zip(missing, retries):
+            if isinstance(retry, Exception):
+                self.stats.failed += 1
+                if not return_exceptions:
+                    raise retry
+            results[i] = retry
+        return results
+
+    def batch(self, texts: Sequence[str], return_exceptions: bool = False) -> list[BaseModel | Exception]:
+        """One result per text, in order."""
+        config = {"max_concurrency": self.concurrency}
+        packs, prompts = self._plan(texts)
+        outputs = self._packed.batch(prompts, config, return_exceptions=True)
+        results, missing = self._collect(texts, packs, outputs)
+        retries = self._single.batch([texts[i] for i in missing], config, return_exceptions=True) if missing else []
+        return self._finish(results, missing, retries, return_exceptions)
+
+    async def abatch(self, texts: Sequence[str], return_exceptions: bool = False) -> list[BaseModel | Exception]:
+        config = {"max_concurrency": self.concurrency}
+        packs, prompts = self._plan(texts)
+        outputs = await self._packed.abatch(prompts, config, return_exceptions=True)
+        results, missing = self._collect(texts, packs, outputs)
+        retries = (
+            await self._single.abatch([texts[i] for i in missing], config, return_exceptions=True) if missing else []
+        )
+        return self._finish(results, missing, retries, return_exceptions)
+
+    def invoke(self, text: str, config: dict | None = None) -> BaseModel:
+        return self.batch([text])[0]
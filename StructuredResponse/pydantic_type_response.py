@@ -1,8 +1,12 @@
-from langchain_groq import ChatGroq
+import sys
+
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 from typing import TypedDict, Annotated, Literal, Optional
 
+from BasicLLM.model_registry import get_groq_llm
+from StructuredResponse.packed_extraction import PackedExtractor
+
 load_dotenv()
 
 class Schema(BaseModel):
@@ -14,17 +18,6 @@ class Schema(BaseModel):
     name: Optional[str] = Field(default=None, description="Write down the name of the product or service mentioned in the text.")
 
 
-def get_groq_llm(model: str = "llama-3.1-8b-instant") -> ChatGroq:
-    """Initialize and return a Groq LLM instance.
-
-    Args:
-        model (str): The Groq model to use. Defaults to "llama-3.1-8b-instant".
-    Returns:
-        ChatGroq: An instance of the Groq LLM.
-    """
-    llm = ChatGroq(model=model)
-    return llm
-
 if __name__ == "__main__":
     groq_llm = get_groq_llm()
 
@@ -32,6 +25,14 @@ if __name__ == "__main__":
         "Recently, I purchased the Acme SuperWidget 3000, and I must say, it has exceeded my expectations in many ways. If you're looking for a reliable and efficient widget, this is the one to get. Lets start with the pros: the build quality is exceptional, and it performs tasks quickly and accurately. The user interface is intuitive, making it easy for anyone to use. Additionally, the customer support from Acme has been top-notch, responding promptly to my inquiries."
     )
 
-    structured_model = groq_llm.with_structured_output(Schema, strict=True)
-    response = structured_model.invoke(text)
-    print(response)
\ No newline at end of file
+    if "--packed" in sys.argv:
+        # Many reviews share one call; only items that fail validation are re-sent alone.
+        reviews = [text, "The battery died after two days and support never answered. Avoid.", "It works. Nothing special."]
+        extractor = PackedExtractor(groq_llm, Schema, token_budget=3000, strict=True)
+        for response in extractor.batch(reviews):
+            print(response)
+        print(extractor.stats)
+    else:
+        structured_model = groq_llm.with_structured_output(Schema, strict=True)
+        response = structured_model.invoke(text)
+        print(response)
\ No newline at end of file
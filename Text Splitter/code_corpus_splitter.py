@@ -0,0 +1,271 @@
+"""Split a whole source tree with ``RecursiveCharacterTextSplitter.from_language``.
+
+``doc_struct.py`` splits one in-memory snippet. ``CorpusSplitter`` walks a
+directory, picks the ``Language`` from each file extension, shards the files
+across a process pool and streams ``Document`` chunks tagged with the source
+path and line range. A manifest of file sizes, mtimes and content hashes is
+kept next to the corpus, so a re-run only re-splits files that actually changed
+and reports files that were deleted. ``--output`` keeps a JSONL of the whole
+corpus current: chunks of re-split and deleted files are replaced, the rest are
+carried over from the previous run.
+
+    python "Text Splitter/code_corpus_splitter.py" ~/src/monorepo --output chunks.jsonl
+"""
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Iterator
+
+from langchain_core.documents import Document
+from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
+
+EXTENSIONS = {
+    ".py": Language.PYTHON, ".pyi": Language.PYTHON,
+    ".js": Language.JS, ".jsx": Language.JS, ".mjs": Language.JS, ".cjs": Language.JS,
+    ".ts": Language.TS, ".tsx": Language.TS,
+    ".go": Language.GO, ".rs": Language.RUST, ".java": Language.JAVA, ".kt": Language.KOTLIN,
+    ".c": Language.C, ".h": Language.C,
+    ".cc": Language.CPP, ".cpp": Language.CPP, ".cxx": Language.CPP, ".hpp": Language.CPP,
+    ".cs": Language.CSHARP, ".rb": Language.RUBY, ".php": Language.PHP, ".scala": Language.SCALA,
+    ".swift": Language.SWIFT, ".lua": Language.LUA, ".pl": Language.PERL, ".hs": Language.HASKELL,
+    ".ex": Language.ELIXIR, ".exs": Language.ELIXIR, ".ps1": Language.POWERSHELL,
+    ".proto": Language.PROTO, ".sol": Language.SOL, ".r": Language.R,
+    ".md": Language.MARKDOWN, ".rst": Language.RST, ".tex": Language.LATEX,
+    ".html": Language.HTML, ".htm": Language.HTML,
+}
+
+SKIP_DIRS = {".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv", ".tox", "build", "dist"}
+
+
+@dataclass
+class SplitStats:
+    files_seen: int = 0
+    files_split: int = 0
+    files_unchanged: int = 0
+    files_deleted: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+
+@lru_cache(maxsize=None)
+def _splitter(language: str, chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    # One splitter (and its compiled separators) per language per worker process.
+    return RecursiveCharacterTextSplitter.from_language(
+        language=Language(language), chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    )
+
+
+def _line_chunks(text: str, splitter: RecursiveCharacterTextSplitter) -> list[tuple[str, int, int]]:
+    """Split ``text`` and locate each chunk as a 1-based ``(content, start_line, end_line)``."""
+    newlines = [i for i, char in enumerate(text) if char == "\n"]
+    chunks, cursor = [], 0
+    for chunk in splitter.split_text(text):
+        start = text.find(chunk, cursor)
+        if start < 0:
+            start = cursor
+        cursor = start + 1
+        first = bisect.bisect_right(newlines, start) + 1
+        last = bisect.bisect_right(newlines, start + max(len(chunk) - 1, 0)) + 1
+        chunks.append((chunk, first, last))
+    return chunks
+
+
+def _split_files(
+    tasks: list[tuple[str, str, str, str | None]], chunk_size: int, chunk_overlap: int
+) -> list[tuple[str, str, list[tuple[str, int, int]] | None]]:
+    """Worker: hash and split ``(path, relpath, language, old_hash)`` tasks.
+
+    Returns ``(relpath, hash, chunks)`` per file; ``chunks`` is None when the
+    content hash matches ``old_hash`` (only the mtime changed).
+    """
+    results = []
+    for path, relpath, language, old_hash in tasks:
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest == old_hash:
+            results.append((relpath, digest, None))
+            continue
+        text = data.decode("utf-8", errors="replace")
+        results.append((relpath, digest, _line_chunks(text, _splitter(language, chunk_size, chunk_overlap))))
+    return results
+
+
+class CorpusSplitter:
+    """Incremental, parallel splitter over a source tree.
+
+    Args:
+        root (str): Directory to walk.
+        manifest_path (str | None): JSON manifest of already split files.
+            Defaults to ``<root>/.split_manifest.json``.
+        chunk_size (int): Passed to ``RecursiveCharacterTextSplitter``. Defaults to 1000.
+        chunk_overlap (int): Passed to ``RecursiveCharacterTextSplitter``. Defaults to 0.
+        workers (int | None): Worker processes. Defaults to ``os.cpu_count()``.
+        files_per_task (int): Files sent to a worker at once. Defaults to 64.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        manifest_path: str | None = None,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 0,
+        workers: int | None = None,
+        files_per_task: int = 64,
+    ):
+        self.root = os.path.abspath(root)
+        self.manifest_path = manifest_path or os.path.join(self.root, ".split_manifest.json")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.workers = workers or os.cpu_count() or 1
+        self.files_per_task = files_per_task
+        self.manifest = self._load_manifest()
+        self.deleted: list[str] = []
+        self.resplit: list[str] = []
+        self.stats = SplitStats()
+
+    def _load_manifest(self) -> dict[str, dict]:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path) as f:
+            data = json.load(f)
+        # A different chunking makes every stored split stale.
+        if data.get("settings") != [self.chunk_size, self.chunk_overlap]:
+            return {}
+        return data["files"]
+
+    def save_manifest(self) -> None:
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"settings": [self.chunk_size, self.chunk_overlap], "files": self.manifest}, f)
+        os.replace(tmp, self.manifest_path)
+
+    def walk(self) -> Iterator[tuple[str, os.stat_result]]:
+        """Yield ``(path, stat)`` for every file with a known extension."""
+        stack = [self.root]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            stack.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in EXTENSIONS and entry.is_file():
+                        yield entry.path, entry.stat()
+
+    def _changed(self) -> list[tuple[str, str, str, str | None]]:
+        tasks, seen = [], set()
+        for path, stat in self.walk():
+            relpath = os.path.relpath(path, self.root)
+            seen.add(relpath)
+            self.stats.files_seen += 1
+            entry = self.manifest.get(relpath)
+            if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                self.stats.files_unchanged += 1
+                continue
+            language = EXTENSIONS[os.path.splitext(path)[1].lower()].value
+            tasks.append((path, relpath, language, entry["sha256"] if entry else None))
+            self.manifest[relpath] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": None}
+        self.deleted = sorted(set(self.manifest) - seen)
+        for relpath in self.deleted:
+            del self.manifest[relpath]
+        self.stats.files_deleted = len(self.deleted)
+        return tasks
+
+    def _results(self, tasks):
+        shards = [tasks[i:i + self.files_per_task] for i in range(0, len(tasks), self.files_per_task)]
+        if len(shards) <= 1 or self.workers == 1:
+            # A small change set is faster than starting a process pool.
+            for shard in shards:
+                yield from _split_files(shard, self.chunk_size, self.chunk_overlap)
+            return
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(shards))) as pool:
+            futures = [pool.submit(_split_files, shard, self.chunk_size, self.chunk_overlap) for shard in shards]
+            for future in as_completed(futures):
+                yield from future.result()
+
+    def split(self, save: bool = True) -> Iterator[Document]:
+        """Yield chunks of new and changed files.
+
+        Args:
+            save (bool): Save the manifest once the stream is exhausted. Pass False to
+                call ``save_manifest`` only after the chunks are stored. Defaults to True.
+        """
+        started = time.perf_counter()
+        self.stats = SplitStats()
+        self.resplit = []
+        tasks = self._changed()
+        language_of = {relpath: language for _, relpath, language, _ in tasks}
+        for relpath, digest, chunks in self._results(tasks):
+            self.manifest[relpath]["sha256"] = digest
+            if chunks is None:
+                self.stats.files_unchanged += 1
+                continue
+            self.stats.files_split += 1
+            self.resplit.append(relpath)
+            self.stats.chunks += len(chunks)
+            for index, (content, start_line, end_line) in enumerate(chunks):
+                yield Document(
+                    page_content=content,
+                    metadata={
+                        "source": relpath,
+                        "language": language_of[relpath],
+                        "chunk": index,
+                        "start_line": start_line,
+                        "end_line": end_line,
+                    },
+                )
+        if save:
+            self.save_manifest()
+        self.stats.seconds = time.perf_counter() - started
+
+
+def write_output(splitter: CorpusSplitter, path: str) -> None:
+    """Split and bring the chunk file at ``path`` up to date.
+
+    New chunks are written first, then every earlier row whose file was neither
+    re-split nor deleted. The file is replaced atomically and the manifest is
+    saved only after that, so an interrupted run re-splits instead of losing chunks.
+    """
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as out:
+        for doc in splitter.split(save=False):
+            out.write(json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}) + "\n")
+        stale = set(splitter.resplit) | set(splitter.deleted)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as previous:
+                for line in previous:
+                    if line.strip() and json.loads(line)["metadata"]["source"] not in stale:
+                        out.write(line)
+    os.replace(tmp, path)
+    splitter.save_manifest()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("root")
+    arg_parser.add_argument("--output", help="JSONL file of chunks, brought up to date in place.")
+    arg_parser.add_argument("--manifest")
+    arg_parser.add_argument("--chunk-size", type=int, default=1000)
+    arg_parser.add_argument("--chunk-overlap", type=int, default=0)
+    arg_parser.add_argument("--workers", type=int)
+    args = arg_parser.parse_args()
+
+    splitter = CorpusSplitter(args.root, args.manifest, args.chunk_size, args.chunk_overlap, args.workers)
+    if args.output:
+        write_output(splitter, args.output)
+    else:
+        for _ in splitter.split():
+            pass
+    for relpath in splitter.deleted:
+        print("deleted:", relpath)
+    print("Stats ===> ", asdict(splitter.stats))
+
+
+if __name__ == "__main__":
+    main()
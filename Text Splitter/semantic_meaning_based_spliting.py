@@ -0,0 +1,216 @@
+"""Semantic splitter: cut text where the meaning shifts, not at a character count.
+
+Text is segmented into sentences and every sentence is embedded once, in large
+batches. Each sentence is then smoothed with its neighbours (a moving average of
+the vectors, so the context windows cost no extra embed calls), the cosine
+distance between adjacent windows is computed as one NumPy operation, and a
+breakpoint is placed wherever the distance is above a percentile / standard
+deviation / interquartile threshold.
+
+``split_stream`` works on an iterable of text pieces (e.g. lines of a file) and
+yields chunks as it goes, keeping at most one block of sentences in memory.
+
+    PYTHONPATH=. python "Text Splitter/semantic_meaning_based_spliting.py" --offline
+"""
+import argparse
+import re
+from collections import deque
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import TextSplitter
+
+from VectorSearch.hashing_embeddings import HashingEmbeddings
+
+# Sentence end followed by whitespace, or a blank line between paragraphs.
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+BREAKPOINT_DEFAULTS = {"percentile": 95.0, "standard_deviation": 3.0, "interquartile": 1.5}
+
+
+def iter_sentences(pieces: Iterable[str], max_chars: int = 2000) -> Iterator[str]:
+    """Yield sentences from a stream of text pieces, carrying partial sentences across pieces.
+
+    Only the new piece and the end of the carried text are scanned for a sentence
+    end, and a sentence longer than ``max_chars`` is cut at its last space before
+    the limit, so text without punctuation still streams in bounded memory.
+    """
+    rest = ""
+    for piece in pieces:
+        # A terminator can only start at the carried text's last character or in its trailing whitespace.
+        tail = len(rest) - len(rest.rstrip()) + 1
+        head, rest = rest[:-tail], rest[-tail:]
+        parts = SENTENCE_END.split(rest + piece)
+        parts[0] = head + parts[0]
+        rest = parts.pop()
+        for part in parts:
+            if part.strip():
+                yield part.strip()
+        while len(rest) > max_chars:
+            cut = rest.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if rest[:cut].strip():
+                yield rest[:cut].strip()
+            rest = rest[cut:]
+    if rest.strip():
+        yield rest.strip()
+
+
+def window_distances(vectors: np.ndarray, radius: int) -> np.ndarray:
+    """Cosine distance between each sentence window and the next one.
+
+    Window ``i`` is the mean of vectors ``i - radius .. i + radius`` (clipped at
+    the ends), computed for all ``i`` at once from a cumulative sum.
+    """
+    count = len(vectors)
+    if count < 2:
+        return np.zeros(0, dtype=np.float32)
+    unit = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    if radius:
+        cumulative = np.vstack([np.zeros((1, unit.shape[1]), dtype=unit.dtype), np.cumsum(unit, axis=0)])
+        index = np.arange(count)
+        lo = np.clip(index - radius, 0, count)
+        hi = np.clip(index + radius + 1, 0, count)
+        unit = (cumulative[hi] - cumulative[lo]) / (hi - lo)[:, None]
+        unit /= np.maximum(np.linalg.norm(unit, axis=1, keepdims=True), 1e-12)
+    return 1.0 - np.einsum("ij,ij->i", unit[:-1], unit[1:])
+
+
+def breakpoint_threshold(distances: np.ndarray, kind: str, amount: float) -> float:
+    if kind == "percentile":
+        return float(np.percentile(distances, amount))
+    if kind == "standard_deviation":
+        return float(distances.mean() + amount * distances.std())
+    if kind == "interquartile":
+        q1, q3 = np.percentile(distances, [25, 75])
+        return float(distances.mean() + amount * (q3 - q1))
+    raise ValueError(f"Unknown breakpoint type: {kind!r}")
+
+
+class SemanticSplitter(TextSplitter):
+    """Split text at semantic breakpoints between sentences.
+
+    Args:
+        embeddings (Embeddings): Any LangChain embedder, e.g. Gemini or ``HashingEmbeddings``.
+        buffer_size (int): Neighbouring sentences averaged into each window. Defaults to 1.
+        breakpoint_type (str): "percentile", "standard_deviation" or "interquartile".
+            Defaults to "percentile".
+        breakpoint_amount (float | None): Threshold parameter; defaults per type (95, 3, 1.5).
+        batch_size (int): Sentences per ``embed_documents`` call. Defaults to 256.
+        block_sentences (int): Sentences embedded and scored per streaming step. Defaults to 2048.
+        max_chunk_sentences (int): Force a cut when a chunk grows this long. Defaults to 200.
+        max_sentence_chars (int): Cut a sentence without a terminator at this length. Defaults to 2000.
+        history (int): Recent distances kept so thresholds stay stable across blocks. Defaults to 8192.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        buffer_size: int = 1,
+        breakpoint_type: str = "percentile",
+        breakpoint_amount: float | None = None,
+        batch_size: int = 256,
+        block_sentences: int = 2048,
+        max_chunk_sentences: int = 200,
+        max_sentence_chars: int = 2000,
+        history: int = 8192,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        if breakpoint_type not in BREAKPOINT_DEFAULTS:
+            raise ValueError(f"Unknown breakpoint type: {breakpoint_type!r}")
+        self.embeddings = embeddings
+        self.buffer_size = buffer_size
+        self.breakpoint_type = breakpoint_type
+        self.breakpoint_amount = breakpoint_amount if breakpoint_amount is not None else BREAKPOINT_DEFAULTS[breakpoint_type]
+        self.batch_size = batch_size
+        self.block_sentences = max(block_sentences, 4 * buffer_size + 2)
+        self.max_chunk_sentences = max_chunk_sentences
+        self.max_sentence_chars = max_sentence_chars
+        self.history = history
+
+    def _embed(self, sentences: list[str]) -> np.ndarray:
+        vectors = []
+        for start in range(0, len(sentences), self.batch_size):
+            vectors.extend(self.embeddings.embed_documents(sentences[start:start + self.batch_size]))
+        return np.asarray(vectors, dtype=np.float32)
+
+    def split_stream(self, pieces: Iterable[str]) -> Iterator[str]:
+        """Yield chunks from a stream of text pieces with bounded memory."""
+        sentences: list[str] = []
+        vectors = np.zeros((0, 0), dtype=np.float32)
+        start = 0  # first sentence of the open chunk; earlier ones are kept only as context
+        recent: deque[float] = deque(maxlen=self.history)
+        source = iter_sentences(pieces, self.max_sentence_chars)
+
+        while True:
+            block = [s for _, s in zip(range(self.block_sentences), source)]
+            final = len(block) < self.block_sentences
+            if block:
+                embedded = self._embed(block)
+                vectors = embedded if not len(vectors) else np.vstack([vectors, embedded])
+                sentences.extend(block)
+
+            distances = window_distances(vectors, self.buffer_size)
+            # Pair j (between sentences j and j+1) is only final once its right window is complete.
+            end = len(distances) if final else max(start, len(distances) - self.buffer_size)
+            decided = distances[start:end]
+            if len(decided):
+                recent.extend(decided.tolist())
+                threshold = breakpoint_threshold(np.fromiter(recent, dtype=np.float64), self.breakpoint_type, self.breakpoint_amount)
+                cuts = (np.flatnonzero(decided > threshold) + start + 1).tolist()
+                for cut in cuts + ([len(sentences)] if final else []):
+                    while cut - start > self.max_chunk_sentences:
+                        yield self._join(sentences[start:start + self.max_chunk_sentences])
+                        start += self.max_chunk_sentences
+                    if cut > start:
+                        yield self._join(sentences[start:cut])
+                        start = cut
+                # No breakpoint for a long stretch: the open chunk must not grow past the limit either.
+                while end - start >= self.max_chunk_sentences:
+                    yield self._join(sentences[start:start + self.max_chunk_sentences])
+                    start += self.max_chunk_sentences
+            elif final and start < len(sentences):
+                yield self._join(sentences[start:])
+                start = len(sentences)
+            if final:
+                return
+
+            # Drop emitted sentences, keeping ``buffer_size`` of them as left context for the windows.
+            keep_from = max(0, start - self.buffer_size)
+            sentences = sentences[keep_from:]
+            vectors = vectors[keep_from:]
+            start -= keep_from
+
+    def _join(self, sentences: list[str]) -> str:
+        return " ".join(sentences)
+
+    def split_text(self, text: str) -> list[str]:
+        return list(self.split_stream([text]))
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("path", nargs="?", default="Document_loader/ai_poem.txt")
+    arg_parser.add_argument("--offline", action="store_true", help="Use HashingEmbeddings instead of Gemini.")
+    arg_parser.add_argument("--breakpoint", default="percentile", choices=sorted(BREAKPOINT_DEFAULTS))
+    args = arg_parser.parse_args()
+
+    if args.offline:
+        embeddings = HashingEmbeddings()
+    else:
+        from dotenv import load_dotenv
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+        load_dotenv()
+        embeddings = GoogleGenerativeAIEmbeddings(model="gemini-embedding-001")
+
+    splitter = SemanticSplitter(embeddings, breakpoint_type=args.breakpoint, breakpoint_amount=80 if args.breakpoint == "percentile" else None)
+    with open(args.path, encoding="utf-8") as f:
+        for i, chunk in enumerate(splitter.split_stream(f)):
+            print(f"Chunk {i} ===> ", chunk)
+
+
+if __name__ == "__main__":
+    main()
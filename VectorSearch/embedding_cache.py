@@ -0,0 +1,189 @@
+"""Persistent, memory-mapped cache in front of any LangChain ``Embeddings``.
+
+Vectors live in a float32 ``np.memmap`` file (one row per text) and a small
+SQLite table maps a hash of ``(kind, text)`` to its row. Cache misses of a call
+are de-duplicated and sent to the wrapped embedder in one batch, so repeated
+queries and re-ingestion cost a page-in instead of an API call. When the cache
+is full the least recently used rows are overwritten.
+
+    embeddings = MmapEmbeddingCache(GoogleGenerativeAIEmbeddings(model="gemini-embedding-001"), "./embedding_cache")
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+@dataclass
+class EmbeddingCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    upstream_calls: int = 0
+
+
+class MmapEmbeddingCache(Embeddings):
+    """Caching ``Embeddings`` wrapper backed by a memory-mapped float32 array.
+
+    Args:
+        embeddings (Embeddings): The embedder to call on cache misses.
+        directory (str): Where ``vectors.f32`` and ``index.sqlite3`` are kept.
+        max_rows (int): Maximum cached vectors before LRU eviction. Defaults to 100000.
+        namespace (str): Mixed into every key; use the model name so caches of different
+            models never mix. Defaults to the wrapped class name.
+        batch_size (int): Max texts per upstream ``embed_documents`` call. Defaults to 100.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        directory: str,
+        max_rows: int = 100_000,
+        namespace: str | None = None,
+        batch_size: int = 100,
+    ):
+        self.embeddings = embeddings
+        self.directory = directory
+        self.max_rows = max_rows
+        self.namespace = namespace or getattr(embeddings, "model", None) or type(embeddings).__name__
+        self.batch_size = batch_size
+        self.stats = EmbeddingCacheStats()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rows (key TEXT PRIMARY KEY, row INTEGER NOT NULL UNIQUE, used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS rows_used ON rows(used)")
+        meta = dict(self._conn.execute("SELECT name, value FROM meta"))
+        self.dim: int | None = meta.get("dim")
+        self._capacity = meta.get("capacity", 0)
+        self._vectors: np.memmap | None = None
+        if self.dim:
+            self._open(self._capacity)
+
+    def _open(self, capacity: int) -> None:
+        if self._vectors is not None:
+            self._vectors.flush()
+        # Growing the file keeps existing rows; the new tail is sparse until written.
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._capacity = capacity
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('capacity', ?)", (capacity,))
+
+    def _key(self, kind: str, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\x00{kind}\x00{text}".encode()).hexdigest()
+
+    def _allocate(self, count: int) -> list[int]:
+        """Return ``count`` free rows, growing the file or evicting LRU rows as needed."""
+        used = self._conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+        fresh = min(count, self.max_rows - used)
+        rows = []
+        if fresh > 0:
+            if used + fresh > self._capacity:
+                self._open(min(self.max_rows, max(used + fresh, self._capacity * 2, 1024)))
+            rows = list(range(used, used + fresh))
+        if len(rows) < count:
+            victims = self._conn.execute(
+                "SELECT key, row FROM rows ORDER BY used LIMIT ?", (count - len(rows),)
+            ).fetchall()
+            self._conn.executemany("DELETE FROM rows WHERE key = ?", [(key,) for key, _ in victims])
+            rows.extend(row for _, row in victims)
+            self.stats.evictions += len(victims)
+        return rows
+
+    def _rows(self, keys: list[str]) -> dict[str, int]:
+        found: dict[str, int] = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            found.update(self._conn.execute(f"SELECT key, row FROM rows WHERE key IN ({marks})", chunk))
+        return found
+
+    def _lookup(self, keys: list[str]) -> dict[str, np.ndarray]:
+        """Copy out cached vectors for ``keys`` and mark them as recently used."""
+        found = self._rows(keys)
+        if not found:
+            return {}
+        now = time.time()
+        self._conn.executemany("UPDATE rows SET used = ? WHERE key = ?", [(now, key) for key in found])
+        self._conn.commit()
+        return {key: np.array(self._vectors[row]) for key, row in found.items()}
+
+    def _store(self, keys: list[str], vectors: np.ndarray) -> None:
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (self.dim,))
+            self._open(0)
+        # Another thread may have stored some of these keys while we were embedding.
+        present = self._rows(keys)
+        if present:
+            keep = [i for i, key in enumerate(keys) if key not in present]
+            keys, vectors = [keys[i] for i in keep], vectors[keep]
+        # A batch larger than the whole cache only keeps its last rows.
+        keys, vectors = keys[-self.max_rows:], vectors[-self.max_rows:]
+        if not keys:
+            return
+        rows = self._allocate(len(keys))
+        self._vectors[rows] = vectors
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO rows (key, row, used) VALUES (?, ?, ?)",
+            [(key, row, now) for key, row in zip(keys, rows)],
+        )
+        self._conn.commit()
+
+    def _embed(self, kind: str, texts: list[str]) -> np.ndarray:
+        keys = [self._key(kind, text) for text in texts]
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            vectors = self._lookup(unique)
+            missing = [key for key in unique if key not in vectors]
+            self.stats.hits += sum(1 for key in keys if key in vectors)
+            self.stats.misses += len(missing)
+
+        if missing:
+            text_of = dict(zip(keys, texts))
+            new_vectors = []
+            for start in range(0, len(missing), self.batch_size):
+                batch = [text_of[key] for key in missing[start:start + self.batch_size]]
+                if kind == "query":
+                    new_vectors.append(self.embeddings.embed_query(batch[0]))
+                else:
+                    new_vectors.extend(self.embeddings.embed_documents(batch))
+                self.stats.upstream_calls += 1
+            new_array = np.asarray(new_vectors, dtype=np.float32)
+            with self._lock:
+                self._store(missing, new_array)
+            vectors.update(zip(missing, new_array))
+        return np.stack([vectors[key] for key in keys])
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        return self._embed("document", texts).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        # Providers such as Gemini embed queries with a different task type.
+        return self._embed("query", [text])[0].tolist()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+            self._conn.commit()
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._vectors = None
+            self._conn.close()
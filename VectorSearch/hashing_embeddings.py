@@ -0,0 +1,50 @@
+"""Offline bag-of-words embedder for demos, harnesses and tests.
+
+``HashingEmbeddings`` counts the words of a text into ``size`` hashed buckets.
+It needs no API key or model download, is deterministic across processes, and
+texts about the same topic get similar vectors, which is all the semantic
+splitter and the RAG harness need. ``latency`` makes ``embed_query`` sleep so
+that concurrency can be measured as if every query went to an embedding API.
+"""
+import hashlib
+import re
+import time
+from typing import Iterable
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_WORD = re.compile(r"[a-z]{3,}")
+
+
+class HashingEmbeddings(Embeddings):
+    """Hashed word counts; good enough to find topic shifts and rank passages by topic.
+
+    Args:
+        size (int): Vector dimension. Defaults to 256.
+        latency (float): Seconds ``embed_query`` sleeps before returning. Defaults to 0.
+        stopwords (Iterable[str]): Words left out of the counts. Words shorter than
+            three letters are always left out.
+    """
+
+    def __init__(self, size: int = 256, latency: float = 0.0, stopwords: Iterable[str] = ()):
+        self.size = size
+        self.latency = latency
+        self.stopwords = frozenset(stopwords)
+        self.query_calls = 0
+
+    def _embed(self, text: str) -> list[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        for word in _WORD.findall(text.lower()):
+            if word not in self.stopwords:
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.size] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        self.query_calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._embed(text)
@@ -0,0 +1,187 @@
+"""Incremental, deduplicated ingestion into the Chroma vector store.
+
+Re-running the notebook used to re-embed and re-insert every document.
+``ingest`` gives each document a stable ID, stores a hash of its content in the
+metadata, and only embeds documents that are new or whose content changed.
+Edits update in place only when ``key`` gives documents an identity; without
+it a changed document is a new one. Documents are streamed (e.g. from
+``loader.lazy_load()``) and embedded in
+batches on a thread pool; with ``delete_missing=True`` anything in the
+collection (or in ``scope``) that was not seen in this run is deleted. Every
+run that writes or deletes bumps the store's ingestion version, which caches
+built on the store (``semantic_cache``) compare against to invalidate. For
+Chroma the version is kept in a sidecar collection, so the store's own
+collection settings are never modified.
+
+    from ingestion import ingest
+    stats = ingest(vector_store, docs, key=lambda d: d.metadata["topic"])
+"""
+import hashlib
+import json
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator
+
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+HASH_FIELD = "content_hash"
+VERSION_FIELD = "ingestion_version"
+
+
+def content_hash(doc: Document) -> str:
+    """Hash of the text and metadata, ignoring the hash field itself."""
+    metadata = {k: v for k, v in doc.metadata.items() if k != HASH_FIELD}
+    payload = json.dumps([doc.page_content, metadata], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def stable_id(doc: Document, digest: str, key: Callable[[Document], str] | None = None) -> str:
+    """Content-addressed ID, or a hash of ``key(doc)`` so edits update in place."""
+    if key is None:
+        return digest[:32]
+    return hashlib.sha256(str(key(doc)).encode()).hexdigest()[:32]
+
+
+@dataclass
+class IngestStats:
+    seen: int = 0
+    skipped: int = 0
+    upserted: int = 0
+    deleted: int = 0
+    batches: int = 0
+    version: int = 0
+
+
+def _version_collection(store: VectorStore) -> Any:
+    # The version lives in the metadata of a small sidecar collection. Modifying the
+    # store's own collection metadata would drop "hnsw:space", which langchain_community's
+    # Chroma reads to pick its relevance score function.
+    name = f"{store._collection.name}_{VERSION_FIELD}"
+    return store._client.get_or_create_collection(name, embedding_function=None)
+
+
+def ingestion_version(store: VectorStore) -> int:
+    """Current ingestion version; 0 for a store that was never written by ``ingest``."""
+    if getattr(store, "_collection", None) is None:
+        return getattr(store, VERSION_FIELD, 0)
+    # Re-read from the client: another process may have ingested since this handle was opened.
+    metadata = _version_collection(store).metadata or {}
+    return int(metadata.get(VERSION_FIELD, 0))
+
+
+def bump_ingestion_version(store: VectorStore) -> int:
+    """Record that the store's contents changed and return the new version."""
+    version = ingestion_version(store) + 1
+    if getattr(store, "_collection", None) is None:
+        setattr(store, VERSION_FIELD, version)
+    else:
+        _version_collection(store).modify(metadata={VERSION_FIELD: version})
+        # Mirror on the handle, so caches built on it see the bump without a read.
+        setattr(store, VERSION_FIELD, version)
+    return version
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _stored_hashes(store: VectorStore, ids: list[str]) -> dict[str, str]:
+    try:
+        return {doc.id: doc.metadata.get(HASH_FIELD) for doc in store.get_by_ids(ids)}
+    except NotImplementedError:
+        # langchain_community's Chroma only has the raw ``get``.
+        found = store.get(ids=ids, include=["metadatas"])
+        return {i: (m or {}).get(HASH_FIELD) for i, m in zip(found["ids"], found["metadatas"])}
+
+
+def _all_ids(store: VectorStore, scope: dict | None, page_size: int) -> Iterator[str]:
+    # Chroma-style paging; VectorStore itself has no "list everything" API.
+    offset = 0
+    while True:
+        page = store.get(where=scope, limit=page_size, offset=offset, include=[])
+        ids = page.get("ids", [])
+        yield from ids
+        if len(ids) < page_size:
+            return
+        offset += page_size
+
+
+def ingest(
+    store: VectorStore,
+    documents: Iterable[Document],
+    key: Callable[[Document], str] | None = None,
+    batch_size: int = 64,
+    workers: int = 4,
+    delete_missing: bool = False,
+    scope: dict | None = None,
+) -> IngestStats:
+    """Embed and upsert only new or changed documents.
+
+    Args:
+        store (VectorStore): Target store, e.g. the notebook's ``Chroma`` instance.
+        documents (Iterable[Document]): Streamed documents; not held in memory all at once.
+        key (Callable[[Document], str] | None): Identity of a document across runs; needed
+            for edits to replace the stored version. With ``None`` the ID is the content
+            hash, so an edited document is stored next to the old one, which is only
+            removed by a run with ``delete_missing=True``.
+        batch_size (int): Documents per embedding call. Defaults to 64.
+        workers (int): Batches embedded in parallel. Defaults to 4.
+        delete_missing (bool): Delete stored documents not present in ``documents``.
+        scope (dict | None): Chroma ``where`` filter limiting what ``delete_missing`` may delete.
+    Returns:
+        IngestStats: What was skipped, written and deleted, and the resulting ingestion version.
+    """
+    stats = IngestStats()
+    seen_ids: set[str] = set()
+    in_flight: set[Future] = set()
+
+    def drain(block_until: int) -> None:
+        nonlocal in_flight
+        while len(in_flight) > block_until:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                future.result()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for batch in _batched(documents, batch_size):
+                by_id: dict[str, Document] = {}
+                for doc in batch:
+                    digest = content_hash(doc)
+                    doc_id = stable_id(doc, digest, key)
+                    stats.seen += 1
+                    if doc_id in seen_ids or doc_id in by_id:
+                        stats.skipped += 1
+                        continue
+                    by_id[doc_id] = Document(
+                        page_content=doc.page_content, metadata={**doc.metadata, HASH_FIELD: digest}, id=doc_id
+                    )
+                seen_ids.update(by_id)
+                stored = _stored_hashes(store, list(by_id))
+                changed = [d for i, d in by_id.items() if stored.get(i) != d.metadata[HASH_FIELD]]
+                stats.skipped += len(by_id) - len(changed)
+                if not changed:
+                    continue
+                stats.upserted += len(changed)
+                stats.batches += 1
+                # Bound the queue so a huge corpus never sits in memory waiting to embed.
+                drain(workers * 2)
+                in_flight.add(pool.submit(store.add_documents, changed, ids=[d.id for d in changed]))
+            drain(0)
+
+        if delete_missing:
+            stale = [doc_id for doc_id in _all_ids(store, scope, page_size=1000) if doc_id not in seen_ids]
+            for chunk in _batched(stale, 1000):
+                store.delete(ids=chunk)
+                stats.deleted += len(chunk)
+    finally:
+        # A failed batch leaves the earlier ones written; caches must not keep serving the old contents.
+        if stats.upserted or stats.deleted:
+            stats.version = bump_ingestion_version(store)
+    if not (stats.upserted or stats.deleted):
+        stats.version = ingestion_version(store)
+    return stats
@@ -0,0 +1,338 @@
+"""In-process vector store backed by contiguous NumPy arrays.
+
+For small-to-medium collections an exact, vectorised scan beats Chroma's
+sqlite + HNSW round trip. ``NumpyVectorStore`` keeps all vectors in one
+float32 matrix (unit-normalised for cosine), answers ``k`` nearest neighbours
+with one matrix product plus ``argpartition``, applies metadata filters as
+boolean column masks *before* scoring, and can search many queries at once.
+``save`` / ``load`` persist the matrix with ``np.save`` and reopen it memory-mapped.
+
+    store = NumpyVectorStore(embeddings)
+    store.add_documents(docs)
+    store.similarity_search("edge computing", k=2, filter={"level": "beginner", "year": {"$gte": 2024}})
+"""
+import json
+import os
+import uuid
+from typing import Any, Callable, Iterable, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+_COMPARATORS: dict[str, Callable[[np.ndarray, Any], np.ndarray]] = {
+    "$eq": lambda column, value: column == value,
+    "$ne": lambda column, value: column != value,
+    "$gt": lambda column, value: column > value,
+    "$gte": lambda column, value: column >= value,
+    "$lt": lambda column, value: column < value,
+    "$lte": lambda column, value: column <= value,
+    "$in": lambda column, value: np.isin(column, list(value)),
+    "$nin": lambda column, value: ~np.isin(column, list(value)),
+}
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+
+
+class NumpyVectorStore(VectorStore):
+    """Exact nearest-neighbour store over a NumPy matrix with columnar metadata filters.
+
+    Args:
+        embedding (Embeddings): Embedder used for texts and queries.
+        metric (str): "cosine" (vectors are normalised on insert) or "dot". Defaults to "cosine".
+    """
+
+    def __init__(self, embedding: Embeddings, metric: str = "cosine"):
+        if metric not in ("cosine", "dot"):
+            raise ValueError(f"Unsupported metric: {metric!r}")
+        self._embedding = embedding
+        self.metric = metric
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._size = 0
+        self._alive = np.zeros(0, dtype=bool)
+        self._ids: list[str] = []
+        self._texts: list[str] = []
+        self._metadatas: list[dict] = []
+        self._row_of: dict[str, int] = {}
+        self._columns: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return int(self._alive[: self._size].sum())
+
+    # -- writes -----------------------------------------------------------------
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.metric == "cosine":
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.maximum(norms, 1e-12)
+        return vectors
+
+    def _reserve(self, extra: int, dim: int) -> None:
+        needed = self._size + extra
+        if self._vectors.shape[1] not in (0, dim):
+            raise ValueError(f"Expected {self._vectors.shape[1]}-dim vectors, got {dim}")
+        if needed <= self._vectors.shape[0] and self._vectors.flags.writeable:
+            return
+        # Amortised doubling; also copies a read-only memmap into memory before the first write.
+        capacity = max(needed, 2 * self._vectors.shape[0], 1024)
+        grown = np.zeros((capacity, dim), dtype=np.float32)
+        if self._size:
+            grown[: self._size] = self._vectors[: self._size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[: self._size] = self._alive[: self._size]
+        self._vectors, self._alive = grown, alive
+
+    def add_embeddings(
+        self,
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]] | np.ndarray,
+        metadatas: Sequence[dict] | None = None,
+        ids: Sequence[str] | None = None,
+    ) -> list[str]:
+        """Insert precomputed vectors; an existing id is replaced (upsert)."""
+        count = len(texts)
+        if not count:
+            return []
+        vectors = self._prepare(embeddings)
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in range(count)]
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in range(count)]
+        self._reserve(count, vectors.shape[1])
+        start = self._size
+        self._vectors[start:start + count] = vectors
+        self._alive[start:start + count] = True
+        for offset, doc_id in enumerate(ids):
+            old = self._row_of.get(doc_id)
+            if old is not None:
+                self._alive[old] = False
+            self._row_of[doc_id] = start + offset
+        self._ids.extend(ids)
+        self._texts.extend(texts)
+        self._metadatas.extend(dict(m) for m in metadatas)
+        self._size += count
+        self._columns.clear()
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: list[dict] | None = None,
+        *,
+        ids: list[str] | None = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.add_embeddings(texts, self._embedding.embed_documents(texts), metadatas, ids)
+
+    def add_documents(self, documents: list[Document], **kwargs: Any) -> list[str]:
+        ids = kwargs.pop("ids", None)
+        if ids is None and any(doc.id for doc in documents):
+            ids = [doc.id or str(uuid.uuid4()) for doc in documents]
+        return self.add_texts(
+            [doc.page_content for doc in documents], [doc.metadata for doc in documents], ids=ids
+        )
+
+    def delete(self, ids: list[str] | None = None, **kwargs: Any) -> bool | None:
+        if ids is None:
+            return False
+        for doc_id in ids:
+            row = self._row_of.pop(doc_id, None)
+            if row is not None:
+                self._alive[row] = False
+        if self._size and self._alive[: self._size].sum() < self._size // 2:
+            self.compact()
+        return True
+
+    def compact(self) -> None:
+        """Drop deleted rows so scans stay contiguous."""
+        keep = np.flatnonzero(self._alive[: self._size])
+        self._vectors = np.ascontiguousarray(self._vectors[keep])
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._ids = [self._ids[i] for i in keep]
+        self._texts = [self._texts[i] for i in keep]
+        self._metadatas = [self._metadatas[i] for i in keep]
+        self._row_of = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._size = len(keep)
+        self._columns.clear()
+
+    def get_by_ids(self, ids: Sequence[str], /) -> list[Document]:
+        return [self._document(self._row_of[i]) for i in ids if i in self._row_of]
+
+    def get_vectors(self, ids: Sequence[str]) -> np.ndarray:
+        """Stored vectors (unit-normalised for cosine) of ``ids``, one row each."""
+        return self._vectors[[self._row_of[i] for i in ids]]
+
+    def update_metadata(self, doc_id: str, metadata: dict) -> None:
+        """Replace one document's metadata in place, without re-embedding it."""
+        self._metadatas[self._row_of[doc_id]] = dict(metadata)
+        self._columns.clear()
+
+    # -- filtering --------------------------------------------------------------
+
+    def _column(self, field: str) -> tuple[np.ndarray, np.ndarray]:
+        """Metadata field as (values, present) arrays, typed for vectorised comparison."""
+        if field not in self._columns:
+            raw = [m.get(field) for m in self._metadatas[: self._size]]
+            present = np.fromiter((v is not None for v in raw), dtype=bool, count=len(raw))
+            values = [v for v in raw if v is not None]
+            if values and all(_is_number(v) for v in values):
+                column = np.array([np.nan if v is None else v for v in raw], dtype=np.float64)
+            elif values and all(isinstance(v, str) for v in values):
+                column = np.array(["" if v is None else v for v in raw], dtype=np.str_)
+            else:
+                column = np.empty(len(raw), dtype=object)
+                column[:] = raw
+            self._columns[field] = (column, present)
+        return self._columns[field]
+
+    def filter_mask(self, filter: dict | None) -> np.ndarray:
+        """Boolean mask of live rows matching a Chroma-style ``where`` filter."""
+        mask = self._alive[: self._size].copy()
+        if not filter:
+            return mask
+        for field, condition in filter.items():
+            if field == "$and":
+                for sub in condition:
+                    mask &= self.filter_mask(sub)
+                continue
+            if field == "$or":
+                any_mask = np.zeros(self._size, dtype=bool)
+                for sub in condition:
+                    any_mask |= self.filter_mask(sub)
+                mask &= any_mask
+                continue
+            column, present = self._column(field)
+            operators = condition if isinstance(condition, dict) else {"$eq": condition}
+            for operator, value in operators.items():
+                try:
+                    compare = _COMPARATORS[operator]
+                except KeyError:
+                    raise ValueError(f"Unsupported filter operator: {operator!r}") from None
+                matched = np.asarray(compare(column, value), dtype=bool)
+                mask &= matched if operator in ("$ne", "$nin") else matched & present
+        return mask
+
+    def ids_where(self, filter: dict | None = None) -> list[str]:
+        """IDs of live documents matching ``filter``."""
+        return [self._ids[row] for row in np.flatnonzero(self.filter_mask(filter))]
+
+    # -- search -----------------------------------------------------------------
+
+    def _query_matrix(self, vectors: Sequence[Sequence[float]] | np.ndarray) -> np.ndarray:
+        return self._prepare(np.atleast_2d(np.asarray(vectors, dtype=np.float32)))
+
+    def search_vectors(
+        self, queries: Sequence[Sequence[float]] | np.ndarray, k: int = 4, filter: dict | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Top-``k`` rows and scores for every query in one matrix product.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: ``(rows, scores)``, both shaped ``(len(queries), k')``
+            with ``k' = min(k, matches)``, best first.
+        """
+        queries = self._query_matrix(queries)
+        candidates = np.flatnonzero(self.filter_mask(filter))
+        k = min(k, len(candidates))
+        if k == 0:
+            empty = np.zeros((len(queries), 0))
+            return empty.astype(np.int64), empty
+        matrix = self._vectors[candidates] if len(candidates) < self._size else self._vectors[: self._size]
+        scores = queries @ matrix.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        return candidates[top], np.take_along_axis(top_scores, order, axis=1)
+
+    def _document(self, row: int) -> Document:
+        return Document(page_content=self._texts[row], metadata=dict(self._metadatas[row]), id=self._ids[row])
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: list[float], k: int = 4, filter: dict | None = None, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        rows, scores = self.search_vectors([embedding], k, filter)
+        return [(self._document(int(r)), float(s)) for r, s in zip(rows[0], scores[0])]
+
+    def similarity_search_by_vector(
+        self, embedding: list[float], k: int = 4, filter: dict | None = None, **kwargs: Any
+    ) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, filter)]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: dict | None = None, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k, filter)
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: dict | None = None, **kwargs: Any
+    ) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def batch_similarity_search_with_score(
+        self, queries: list[str], k: int = 4, filter: dict | None = None
+    ) -> list[list[tuple[Document, float]]]:
+        """Embed all ``queries`` in one call and search them with one matrix product."""
+        vectors = self._embedding.embed_documents(queries)
+        rows, scores = self.search_vectors(vectors, k, filter)
+        return [
+            [(self._document(int(r)), float(s)) for r, s in zip(row_ids, row_scores)]
+            for row_ids, row_scores in zip(rows, scores)
+        ]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        if self.metric == "cosine":
+            return lambda score: (score + 1.0) / 2.0
+        return lambda score: score
+
+    # -- persistence ------------------------------------------------------------
+
+    def save(self, directory: str) -> None:
+        """Write ``vectors.npy`` plus ``docs.jsonl`` (ids, texts, metadata) to ``directory``."""
+        self.compact()
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "vectors.npy"), self._vectors[: self._size])
+        with open(os.path.join(directory, "docs.jsonl"), "w", encoding="utf-8") as f:
+            for doc_id, text, metadata in zip(self._ids, self._texts, self._metadatas):
+                f.write(json.dumps({"id": doc_id, "text": text, "metadata": metadata}, ensure_ascii=False) + "\n")
+        with open(os.path.join(directory, "store.json"), "w") as f:
+            json.dump({"metric": self.metric}, f)
+
+    @classmethod
+    def load(cls, directory: str, embedding: Embeddings, mmap: bool = True) -> "NumpyVectorStore":
+        """Reopen a saved store; with ``mmap`` the matrix is paged in lazily."""
+        with open(os.path.join(directory, "store.json")) as f:
+            store = cls(embedding, **json.load(f))
+        store._vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r" if mmap else None)
+        with open(os.path.join(directory, "docs.jsonl"), encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                store._ids.append(record["id"])
+                store._texts.append(record["text"])
+                store._metadatas.append(record["metadata"])
+        store._size = len(store._ids)
+        store._alive = np.ones(store._size, dtype=bool)
+        store._row_of = {doc_id: row for row, doc_id in enumerate(store._ids)}
+        return store
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: list[dict] | None = None,
+        *,
+        ids: list[str] | None = None,
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
@@ -0,0 +1,120 @@
+"""Benchmark: NumpyVectorStore vs. Chroma on random vectors.
+
+Both stores get the same vectors with ``year`` / ``level`` metadata. Latency is
+measured per query (with and without a metadata filter) and recall@k is taken
+against an exact NumPy scan, so the speed of Chroma's approximate HNSW index is
+shown next to what it costs in missed neighbours.
+
+    python -m VectorSearch.numpy_store_benchmark --sizes 10000 100000
+    python -m VectorSearch.numpy_store_benchmark --sizes 1000000 --skip-chroma
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from langchain_community.vectorstores import Chroma
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from VectorSearch.numpy_store import NumpyVectorStore
+
+LEVELS = ["beginner", "intermediate", "advanced"]
+FILTER = {"$and": [{"level": "beginner"}, {"year": {"$gte": 2023}}]}
+
+
+def make_data(size: int, dim: int, rng: np.random.Generator):
+    vectors = rng.standard_normal((size, dim), dtype=np.float32)
+    metadatas = [{"level": LEVELS[i % 3], "year": 2020 + i % 6} for i in range(size)]
+    return vectors, metadatas
+
+
+def exact_top_k(vectors: np.ndarray, mask: np.ndarray, queries: np.ndarray, k: int) -> list[set[int]]:
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    candidates = np.flatnonzero(mask)
+    scores = queries / np.linalg.norm(queries, axis=1, keepdims=True) @ unit[candidates].T
+    return [set(candidates[np.argsort(-row)[:k]].tolist()) for row in scores]
+
+
+def timed(search, queries: np.ndarray) -> tuple[list[list[int]], float]:
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        latencies.append(time.perf_counter() - start)
+    return results, statistics.median(latencies) * 1000
+
+
+def report(label: str, results: list[list[int]], truth: list[set[int]], ms: float, k: int) -> None:
+    recall = statistics.mean(len(set(found) & expected) / k for found, expected in zip(results, truth))
+    print(f"  {label:<24} p50 {ms:8.3f} ms/query  recall@{k} {recall:.3f}")
+
+
+def bench(size: int, dim: int, queries: int, k: int, skip_chroma: bool) -> None:
+    rng = np.random.default_rng(0)
+    vectors, metadatas = make_data(size, dim, rng)
+    query_vectors = rng.standard_normal((queries, dim), dtype=np.float32)
+    ids = [str(i) for i in range(size)]
+    texts = [f"doc {i}" for i in range(size)]
+    embedding = DeterministicFakeEmbedding(size=dim)
+    everything = np.ones(size, dtype=bool)
+    filtered = np.array([m["level"] == "beginner" and m["year"] >= 2023 for m in metadatas])
+    truth = exact_top_k(vectors, everything, query_vectors, k)
+    truth_filtered = exact_top_k(vectors, filtered, query_vectors, k)
+    print(f"{size} vectors x {dim} dims, {queries} queries, k={k}")
+
+    start = time.perf_counter()
+    store = NumpyVectorStore(embedding)
+    store.add_embeddings(texts, vectors, metadatas, ids)
+    print(f"  numpy insert             {time.perf_counter() - start:8.2f} s")
+
+    def numpy_search(query, filter=None):
+        rows, _ = store.search_vectors([query], k, filter)
+        return rows[0].tolist()
+
+    results, ms = timed(numpy_search, query_vectors)
+    report("numpy", results, truth, ms, k)
+    results, ms = timed(lambda q: numpy_search(q, FILTER), query_vectors)
+    report("numpy + filter", results, truth_filtered, ms, k)
+    start = time.perf_counter()
+    rows, _ = store.search_vectors(query_vectors, k)
+    batch_ms = (time.perf_counter() - start) * 1000 / queries
+    report("numpy batched", rows.tolist(), truth, batch_ms, k)
+
+    if skip_chroma:
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        chroma = Chroma(collection_name="benchmark", embedding_function=embedding, persist_directory=directory,
+                        collection_metadata={"hnsw:space": "cosine"})
+        start = time.perf_counter()
+        # Chroma caps the batch size per add; insert precomputed vectors in chunks.
+        for offset in range(0, size, 5000):
+            chunk = slice(offset, offset + 5000)
+            chroma._collection.add(ids=ids[chunk], embeddings=vectors[chunk], metadatas=metadatas[chunk],
+                                   documents=texts[chunk])
+        print(f"  chroma insert            {time.perf_counter() - start:8.2f} s")
+
+        def chroma_search(query, filter=None):
+            found = chroma._collection.query(query_embeddings=[query], n_results=k, where=filter, include=[])
+            return [int(i) for i in found["ids"][0]]
+
+        results, ms = timed(chroma_search, query_vectors)
+        report("chroma", results, truth, ms, k)
+        results, ms = timed(lambda q: chroma_search(q, FILTER), query_vectors)
+        report("chroma + filter", results, truth_filtered, ms, k)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    arg_parser.add_argument("--dim", type=int, default=768)
+    arg_parser.add_argument("--queries", type=int, default=50)
+    arg_parser.add_argument("--k", type=int, default=10)
+    arg_parser.add_argument("--skip-chroma", action="store_true", help="Only run the NumPy store (e.g. at 1M).")
+    args = arg_parser.parse_args()
+    for size in args.sizes:
+        bench(size, args.dim, args.queries, args.k, args.skip_chroma)
+
+
+if __name__ == "__main__":
+    main()
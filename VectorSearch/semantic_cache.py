@@ -0,0 +1,286 @@
+"""Embedding-similarity cache for question answering over a vector store.
+
+Users ask the same few questions in many phrasings, so an exact-match cache
+misses most of them. ``SemanticCache`` embeds each query once and looks it up
+in a small in-process ``NumpyVectorStore`` of earlier queries; when one is
+within ``threshold`` cosine similarity, its retrieved document IDs (and its
+answer, if one was generated) are reused and neither ``similarity_search`` nor
+the LLM runs again.
+
+Entries are tagged with the store's ingestion version (see ``ingestion``).
+When ``ingest`` changes the collection the version moves on, every older
+entry is dropped, and the next lookups go back to the store. Reading the
+version from Chroma costs about as much as the cache lookup itself, so it is
+re-read at most every ``version_ttl`` seconds; an ``ingest`` through the same
+store handle is seen at once, one from another process within the TTL.
+
+    cache = SemanticCache(vector_store, threshold=0.9)
+    docs = cache.search("What are the benefits of edge computing?", k=2)
+    answer = cache.answer("Why use edge computing?", lambda q, docs: chain.invoke(...), k=2)
+    print(cache.stats.as_dict())
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import Runnable, RunnableLambda
+from langchain_core.vectorstores import VectorStore
+
+from Callbacks.stage_metrics import Histogram
+from VectorSearch.ingestion import VERSION_FIELD, ingestion_version
+from VectorSearch.numpy_store import NumpyVectorStore
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+@dataclass
+class SemanticCacheStats:
+    hits: int = 0
+    misses: int = 0
+    answer_hits: int = 0
+    answer_misses: int = 0
+    invalidated: int = 0
+    evictions: int = 0
+    hit_latency: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+    miss_latency: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        counters = {k: v for k, v in asdict(self).items() if not isinstance(v, Histogram)}
+        latencies = {
+            f"{name}_{label}_ms": round(q * 1000, 3) if (q := histogram.quantile(quantile)) is not None else None
+            for name, histogram in (("hit", self.hit_latency), ("miss", self.miss_latency))
+            for label, quantile in (("p50", 0.5), ("p95", 0.95))
+        }
+        return {**counters, "hit_rate": self.hit_rate, **latencies}
+
+
+@dataclass
+class CachedRetrieval:
+    query: str
+    documents: list[Document]
+    answer: str | None
+    score: float
+    hit: bool
+    entry_id: str | None = None
+
+
+def _search_by_vector(store: VectorStore, vector: list[float], k: int) -> list[Document]:
+    collection = getattr(store, "_collection", None)
+    if collection is None:
+        return store.similarity_search_by_vector(vector, k=k)
+    # langchain_community's Chroma drops the IDs from its results; query the collection directly.
+    raw = collection.query(query_embeddings=[vector], n_results=k, include=["documents", "metadatas"])
+    return [
+        Document(page_content=text, metadata=metadata or {}, id=i)
+        for i, text, metadata in zip(raw["ids"][0], raw["documents"][0], raw["metadatas"][0])
+    ]
+
+
+def _documents_by_ids(store: VectorStore, ids: list[str]) -> list[Document]:
+    try:
+        found = {doc.id: doc for doc in store.get_by_ids(ids)}
+    except NotImplementedError:
+        # langchain_community's Chroma only has the raw ``get``.
+        raw = store.get(ids=ids, include=["documents", "metadatas"])
+        found = {
+            i: Document(page_content=text, metadata=metadata or {}, id=i)
+            for i, text, metadata in zip(raw["ids"], raw["documents"], raw["metadatas"])
+        }
+    return [found[i] for i in ids if i in found]
+
+
+class SemanticCache:
+    """Paraphrase-tolerant cache of retrievals and answers over ``store``.
+
+    Args:
+        store (VectorStore): The store being searched, e.g. the notebook's ``Chroma``.
+        embeddings (Embeddings | None): Query embedder. Defaults to ``store.embeddings``;
+            it must be the one the store was built with, since the same vector is reused
+            for the store search on a miss.
+        threshold (float): Minimum cosine similarity for a hit. Defaults to 0.9.
+        max_entries (int): Cached queries kept before the least recently used is evicted.
+            Defaults to 10000.
+        directory (str | None): Persist the cache index here (``save``) and reload it on start.
+        version_ttl (float): Seconds a version read from the store is trusted before it is
+            read again. Defaults to 1.0; 0 reads it on every lookup.
+    """
+
+    def __init__(
+        self,
+        store: VectorStore,
+        embeddings: Embeddings | None = None,
+        threshold: float = 0.9,
+        max_entries: int = 10_000,
+        directory: str | None = None,
+        version_ttl: float = 1.0,
+    ):
+        self.store = store
+        self.embeddings = embeddings or store.embeddings
+        if self.embeddings is None:
+            raise ValueError("The store has no embeddings; pass embeddings=")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.directory = directory
+        self.stats = SemanticCacheStats()
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+        self._recency: OrderedDict[str, None] = OrderedDict((i, None) for i in self._index.ids_where())
+        self.version_ttl = version_ttl
+        self._version: int | None = None
+        self._version_read_at = float("-inf")
+        self._mirrored_version: int | None = None
+
+    def _load_index(self) -> NumpyVectorStore:
+        if self.directory:
+            try:
+                return NumpyVectorStore.load(self.directory, self.embeddings, mmap=False)
+            except FileNotFoundError:
+                pass
+        return NumpyVectorStore(self.embeddings)
+
+    def save(self) -> None:
+        """Write the cache index to ``directory``."""
+        if not self.directory:
+            raise ValueError("SemanticCache was created without a directory")
+        with self._lock:
+            self._index.save(self.directory)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    # -- invalidation -----------------------------------------------------------
+
+    def _sync_version(self) -> int:
+        """Drop entries from older ingestion versions; return the current version."""
+        now = time.monotonic()
+        mirrored = getattr(self.store, VERSION_FIELD, None)
+        if now - self._version_read_at >= self.version_ttl or mirrored != self._mirrored_version:
+            version = ingestion_version(self.store)
+            self._version_read_at = now
+            self._mirrored_version = mirrored
+        else:
+            version = self._version
+        if version != self._version:
+            stale = self._index.ids_where({"version": {"$ne": version}})
+            if stale:
+                self._forget(stale)
+                self.stats.invalidated += len(stale)
+            self._version = version
+        return version
+
+    def _forget(self, ids: list[str]) -> None:
+        self._index.delete(ids)
+        for entry_id in ids:
+            self._recency.pop(entry_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._forget(list(self._recency))
+
+    # -- lookup -----------------------------------------------------------------
+
+    def _nearest(self, vector: list[float], k: int, version: int) -> tuple[Document, float] | None:
+        # Only entries of the current version that retrieved at least ``k`` documents qualify.
+        found = self._index.similarity_search_by_vector_with_score(
+            vector, 1, {"$and": [{"version": version}, {"k": {"$gte": k}}]}
+        )
+        if not found or found[0][1] < self.threshold:
+            return None
+        return found[0]
+
+    def _remember(self, entry_id: str, query: str, vector: list[float], metadata: dict) -> None:
+        self._index.add_embeddings([query], [vector], [metadata], ids=[entry_id])
+        self._recency[entry_id] = None
+        self._recency.move_to_end(entry_id)
+        overflow = len(self._recency) - self.max_entries
+        if overflow > 0:
+            doomed = [entry_id for entry_id, _ in zip(self._recency, range(overflow))]
+            self._forget(doomed)
+            self.stats.evictions += len(doomed)
+
+    def lookup(self, query: str, k: int = 4) -> CachedRetrieval:
+        """Retrieve ``k`` documents for ``query``, from the cache when a close query was seen.
+
+        A miss searches the store with the query vector already computed and caches the
+        result, so the embedder runs exactly once per call either way.
+        """
+        start = time.perf_counter()
+        vector = self.embeddings.embed_query(query)
+        with self._lock:
+            version = self._sync_version()
+            nearest = self._nearest(vector, k, version)
+            if nearest is not None:
+                entry, score = nearest
+                self._recency.move_to_end(entry.id)
+        if nearest is not None:
+            doc_ids = entry.metadata["doc_ids"][:k]
+            documents = _documents_by_ids(self.store, doc_ids)
+            # A document deleted outside ``ingest`` (no version bump) turns the hit into a miss.
+            if len(documents) == len(doc_ids):
+                with self._lock:
+                    self.stats.hits += 1
+                    self.stats.hit_latency.observe(time.perf_counter() - start)
+                return CachedRetrieval(entry.page_content, documents, entry.metadata["answer"], score, True, entry.id)
+            with self._lock:
+                self._forget([entry.id])
+
+        documents = _search_by_vector(self.store, vector, k)
+        entry_id = str(uuid.uuid4())
+        metadata = {"doc_ids": [doc.id for doc in documents], "k": k, "answer": None, "version": version}
+        with self._lock:
+            if version == self._version:
+                self._remember(entry_id, query, vector, metadata)
+            self.stats.misses += 1
+            self.stats.miss_latency.observe(time.perf_counter() - start)
+        return CachedRetrieval(query, documents, None, 0.0, False, entry_id)
+
+    def search(self, query: str, k: int = 4) -> list[Document]:
+        """Drop-in for ``store.similarity_search(query, k)``."""
+        return self.lookup(query, k).documents
+
+    def answer(self, query: str, respond: Callable[[str, list[Document]], str], k: int = 4) -> str:
+        """Answer ``query``, reusing the answer of a cached close query when there is one.
+
+        Args:
+            query (str): The user question.
+            respond (Callable[[str, list[Document]], str]): Generates an answer from the question
+                and retrieved documents, e.g. a prompt | model | parser chain.
+            k (int): Documents retrieved for the answer. Defaults to 4.
+        """
+        result = self.lookup(query, k)
+        with self._lock:
+            if result.answer is not None:
+                self.stats.answer_hits += 1
+            else:
+                self.stats.answer_misses += 1
+        if result.answer is not None:
+            return result.answer
+        answer = respond(query, result.documents)
+        with self._lock:
+            # Attach the answer to the entry that served this lookup, unless it was dropped meanwhile.
+            entry = self._index.get_by_ids([result.entry_id])
+            if entry:
+                self._index.update_metadata(result.entry_id, {**entry[0].metadata, "answer": answer})
+        return answer
+
+    def as_runnable(self, respond: Runnable, k: int = 4) -> Runnable:
+        """Question in, answer out; ``respond`` is invoked with ``{"question", "context"}`` on a miss."""
+
+        def run(question: str) -> str:
+            return self.answer(
+                question,
+                lambda q, docs: respond.invoke({"question": q, "context": "\n\n".join(d.page_content for d in docs)}),
+                k,
+            )
+
+        return RunnableLambda(run, name="SemanticCache")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The topic directories are imported as top-level packages (``VectorSearch.embedding_cache``).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
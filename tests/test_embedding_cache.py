@@ -0,0 +1,114 @@
+import time
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from VectorSearch.embedding_cache import MmapEmbeddingCache
+
+DIM = 16
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic fake embedder that records every upstream call."""
+
+    def __init__(self):
+        self.inner = DeterministicFakeEmbedding(size=DIM)
+        self.document_batches: list[list[str]] = []
+        self.queries: list[str] = []
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.document_batches.append(list(texts))
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        self.queries.append(text)
+        return self.inner.embed_query(text)
+
+    @property
+    def embedded_texts(self) -> list[str]:
+        return [text for batch in self.document_batches for text in batch]
+
+
+@pytest.fixture
+def upstream() -> CountingEmbeddings:
+    return CountingEmbeddings()
+
+
+def fresh(texts: list[str]) -> np.ndarray:
+    return np.asarray(DeterministicFakeEmbedding(size=DIM).embed_documents(texts), dtype=np.float32)
+
+
+def test_duplicates_in_one_batch_are_embedded_once(tmp_path, upstream):
+    cache = MmapEmbeddingCache(upstream, str(tmp_path))
+    vectors = cache.embed_documents(["a", "b", "a", "a", "b"])
+
+    assert upstream.embedded_texts == ["a", "b"]
+    assert vectors[0] == vectors[2] == vectors[3]
+    assert vectors[1] == vectors[4]
+    assert cache.stats.misses == 2
+
+
+def test_only_misses_go_upstream_in_batches(tmp_path, upstream):
+    cache = MmapEmbeddingCache(upstream, str(tmp_path), batch_size=2)
+    cache.embed_documents(["a", "b"])
+    upstream.document_batches.clear()
+
+    cache.embed_documents(["a", "c", "b", "d", "e"])
+
+    assert upstream.document_batches == [["c", "d"], ["e"]]
+    assert cache.stats.hits == 2
+    assert cache.stats.upstream_calls == 3
+
+
+def test_queries_and_documents_are_cached_separately(tmp_path, upstream):
+    cache = MmapEmbeddingCache(upstream, str(tmp_path))
+    cache.embed_documents(["a"])
+    cache.embed_query("a")
+    cache.embed_query("a")
+
+    assert upstream.queries == ["a"]
+    assert upstream.embedded_texts == ["a"]
+
+
+def test_lru_eviction_at_capacity(tmp_path, upstream):
+    cache = MmapEmbeddingCache(upstream, str(tmp_path), max_rows=3)
+    for text in ["a", "b", "c"]:
+        cache.embed_documents([text])
+        time.sleep(0.01)
+    cache.embed_documents(["a"])  # "b" is now the least recently used
+    time.sleep(0.01)
+    cache.embed_documents(["d"])
+
+    assert cache.stats.evictions == 1
+    upstream.document_batches.clear()
+    vectors = cache.embed_documents(["a", "c", "d", "b"])
+    assert upstream.embedded_texts == ["b"]
+    np.testing.assert_allclose(vectors, fresh(["a", "c", "d", "b"]), rtol=1e-6)
+
+
+def test_persists_across_reopen(tmp_path, upstream):
+    texts = [f"text {i}" for i in range(50)]
+    cache = MmapEmbeddingCache(upstream, str(tmp_path))
+    first = cache.embed_documents(texts)
+    cache.close()
+
+    reopened_upstream = CountingEmbeddings()
+    reopened = MmapEmbeddingCache(reopened_upstream, str(tmp_path))
+    second = reopened.embed_documents(texts)
+
+    assert reopened_upstream.document_batches == []
+    assert reopened.stats.hits == len(texts)
+    assert second == first
+
+
+def test_vectors_match_fresh_embeddings(tmp_path, upstream):
+    texts = ["edge computing", "cloud computing", "edge computing", ""]
+    cache = MmapEmbeddingCache(upstream, str(tmp_path))
+
+    missed = np.asarray(cache.embed_documents(texts))
+    hit = np.asarray(cache.embed_documents(texts))
+
+    np.testing.assert_allclose(missed, fresh(texts), rtol=1e-6, atol=1e-7)
+    np.testing.assert_allclose(hit, fresh(texts), rtol=1e-6, atol=1e-7)
+    assert missed.shape == (4, DIM)